@@ -0,0 +1,301 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import typing
+from ChipLibrary import ChipLibrary
+
+# The label of the flip-flops of a chip, as the start or the end of a path.
+STATE = "state"
+
+# The nodes of the flip-flops inside a chip: their outputs start paths, and
+# their inputs end them. Pins and wires always have non-empty names.
+_STATE_SOURCE = ("", 0)
+_STATE_SINK = ("", 1)
+
+
+class Summary:
+    """The cost of a chip: its numbers of Nand gates and flip-flops, and the
+    longest combinational paths between its pins.
+
+    The paths are kept by their (source, sink), where a source is an input
+    bit (pin, index) or STATE for the outputs of the chip's flip-flops, and
+    a sink is an output bit or STATE for their inputs. Their lengths are in
+    Nand gates.
+    """
+    __slots__ = ("nands", "dffs", "delays", "arrivals", "parts")
+
+    def __init__(self, nands: int, dffs: int, delays: dict,
+                 arrivals: typing.Optional[dict] = None,
+                 parts: typing.Optional[list] = None) -> None:
+        """
+        Args:
+            nands (int): the number of Nand gates.
+            dffs (int): the number of flip-flops.
+            delays (dict): the lengths of the longest paths, by (source,
+                sink).
+            arrivals (typing.Optional[dict]): for tracing the paths, by node
+                and source: (length, previous node, segment), where the
+                segment is the part that the path went through, see
+                Analyzer.trace.
+            parts (typing.Optional[list]): (label, chip, Nand gates,
+                flip-flops) of every part.
+        """
+        self.nands = nands
+        self.dffs = dffs
+        self.delays = delays
+        self.arrivals = arrivals or {}
+        self.parts = parts or []
+
+
+# The chips that every other chip is built of.
+BUILTINS = {
+    "Nand": Summary(1, 0, {(("a", 0), ("out", 0)): 1,
+                           (("b", 0), ("out", 0)): 1}),
+    "DFF": Summary(0, 1, {(("in", 0), STATE): 0, (STATE, ("out", 0)): 0}),
+}
+
+
+class Analyzer:
+    """Computes the Nand gates, the flip-flops and the longest paths of
+    chips. Every chip is summarized once, from the summaries of its parts,
+    so chips are never flattened and even RAM16K is analyzed instantly. The
+    longest path of a chip is the longest path of Nand gates from an input
+    or a flip-flop to an output or a flip-flop.
+    """
+
+    def __init__(self, library: typing.Optional[ChipLibrary] = None) -> None:
+        """
+        Args:
+            library (typing.Optional[ChipLibrary]): the library of the chips.
+        """
+        self.library = library or ChipLibrary()
+        self.summaries = dict(BUILTINS)
+
+    def summary(self, name: str) -> Summary:
+        """
+        Args:
+            name (str): the name of a chip.
+
+        Returns:
+            Summary: the summary of the chip.
+        """
+        chip = self.library.chip(name)
+        summary = self.summaries.get(chip.name)
+        if summary is not None:
+            return summary
+        edges = {}  # node -> [(node, delay, segment)]
+        nands = dffs = 0
+        parts = []
+        names = [part_name for part_name, _ in chip.parts]
+        for part_name, connections in chip.parts:
+            part = self.library.chip(part_name)
+            part_summary = self.summary(part_name)
+            nands += part_summary.nands
+            dffs += part_summary.dffs
+            label = part_name
+            if names.count(part_name) > 1:
+                label += "#" + str(1 + sum(
+                    1 for _, other, _, _ in parts if other == part_name))
+            parts.append((label, part_name, part_summary.nands,
+                          part_summary.dffs))
+            widths = dict(part.inputs + part.outputs)
+            nodes = {}  # (pin, index) of the part -> nodes of the chip
+            for pin, pin_bits, signal, signal_bits in connections:
+                if pin not in widths:
+                    raise ValueError("{}: {}.{}: no such pin".format(
+                        chip.name, part_name, pin))
+                first, last = pin_bits or (0, widths[pin] - 1)
+                if signal in ("true", "false"):
+                    continue
+                signal_first = signal_bits[0] if signal_bits else 0
+                for index in range(last - first + 1):
+                    nodes.setdefault((pin, first + index), []).append(
+                        (signal, signal_first + index))
+            for (source, sink), delay in part_summary.delays.items():
+                segment = (label, part_name, source, sink, delay)
+                for node in ([_STATE_SOURCE] if source == STATE
+                             else nodes.get(source, ())):
+                    for target in ([_STATE_SINK] if sink == STATE
+                                   else nodes.get(sink, ())):
+                        edges.setdefault(node, []).append(
+                            (target, delay, segment))
+        summary = self.summaries[chip.name] = Summary(
+            nands, dffs, {}, Analyzer.__longest(chip.name, edges, [
+                (pin, index) for pin, width in chip.inputs
+                for index in range(width)] + [_STATE_SOURCE]), parts)
+        sinks = [(pin, index) for pin, width in chip.outputs
+                 for index in range(width)] + [_STATE_SINK]
+        for sink in sinks:
+            for source, (delay, _, _) in summary.arrivals.get(
+                    sink, {}).items():
+                summary.delays[
+                    STATE if source == _STATE_SOURCE else source,
+                    STATE if sink == _STATE_SINK else sink] = delay
+        return summary
+
+    @staticmethod
+    def __longest(name: str, edges: dict,
+                  sources: typing.List[tuple]) -> dict:
+        """
+        Args:
+            name (str): the name of the chip, for error messages.
+            edges (dict): the paths through the parts of the chip, see
+                summary.
+            sources (typing.List[tuple]): the nodes that paths start at.
+
+        Returns:
+            dict: the arrivals of the longest paths, see Summary.
+        """
+        pending = {}
+        for node, targets in edges.items():
+            pending.setdefault(node, 0)
+            for target, _, _ in targets:
+                pending[target] = pending.get(target, 0) + 1
+        ready = [node for node, count in pending.items() if not count]
+        arrivals = {source: {source: (0, None, None)} for source in sources}
+        visited = 0
+        while ready:
+            node = ready.pop()
+            visited += 1
+            paths = arrivals.get(node)
+            for target, delay, segment in edges.get(node, ()):
+                pending[target] -= 1
+                if not pending[target]:
+                    ready.append(target)
+                if not paths:
+                    continue
+                target_paths = arrivals.setdefault(target, {})
+                for source, (length, _, _) in paths.items():
+                    known = target_paths.get(source)
+                    if known is None or known[0] < length + delay:
+                        target_paths[source] = (length + delay, node, segment)
+        if visited != len(pending):
+            raise ValueError(name + ": a combinational loop")
+        return arrivals
+
+    def trace(self, name: str, source, sink) -> typing.List[tuple]:
+        """
+        Args:
+            name (str): the name of a chip.
+            source: a source of the chip, see Summary.
+            sink: a sink of the chip.
+
+        Returns:
+            typing.List[tuple]: the parts along the longest path from the
+            source to the sink, in order, as (label, chip, source, sink,
+            length), where the source and sink are of the part.
+        """
+        arrivals = self.summary(name).arrivals
+        source = _STATE_SOURCE if source == STATE else source
+        node = _STATE_SINK if sink == STATE else sink
+        segments = []
+        while node != source:
+            _, node, segment = arrivals[node][source]
+            segments.append(segment)
+        segments.reverse()
+        return segments
+
+    def longest(self, name: str) -> typing.Tuple[int, typing.Any,
+                                                 typing.Any]:
+        """
+        Args:
+            name (str): the name of a chip.
+
+        Returns:
+            typing.Tuple[int, typing.Any, typing.Any]: the length of the
+            longest path of the chip, its source and its sink. The length is
+            0, and the source and sink are None, if the chip has no path.
+        """
+        delays = self.summary(name).delays
+        if not delays:
+            return 0, None, None
+        (source, sink), length = max(delays.items(), key=lambda item: item[1])
+        return length, source, sink
+
+
+def pin_name(chip, label) -> str:
+    """
+    Args:
+        chip (Chip): a chip.
+        label: a source or a sink of the chip, see Summary.
+
+    Returns:
+        str: the label as it is written in HDL, e.g. "out[3]" or "DFF".
+    """
+    if label == STATE:
+        return "DFF"
+    pin, index = label
+    return pin if dict(chip.inputs + chip.outputs)[pin] == 1 else \
+        "{}[{}]".format(pin, index)
+
+
+def report(analyzer: Analyzer, name: str, depth: int) -> str:
+    """
+    Args:
+        analyzer (Analyzer): the analyzer of the chip.
+        name (str): the name of a chip.
+        depth (int): the number of levels of parts to trace the longest path
+            through.
+
+    Returns:
+        str: the costs of the chip and of its parts, and its longest path.
+    """
+    library = analyzer.library
+    summary = analyzer.summary(name)
+    length, source, sink = analyzer.longest(name)
+    lines = ["{}: {} Nand gates, {} DFFs, longest path of {} Nand gates"
+             .format(name, summary.nands, summary.dffs, length)]
+    on_path = {}
+    if source is not None:
+        for label, _, _, _, delay in analyzer.trace(name, source, sink):
+            on_path[label] = on_path.get(label, 0) + delay
+    lines.append("  {:24} {:>10} {:>7} {:>6} {:>14}".format(
+        "part", "Nand gates", "share", "DFFs", "on the path"))
+    for label, _, nands, dffs in sorted(
+            summary.parts, key=lambda part: -part[2]):
+        lines.append("  {:24} {:>10} {:>6.1f}% {:>6} {:>14}".format(
+            label, nands, 100.0 * nands / max(summary.nands, 1), dffs,
+            on_path.get(label, "")))
+    if source is None:
+        return "\n".join(lines)
+    lines.append("  longest path, {} -> {}:".format(
+        pin_name(library.chip(name), source),
+        pin_name(library.chip(name), sink)))
+
+    def trace(chip_name: str, path_source, path_sink, level: int) -> None:
+        for label, part_name, part_source, part_sink, delay in \
+                analyzer.trace(chip_name, path_source, path_sink):
+            part = library.chip(part_name)
+            lines.append("  {}{} {} -> {}: {}".format(
+                "  " * level, label, pin_name(part, part_source),
+                pin_name(part, part_sink), delay))
+            if level < depth and part_name not in BUILTINS:
+                trace(part_name, part_source, part_sink, level + 1)
+
+    trace(name, source, sink, 1)
+    return "\n".join(lines)
+
+
+if "__main__" == __name__:
+    # Prints the costs and the longest paths of chips.
+    arg_parser = argparse.ArgumentParser(
+        description="Counts the Nand gates of chips, and finds their "
+                    "longest combinational paths.")
+    arg_parser.add_argument("chips", nargs="+", help="the names of chips")
+    arg_parser.add_argument(
+        "--path", action="append", default=[],
+        help="a directory that is searched for chips before the projects, "
+             "e.g. to compare an alternative implementation")
+    arg_parser.add_argument(
+        "--depth", type=int, default=1,
+        help="the number of levels of parts to trace the longest path "
+             "through")
+    args = arg_parser.parse_args()
+    analyzer = Analyzer(ChipLibrary(args.path))
+    print("\n\n".join(report(analyzer, chip, args.depth)
+                      for chip in args.chips))
@@ -0,0 +1,156 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from array import array
+
+# The number of words of a page of a SparseMemory, as a power of 2.
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+
+
+class SparseMemory:
+    """Words of memory that are allocated a page at a time, when a page is
+    first written a non-zero word. Pages that were never written read as
+    zeros, so a memory costs only the pages that a program touched.
+    """
+
+    def __init__(self, words: int) -> None:
+        """
+        Args:
+            words (int): the number of words of the memory.
+        """
+        self.words = words
+        self.pages = {}
+
+    def __len__(self) -> int:
+        return self.words
+
+    def __getitem__(self, address: int) -> int:
+        page = self.pages.get(address >> PAGE_BITS)
+        return 0 if page is None else page[address & (PAGE_SIZE - 1)]
+
+    def __setitem__(self, address: int, value: int) -> None:
+        if not 0 <= address < self.words:
+            raise IndexError("address out of range: " + str(address))
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None:
+            if not value:
+                return
+            page = self.pages[address >> PAGE_BITS] = array(
+                'H', bytes(2 * PAGE_SIZE))
+        page[address & (PAGE_SIZE - 1)] = value
+
+
+class Ram:
+    """A RAM chip (RAM8 to RAM16K, or Screen): out is the word at address,
+    and on the clock in is written to address if load is set.
+    """
+
+    def __init__(self, words: int) -> None:
+        """
+        Args:
+            words (int): the number of words of the RAM.
+        """
+        self.memory = SparseMemory(words)
+        self.pending = None     # (address, word) to write on the clock
+
+    def read(self, address: int) -> int:
+        """
+        Args:
+            address (int): an address.
+
+        Returns:
+            int: the word at the address.
+        """
+        return self.memory[address]
+
+    def latch(self, address: int, word: int, load: int) -> None:
+        """Sets the inputs that the next clock writes.
+
+        Args:
+            address (int): the address input.
+            word (int): the in input.
+            load (int): the load input.
+        """
+        self.pending = (address, word) if load else None
+
+    def tick(self) -> None:
+        """Writes the latched word, if load was set."""
+        if self.pending is not None:
+            self.memory[self.pending[0]] = self.pending[1]
+            self.pending = None
+
+
+class Keyboard:
+    """The keyboard: out is the code of the pressed key, or 0."""
+
+    def __init__(self) -> None:
+        self.key = 0
+
+    def read(self, address: int) -> int:
+        """
+        Args:
+            address (int): ignored.
+
+        Returns:
+            int: the code of the pressed key.
+        """
+        return self.key
+
+    def tick(self) -> None:
+        """The keyboard has no state to clock."""
+
+
+class Rom:
+    """The instruction memory (ROM32K): out is the word at address. The last
+    address that was read is kept, as it is the PC of the computer.
+    """
+
+    def __init__(self, words: typing.Sequence[int] = ()) -> None:
+        """
+        Args:
+            words (typing.Sequence[int]): the program.
+        """
+        self.words = array('H', words)
+        self.address = 0
+
+    def load(self, words: typing.Sequence[int]) -> None:
+        """
+        Args:
+            words (typing.Sequence[int]): the program to load.
+        """
+        self.words = array('H', words)
+
+    def read(self, address: int) -> int:
+        """
+        Args:
+            address (int): an address.
+
+        Returns:
+            int: the word at the address, or 0 beyond the program.
+        """
+        self.address = address
+        return self.words[address] if address < len(self.words) else 0
+
+    def tick(self) -> None:
+        """The ROM has no state to clock."""
+
+
+# The chips that may be simulated by behavioral blocks rather than by their
+# gates: the constructor of the block, and the input pins that its outputs
+# depend on. Blocks that have a load pin are written on the clock, see Ram.
+BLOCKS = {
+    "RAM8": (lambda: Ram(8), ("address",)),
+    "RAM64": (lambda: Ram(64), ("address",)),
+    "RAM512": (lambda: Ram(512), ("address",)),
+    "RAM4K": (lambda: Ram(4096), ("address",)),
+    "RAM16K": (lambda: Ram(16384), ("address",)),
+    "Screen": (lambda: Ram(8192), ("address",)),
+    "Keyboard": (Keyboard, ()),
+    "ROM32K": (Rom, ("address",)),
+}
@@ -0,0 +1,193 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import typing
+from Behavioral import PAGE_SIZE
+from ChipLibrary import ChipLibrary, ROOT
+from Simulator import Simulator
+
+# The programs of project 4.
+PROGRAMS = os.path.join(ROOT, "Project 4 - Machine Language")
+
+# Assembles a program with the assembler of Project 6, and prints its words.
+_ASSEMBLE = """
+import sys
+from Main import assemble_words
+with open(sys.argv[1], 'r') as input_file:
+    print(*assemble_words(input_file))
+"""
+
+
+def assemble(path: str) -> typing.List[int]:
+    """
+    Args:
+        path (str): the path of an .asm program.
+
+    Returns:
+        typing.List[int]: the machine words of the program.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", _ASSEMBLE, os.path.abspath(path)],
+        cwd=os.path.join(ROOT, "Project 6 - Assembler"), check=True,
+        stdout=subprocess.PIPE, universal_newlines=True)
+    return [int(word) for word in output.stdout.split()]
+
+
+def run_cpu(cpu: Simulator, rom: typing.Sequence[int],
+            ram: typing.List[int], cycles: int) -> int:
+    """Runs a program on a simulated CPU chip, with a ROM and a RAM around
+    it, as in Computer.hdl.
+
+    Args:
+        cpu (Simulator): a simulated CPU.
+        rom (typing.Sequence[int]): the program.
+        ram (typing.List[int]): the data memory, which is updated.
+        cycles (int): the maximal number of clock cycles.
+
+    Returns:
+        int: the number of executed cycles, which is less than cycles if the
+        program halted, by jumping out of the ROM or by the "(X) @X 0;JMP"
+        idiom.
+    """
+    for cycle in range(cycles):
+        pc = cpu["pc"]
+        if pc >= len(rom):
+            return cycle
+        cpu["instruction"] = rom[pc]
+        cpu["inM"] = ram[cpu["addressM"]]
+        cpu.eval()
+        if cpu["writeM"]:
+            ram[cpu["addressM"]] = cpu["outM"]
+        cpu.tick()
+        if cpu["pc"] == pc - 1 and rom[pc - 1] == pc - 1:
+            return cycle + 1
+    return cycles
+
+
+def bench_cpu(args: argparse.Namespace) -> None:
+    """Runs Mult.asm on CPU.hdl, by the compiled evaluator and by
+    interpreting its netlist gate by gate."""
+    rom = assemble(os.path.join(PROGRAMS, "Mult.asm"))
+    library = ChipLibrary()
+    start = time.perf_counter()
+    library.evaluator("CPU")
+    print("CPU: {} Nand gates, {} DFFs, flattened and compiled in {:.3f}s"
+          .format(len(library.netlist("CPU").nands),
+                  len(library.netlist("CPU").dffs),
+                  time.perf_counter() - start))
+    times = {}
+    for mode in ("compiled", "interpreted"):
+        cpu = Simulator("CPU", library)
+        if mode == "interpreted":
+            cpu.evaluate = cpu.netlist.evaluate
+            cpu.eval()
+        ram = [0] * 32768
+        ram[0], ram[1] = 3, args.multiplier
+        start = time.perf_counter()
+        cycles = run_cpu(cpu, rom, ram, args.cycles)
+        times[mode] = time.perf_counter() - start
+        assert cycles < args.cycles and ram[2] == 3 * args.multiplier, \
+            "Mult computed a wrong product"
+        print("{:11}: {} cycles in {:.3f}s, {:.0f} cycles/sec".format(
+            mode, cycles, times[mode], cycles / times[mode]))
+    print("compiled is x{:.1f} faster".format(
+        times["interpreted"] / times["compiled"]))
+
+
+def run_computer(computer: Simulator, cycles: int) -> int:
+    """Runs the program in the ROM of a simulated Computer.hdl.
+
+    Args:
+        computer (Simulator): a simulated computer.
+        cycles (int): the maximal number of clock cycles.
+
+    Returns:
+        int: the number of executed cycles, which is less than cycles if the
+        program halted by the "(X) @X 0;JMP" idiom.
+    """
+    rom = computer.block("ROM32K")
+    for cycle in range(cycles):
+        pc = rom.address
+        computer.tick()
+        if rom.address == pc - 1 and rom.read(pc - 1) == pc - 1:
+            return cycle + 1
+    return cycles
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Checks that the behavioral RAM chips are equivalent to their gates on
+    random inputs, and compares their speeds."""
+    import random
+    rng = random.Random(0)
+    for name, width in (("RAM8", 3), ("RAM64", 6), ("RAM512", 9)):
+        start = time.perf_counter()
+        gates = Simulator(name, ChipLibrary(behavioral=False))
+        compile_time = time.perf_counter() - start
+        block = Simulator(name)
+        times = {gates: 0.0, block: 0.0}
+        for _ in range(args.cycles // 100):
+            values = (rng.getrandbits(16), int(rng.random() < 0.3),
+                      rng.getrandbits(width))
+            for ram in (gates, block):
+                start = time.perf_counter()
+                ram["in"], ram["load"], ram["address"] = values
+                ram.eval()
+                ram.tick()
+                times[ram] += time.perf_counter() - start
+            assert gates["out"] == block["out"], \
+                name + " differs from its gates"
+        print("{}: equivalent on {} cycles, {} Nand gates compiled in "
+              "{:.2f}s, the block is x{:.0f} faster".format(
+                  name, args.cycles // 100, len(gates.netlist.nands),
+                  compile_time, times[gates] / times[block]))
+
+
+def bench_computer(args: argparse.Namespace) -> None:
+    """Runs Mult.asm on Computer.hdl, whose memories are behavioral
+    blocks."""
+    words = assemble(os.path.join(PROGRAMS, "Mult.asm"))
+    library = ChipLibrary()
+    start = time.perf_counter()
+    computer = Simulator("Computer", library)
+    print("Computer: {} Nand gates, {} DFFs, {} blocks, flattened and "
+          "compiled in {:.3f}s".format(
+              len(computer.netlist.nands), len(computer.netlist.dffs),
+              len(computer.netlist.blocks), time.perf_counter() - start))
+    computer.block("ROM32K").load(words)
+    ram = computer.block("RAM16K").memory
+    ram[0], ram[1] = 3, args.multiplier
+    computer.eval()
+    start = time.perf_counter()
+    cycles = run_computer(computer, args.cycles)
+    wall = time.perf_counter() - start
+    assert cycles < args.cycles and ram[2] == 3 * args.multiplier, \
+        "Mult computed a wrong product"
+    print("{} cycles in {:.3f}s, {:.0f} cycles/sec, {} of {} RAM pages "
+          "allocated".format(cycles, wall, cycles / wall, len(ram.pages),
+                             len(ram) // PAGE_SIZE))
+
+
+BENCHMARKS = {
+    "cpu": bench_cpu,
+    "memory": bench_memory,
+    "computer": bench_computer,
+}
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmarks for the HDL simulator.")
+    arg_parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    arg_parser.add_argument("--cycles", type=int, default=100000)
+    arg_parser.add_argument("--multiplier", type=int, default=200)
+    args = arg_parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
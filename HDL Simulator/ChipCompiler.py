@@ -0,0 +1,135 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from Netlist import Netlist, FALSE, TRUE
+
+
+class ChipCompiler:
+    """Compiles a netlist into straight-line Python code: one assignment
+    "n = M ^ (a & b)" per Nand gate, in the topological order of the
+    netlist, where M is the value of true. The code is simplified while it
+    is generated:
+
+    - gates with a constant input are folded,
+    - a negated net that is negated again is replaced by the net itself,
+    - gates with the same inputs are computed once,
+    - gates that drive neither an output, a DFF nor a block are removed.
+
+    Behavioral blocks are read by calls at their positions in the netlist,
+    and are given their inputs for the next clock after all the gates. The
+    compiled evaluator has the signature of Netlist.evaluate.
+    """
+
+    @staticmethod
+    def source(netlist: Netlist) -> str:
+        """
+        Args:
+            netlist (Netlist): a netlist.
+
+        Returns:
+            str: the source of the evaluator "evaluate(i, s, M, B=())".
+        """
+        names = {FALSE: "0", TRUE: "M"}
+        negations = {}  # name -> the name of its negation
+        gates = {}      # (name, name) -> the name of their Nand
+        assignments = []    # (names assigned, code, names read)
+
+        def assign(net: int, expression: str, reads: tuple) -> str:
+            names[net] = "n" + str(net)
+            assignments.append(((names[net],), "    {} = {}\n".format(
+                names[net], expression), reads))
+            return names[net]
+
+        def word(nets: typing.List[int]) -> typing.Tuple[str, list]:
+            reads = [names[net] for net in nets]
+            terms = [name if bit == 0 else "{} << {}".format(name, bit)
+                     for bit, name in enumerate(reads) if name != "0"]
+            return " | ".join(terms) or "0", reads
+
+        def read(index: int, pins: dict, outputs: dict) -> None:
+            address, reads = word(pins.get("address", ()))
+            targets = []
+            code = ["    v{} = B[{}].read({})\n".format(index, index, address)]
+            for bit, net in enumerate(outputs["out"]):
+                names[net] = "n" + str(net)
+                targets.append(names[net])
+                code.append("    {} = v{} >> {} & 1\n".format(
+                    names[net], index, bit))
+            assignments.append((tuple(targets), "".join(code), reads))
+
+        for _, nets in netlist.inputs:
+            for net in nets:
+                names[net] = "n" + str(net)
+        for _, out in netlist.dffs:
+            names[out] = "n" + str(out)
+        blocks = list(enumerate(netlist.blocks))
+        for gate in range(len(netlist.nands) + 1):
+            while blocks and blocks[0][1][3] == gate:
+                index, (_, pins, outputs, _) = blocks.pop(0)
+                read(index, pins, outputs)
+            if gate == len(netlist.nands):
+                break
+            a, b, out = netlist.nands[gate]
+            x, y = sorted((names[a], names[b]))
+            if x == "0" or negations.get(x) == y:
+                names[out] = "M"
+            elif x == "M" and y == "M":
+                names[out] = "0"
+            elif x == "M" or x == y:
+                operand = y if x == "M" else x
+                if operand in negations:
+                    names[out] = negations[operand]
+                else:
+                    name = assign(out, "M ^ " + operand, (operand,))
+                    negations[operand], negations[name] = name, operand
+            elif (x, y) in gates:
+                names[out] = gates[x, y]
+            else:
+                gates[x, y] = assign(
+                    out, "M ^ ({} & {})".format(x, y), (x, y))
+        results = [names[net] for _, nets in netlist.outputs for net in nets]
+        states = [names[net] for net, _ in netlist.dffs]
+        latches = []
+        live = set(results + states)
+        for index, (_, pins, _, _) in enumerate(netlist.blocks):
+            if "load" in pins:
+                (address, reads), (word_in, reads_in) = \
+                    word(pins["address"]), word(pins["in"])
+                latches.append("    B[{}].latch({}, {}, {})\n".format(
+                    index, address, word_in, names[pins["load"][0]]))
+                live.update(reads + reads_in + [names[pins["load"][0]]])
+        code = []
+        for targets, lines, reads in reversed(assignments):
+            if live.intersection(targets):
+                live.update(reads)
+                code.append(lines)
+        code.reverse()
+        inputs = [names[net] for _, nets in netlist.inputs for net in nets]
+        outputs = ["    return [{}], [{}]\n".format(
+            ", ".join(results), ", ".join(states))]
+        return "".join(
+            ["def evaluate(i, s, M, B=()):\n"] +
+            (["    {}, = i\n".format(", ".join(inputs))] if inputs else []) +
+            (["    {}, = s\n".format(", ".join(
+                names[out] for _, out in netlist.dffs))]
+             if netlist.dffs else []) +
+            code + latches + outputs)
+
+    @staticmethod
+    def compile(netlist: Netlist) -> typing.Callable:
+        """
+        Args:
+            netlist (Netlist): a netlist.
+
+        Returns:
+            typing.Callable: the evaluator of the netlist.
+        """
+        namespace = {}
+        exec(compile(ChipCompiler.source(netlist),
+                     "<chip " + netlist.name + ">", "exec"), namespace)
+        return namespace["evaluate"]
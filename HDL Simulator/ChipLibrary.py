@@ -0,0 +1,141 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import typing
+from HdlParser import Chip, HdlParser
+from Netlist import Netlist
+from ChipCompiler import ChipCompiler
+from Behavioral import BLOCKS
+
+# The root of the repository, whose project directories hold the chips.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The chips that are simulated directly, rather than by their parts. The
+# memory maps and the ROM of the computer have no gate-level implementation,
+# and are always simulated by behavioral blocks.
+BUILTINS = {
+    "Nand": Chip("Nand", [("a", 1), ("b", 1)], [("out", 1)], []),
+    "DFF": Chip("DFF", [("in", 1)], [("out", 1)], []),
+    "Screen": Chip("Screen", [("in", 16), ("load", 1), ("address", 13)],
+                   [("out", 16)], []),
+    "Keyboard": Chip("Keyboard", [], [("out", 16)], []),
+    "ROM32K": Chip("ROM32K", [("address", 15)], [("out", 16)], []),
+}
+
+# Chips that behave exactly like another chip. The A and D registers of the
+# CPU are registers that the course's simulator displays.
+ALIASES = {
+    "ARegister": "Register",
+    "DRegister": "Register",
+}
+
+
+def chip_directories(root: str = ROOT) -> typing.List[str]:
+    """
+    Args:
+        root (str): the root of the repository.
+
+    Returns:
+        typing.List[str]: the project directories, and their "a" and "b"
+        subdirectories, in order.
+    """
+    directories = []
+    for project in sorted(os.listdir(root)):
+        path = os.path.join(root, project)
+        if project.startswith("Project") and os.path.isdir(path):
+            directories.append(path)
+            for part in ("a", "b"):
+                if os.path.isdir(os.path.join(path, part)):
+                    directories.append(os.path.join(path, part))
+    return directories
+
+
+class ChipLibrary:
+    """Finds chips by their names, and memoizes their definitions, netlists
+    and compiled evaluators, so every chip is parsed, flattened and compiled
+    at most once.
+
+    The RAM chips are simulated by behavioral blocks by default (see
+    Behavioral), which hold their words in sparse memories instead of
+    flattening hundreds of thousands of flip-flops.
+    """
+
+    def __init__(self, directories: typing.Sequence[str] = (),
+                 behavioral: bool = True) -> None:
+        """
+        Args:
+            directories (typing.Sequence[str]): directories that are searched
+                for .hdl files before the project directories.
+            behavioral (bool): whether to simulate the RAM chips by
+                behavioral blocks rather than by their gates.
+        """
+        self.directories = list(directories) + chip_directories()
+        self.chips = dict(BUILTINS)
+        self.blocks = {name for name in BLOCKS
+                       if behavioral or name in BUILTINS}
+        self.netlists = {}
+        self.evaluators = {}
+
+    def path(self, name: str) -> str:
+        """
+        Args:
+            name (str): the name of a chip.
+
+        Returns:
+            str: the path of the first .hdl file of the chip.
+        """
+        for directory in self.directories:
+            path = os.path.join(directory, name + ".hdl")
+            if os.path.isfile(path):
+                return path
+        raise ValueError("chip not found: " + name)
+
+    def chip(self, name: str) -> Chip:
+        """
+        Args:
+            name (str): the name of a chip.
+
+        Returns:
+            Chip: the definition of the chip.
+        """
+        name = ALIASES.get(name, name)
+        chip = self.chips.get(name)
+        if chip is None:
+            chip = self.chips[name] = HdlParser.parse_file(self.path(name))
+            if chip.name != name:
+                raise ValueError("{} defines chip {}, not {}".format(
+                    self.path(name), chip.name, name))
+        return chip
+
+    def netlist(self, name: str) -> Netlist:
+        """
+        Args:
+            name (str): the name of a chip.
+
+        Returns:
+            Netlist: the chip, flattened to Nand gates and flip-flops.
+        """
+        netlist = self.netlists.get(name)
+        if netlist is None:
+            netlist = self.netlists[name] = Netlist.flatten(name, self)
+        return netlist
+
+    def evaluator(self, name: str) -> typing.Callable:
+        """
+        Args:
+            name (str): the name of a chip.
+
+        Returns:
+            typing.Callable: the compiled evaluator of the chip, see
+            ChipCompiler.compile.
+        """
+        evaluator = self.evaluators.get(name)
+        if evaluator is None:
+            evaluator = self.evaluators[name] = ChipCompiler.compile(
+                self.netlist(name))
+        return evaluator
@@ -0,0 +1,236 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+
+# Comments, which are replaced by their newlines so line numbers are kept.
+COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+# The tokens of the HDL: names, numbers, ranges and punctuation.
+TOKEN = re.compile(r"\s*(?:([A-Za-z_][\w]*|\d+|\.\.|[{}()\[\];,=:])|(\S))")
+
+
+class Chip:
+    """The definition of a chip, as written in its .hdl file.
+
+    A pin is (name, width). A part is (chip name, connections), and a
+    connection is (pin, pin bits, signal, signal bits), where the bits are
+    an inclusive (first, last) range, or None for the whole pin or signal.
+    """
+    __slots__ = ("name", "inputs", "outputs", "parts")
+
+    def __init__(self, name: str, inputs: typing.List[tuple],
+                 outputs: typing.List[tuple],
+                 parts: typing.List[tuple]) -> None:
+        """
+        Args:
+            name (str): the name of the chip.
+            inputs (typing.List[tuple]): the input pins.
+            outputs (typing.List[tuple]): the output pins.
+            parts (typing.List[tuple]): the parts of the chip, in order.
+        """
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.parts = parts
+
+
+class HdlParser:
+    """Parses the HDL of the course:
+
+        CHIP <name> {
+            IN <pin>[<width>], ...;
+            OUT <pin>[<width>], ...;
+            PARTS:
+            <chip>(<pin>[<first>..<last>]=<signal>[<first>..<last>], ...);
+            ...
+        }
+
+    Widths default to 1, bits are optional and may be a single index, and a
+    signal is a pin of the chip, an internal wire, true or false.
+    """
+
+    def __init__(self, text: str, name: str = "<input>") -> None:
+        """Splits the text of an .hdl file into tokens.
+
+        Args:
+            text (str): the text of the file.
+            name (str): the name of the file, for error messages.
+        """
+        self.name = name
+        self.text = COMMENT.sub(lambda match: "\n" * match.group().count(
+            "\n"), text)
+        self.tokens = []  # (token, offset)
+        for match in TOKEN.finditer(self.text):
+            if match.group(2):
+                self.error("unexpected character " + repr(match.group(2)),
+                           match.start(2))
+            if match.group(1):
+                self.tokens.append((match.group(1), match.start(1)))
+        self.index = 0
+
+    def error(self, message: str, offset: typing.Optional[int] = None) -> None:
+        """
+        Args:
+            message (str): what went wrong.
+            offset (typing.Optional[int]): the offset of the error in the
+                text, by default that of the current token.
+
+        Raises:
+            ValueError: always, with the file name and line of the error.
+        """
+        if offset is None:
+            offset = self.tokens[self.index][1] \
+                if self.index < len(self.tokens) else len(self.text)
+        raise ValueError("{}:{}: {}".format(
+            self.name, self.text.count("\n", 0, offset) + 1, message))
+
+    def peek(self) -> str:
+        """
+        Returns:
+            str: the current token, or "" at the end of the text.
+        """
+        return self.tokens[self.index][0] \
+            if self.index < len(self.tokens) else ""
+
+    def next(self, expected: typing.Optional[str] = None) -> str:
+        """Consumes the current token.
+
+        Args:
+            expected (typing.Optional[str]): the token that must be current.
+
+        Returns:
+            str: the consumed token.
+        """
+        token = self.peek()
+        if token == "" or (expected is not None and token != expected):
+            self.error("expected {}, found {}".format(
+                repr(expected) if expected else "a token",
+                repr(token) if token else "the end of the file"))
+        self.index += 1
+        return token
+
+    def name_token(self) -> str:
+        """
+        Returns:
+            str: the consumed current token, which must be a name.
+        """
+        token = self.next()
+        if not (token[0].isalpha() or token[0] == "_"):
+            self.index -= 1
+            self.error("expected a name, found " + repr(token))
+        return token
+
+    def number(self) -> int:
+        """
+        Returns:
+            int: the consumed current token, which must be a number.
+        """
+        token = self.next()
+        if not token.isdigit():
+            self.index -= 1
+            self.error("expected a number, found " + repr(token))
+        return int(token)
+
+    def pins(self) -> typing.List[tuple]:
+        """
+        Returns:
+            typing.List[tuple]: the consumed declarations of pins, up to and
+            including their semicolon.
+        """
+        pins = []
+        while True:
+            name = self.name_token()
+            width = 1
+            if self.peek() == "[":
+                self.next()
+                width = self.number()
+                self.next("]")
+            pins.append((name, width))
+            if self.next() == ";":
+                return pins
+            self.index -= 1
+            self.next(",")
+
+    def bits(self) -> typing.Optional[tuple]:
+        """
+        Returns:
+            typing.Optional[tuple]: the consumed (first, last) bits of a pin
+            or a signal, or None if no bits are given.
+        """
+        if self.peek() != "[":
+            return None
+        self.next()
+        first = last = self.number()
+        if self.peek() == "..":
+            self.next()
+            last = self.number()
+        self.next("]")
+        if last < first:
+            self.error("empty range of bits")
+        return first, last
+
+    def part(self) -> tuple:
+        """
+        Returns:
+            tuple: the consumed part, up to and including its semicolon.
+        """
+        name = self.name_token()
+        self.next("(")
+        connections = []
+        while True:
+            pin = self.name_token()
+            pin_bits = self.bits()
+            self.next("=")
+            signal = self.name_token()
+            connections.append((pin, pin_bits, signal, self.bits()))
+            if self.next() == ")":
+                break
+            self.index -= 1
+            self.next(",")
+        self.next(";")
+        return name, connections
+
+    def parse(self) -> Chip:
+        """
+        Returns:
+            Chip: the chip defined by the text.
+        """
+        self.next("CHIP")
+        name = self.name_token()
+        self.next("{")
+        inputs = outputs = []
+        if self.peek() == "IN":
+            self.next()
+            inputs = self.pins()
+        if self.peek() == "OUT":
+            self.next()
+            outputs = self.pins()
+        if self.peek() == "BUILTIN":
+            self.error("builtin chip " + name + " has no simulation")
+        self.next("PARTS")
+        self.next(":")
+        parts = []
+        while self.peek() != "}":
+            parts.append(self.part())
+        self.next("}")
+        if self.peek():
+            self.error("unexpected text after the chip")
+        return Chip(name, inputs, outputs, parts)
+
+    @staticmethod
+    def parse_file(path: str) -> Chip:
+        """
+        Args:
+            path (str): the path of an .hdl file.
+
+        Returns:
+            Chip: the chip defined by the file.
+        """
+        with open(path, 'r') as input_file:
+            return HdlParser(input_file.read(), path).parse()
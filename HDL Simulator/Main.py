@@ -0,0 +1,52 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import sys
+from ChipLibrary import ChipLibrary
+from ChipCompiler import ChipCompiler
+from Simulator import Simulator
+
+
+if "__main__" == __name__:
+    # Simulates a chip on the given inputs, and prints its outputs.
+    arg_parser = argparse.ArgumentParser(
+        description="Simulates a chip of the projects, flattened to Nand "
+                    "gates and compiled into Python.")
+    arg_parser.add_argument("chip", help="the name of the chip, e.g. ALU")
+    arg_parser.add_argument(
+        "inputs", nargs="*", metavar="PIN=VALUE",
+        help="the values of input pins, which are false by default")
+    arg_parser.add_argument(
+        "--ticks", type=int, default=0,
+        help="the number of clock cycles to run before printing the outputs")
+    arg_parser.add_argument(
+        "--path", action="append", default=[],
+        help="a directory that is searched for chips before the projects")
+    arg_parser.add_argument(
+        "--gates", action="store_true",
+        help="simulate the RAM chips by their gates rather than by "
+             "behavioral blocks")
+    arg_parser.add_argument(
+        "--source", action="store_true",
+        help="print the compiled evaluator of the chip instead")
+    args = arg_parser.parse_args()
+    library = ChipLibrary(args.path, behavioral=not args.gates)
+    if args.source:
+        sys.stdout.write(ChipCompiler.source(library.netlist(args.chip)))
+        sys.exit(0)
+    simulator = Simulator(args.chip, library)
+    widths = dict(simulator.netlist.inputs)
+    for assignment in args.inputs:
+        pin, _, value = assignment.partition("=")
+        simulator[pin] = int(value, 0) & ((1 << len(widths.get(pin, ()))) - 1)
+    simulator.eval()
+    for _ in range(args.ticks):
+        simulator.tick()
+    for pin, nets in simulator.netlist.outputs:
+        value = simulator[pin]
+        print("{} = {} ({:0{}b})".format(pin, value, value, len(nets)))
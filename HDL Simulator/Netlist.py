@@ -0,0 +1,288 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from Behavioral import BLOCKS
+
+# The nets of the constants.
+FALSE = 0
+TRUE = 1
+
+
+class Netlist:
+    """A chip flattened to Nand gates and D flip-flops (DFFs). Every bit of
+    every wire is a net, and the nets are numbered in order of evaluation:
+
+    - net 0 is false and net 1 is true,
+    - then the bits of the inputs, least significant bit first,
+    - then the outputs of the DFFs, which hold the state of the chip,
+    - then the outputs of the Nand gates and of the behavioral blocks of
+      the library (see Behavioral), which are sorted topologically, so
+      every gate follows the gates that drive its inputs. A block is read
+      before the gate at its position, and its inputs for the next clock
+      are taken after all the gates.
+
+    Unconnected inputs of parts are false, as in the course's simulator.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Creates an empty netlist.
+
+        Args:
+            name (str): the name of the chip.
+        """
+        self.name = name
+        self.inputs = []    # (pin, nets)
+        self.outputs = []   # (pin, nets)
+        self.nands = []     # (a, b, out)
+        self.dffs = []      # (in, out)
+        self.blocks = []    # (chip, input pins, output pins, position)
+        self.size = 2
+        self.parent = [FALSE, TRUE]     # union-find of nets, while flattening
+
+    @staticmethod
+    def flatten(name: str, library: "ChipLibrary") -> "Netlist":
+        """
+        Args:
+            name (str): the name of a chip.
+            library (ChipLibrary): the library of the chip and its parts.
+
+        Returns:
+            Netlist: the chip, flattened.
+        """
+        chip = library.chip(name)
+        netlist = Netlist(name)
+        netlist.inputs = [(pin, netlist.__nets(width))
+                          for pin, width in chip.inputs]
+        netlist.outputs = [(pin, netlist.__nets(width))
+                           for pin, width in chip.outputs]
+        netlist.__instantiate(name, dict(netlist.inputs + netlist.outputs),
+                              library)
+        netlist.__resolve()
+        return netlist
+
+    def __nets(self, width: int) -> typing.List[int]:
+        """
+        Args:
+            width (int): the number of nets.
+
+        Returns:
+            typing.List[int]: new nets.
+        """
+        start = len(self.parent)
+        self.parent.extend(range(start, start + width))
+        return list(range(start, start + width))
+
+    def __find(self, net: int) -> int:
+        """
+        Args:
+            net (int): a net.
+
+        Returns:
+            int: the representative of all the nets connected to it.
+        """
+        parent = self.parent
+        while parent[net] != net:
+            parent[net] = parent[parent[net]]
+            net = parent[net]
+        return net
+
+    def __instantiate(self, name: str, pins: typing.Dict[str, list],
+                      library: "ChipLibrary") -> None:
+        """Adds a chip to the netlist.
+
+        Args:
+            name (str): the name of the chip.
+            pins (typing.Dict[str, list]): the nets of the pins of the chip.
+            library (ChipLibrary): the library of the chip and its parts.
+        """
+        chip = library.chip(name)
+        if chip.name == "Nand":
+            self.nands.append((pins["a"][0], pins["b"][0], pins["out"][0]))
+            return
+        if chip.name == "DFF":
+            self.dffs.append((pins["in"][0], pins["out"][0]))
+            return
+        if chip.name in library.blocks:
+            self.blocks.append((
+                chip.name, {pin: pins[pin] for pin, _ in chip.inputs},
+                {pin: pins[pin] for pin, _ in chip.outputs}, 0))
+            return
+        wires = dict(pins)
+        for part_name, connections in chip.parts:
+            part = library.chip(part_name)
+            widths = dict(part.inputs + part.outputs)
+            part_pins = {pin: self.__nets(width)
+                         for pin, width in widths.items()}
+            for pin, pin_bits, signal, signal_bits in connections:
+                where = "{}: {}.{}".format(chip.name, part_name, pin)
+                if pin not in widths:
+                    raise ValueError(where + ": no such pin")
+                nets = Netlist.__select(part_pins[pin], pin_bits, where)
+                if signal in ("true", "false"):
+                    if signal_bits is not None:
+                        raise ValueError(where + ": bits of a constant")
+                    signal_nets = [TRUE if signal == "true" else FALSE] * \
+                        len(nets)
+                elif signal in pins:
+                    signal_nets = Netlist.__select(
+                        pins[signal], signal_bits, where)
+                else:
+                    if signal_bits is not None:
+                        raise ValueError(
+                            where + ": bits of internal pin " + signal)
+                    if signal not in wires:
+                        wires[signal] = self.__nets(len(nets))
+                    signal_nets = wires[signal]
+                if len(signal_nets) != len(nets):
+                    raise ValueError("{}: {} bits connected to {} bits".format(
+                        where, len(signal_nets), len(nets)))
+                for net, signal_net in zip(nets, signal_nets):
+                    self.parent[self.__find(net)] = self.__find(signal_net)
+            self.__instantiate(part_name, part_pins, library)
+
+    @staticmethod
+    def __select(nets: typing.List[int], bits: typing.Optional[tuple],
+                 where: str) -> typing.List[int]:
+        """
+        Args:
+            nets (typing.List[int]): the nets of a pin.
+            bits (typing.Optional[tuple]): the (first, last) bits, or None.
+            where (str): the connection, for error messages.
+
+        Returns:
+            typing.List[int]: the nets of the bits.
+        """
+        if bits is None:
+            return nets
+        if bits[1] >= len(nets):
+            raise ValueError("{}: bit {} of a {}-bit pin".format(
+                where, bits[1], len(nets)))
+        return nets[bits[0]:bits[1] + 1]
+
+    def __resolve(self) -> None:
+        """Replaces every net by the representative of its connected nets,
+        checks that each is driven at most once, and renumbers the nets in
+        order of evaluation.
+        """
+        find = self.__find
+        # the operations are the gates and then the reads of the blocks,
+        # as (the nets they read, the nets they drive)
+        operations = [((a, b), (out,)) for a, b, out in self.nands] + [
+            ([net for pin in BLOCKS[name][1] for net in inputs[pin]],
+             [net for nets in outputs.values() for net in nets])
+            for name, inputs, outputs, _ in self.blocks]
+        drivers = {}
+        for source in [FALSE, TRUE] + [net for _, nets in self.inputs
+                                       for net in nets] + \
+                [out for _, out in self.dffs] + \
+                [out for _, outs in operations for out in outs]:
+            root = find(source)
+            if root in drivers:
+                raise ValueError(self.name + ": a wire has more than one "
+                                 "driver")
+            drivers[root] = len(drivers)
+        # the operations that drive the nets of every operation, for
+        # sorting them
+        driver_of = {find(out): operation
+                     for operation, (_, outs) in enumerate(operations)
+                     for out in outs}
+        pending = [0] * len(operations)
+        users = [[] for _ in operations]
+        for operation, (reads, _) in enumerate(operations):
+            for net in reads:
+                driver = driver_of.get(find(net))
+                if driver is not None:
+                    pending[operation] += 1
+                    users[driver].append(operation)
+        ready = [operation for operation in range(len(operations))
+                 if not pending[operation]]
+        order = []
+        while ready:
+            operation = ready.pop()
+            order.append(operation)
+            for user in users[operation]:
+                pending[user] -= 1
+                if not pending[user]:
+                    ready.append(user)
+        if len(order) != len(operations):
+            raise ValueError(self.name + ": a combinational loop through " +
+                             str(len(operations) - len(order)) + " gates")
+        # number the nets in order of evaluation, undriven nets are false
+        numbers = {}
+        for source in [FALSE, TRUE] + [net for _, nets in self.inputs
+                                       for net in nets] + \
+                [out for _, out in self.dffs] + \
+                [out for operation in order
+                 for out in operations[operation][1]]:
+            numbers[find(source)] = len(numbers)
+        number = lambda net: numbers.get(find(net), FALSE)
+        renumber = lambda pins: {pin: [number(net) for net in nets]
+                                 for pin, nets in pins.items()}
+        self.inputs = [(pin, [number(net) for net in nets])
+                       for pin, nets in self.inputs]
+        self.outputs = [(pin, [number(net) for net in nets])
+                        for pin, nets in self.outputs]
+        self.dffs = [(number(net), number(out)) for net, out in self.dffs]
+        nands, blocks = [], []
+        for operation in order:
+            if operation < len(self.nands):
+                nands.append(tuple(number(net)
+                                   for net in self.nands[operation]))
+            else:
+                name, inputs, outputs, _ = \
+                    self.blocks[operation - len(self.nands)]
+                blocks.append((name, renumber(inputs), renumber(outputs),
+                               len(nands)))
+        self.nands, self.blocks = nands, blocks
+        self.size = len(numbers)
+        del self.parent
+
+    def evaluate(self, inputs: typing.Sequence, state: typing.Sequence,
+                 mask=1, blocks: typing.Sequence = ()) -> \
+            typing.Tuple[list, list]:
+        """Evaluates the netlist gate by gate. This is the reference for the
+        compiled evaluators of ChipCompiler, and has the same signature.
+
+        Args:
+            inputs (typing.Sequence): the values of the bits of the inputs.
+            state (typing.Sequence): the values of the outputs of the DFFs.
+            mask: the value of true. Every bit of a value is evaluated
+                independently, so a value of 2**n - 1 evaluates n vectors.
+                Netlists with blocks are evaluated on a single vector.
+            blocks (typing.Sequence): the behavioral blocks of the netlist,
+                see Behavioral, which are read and given their inputs for
+                the next clock.
+
+        Returns:
+            typing.Tuple[list, list]: the values of the bits of the outputs,
+            and the values of the inputs of the DFFs, which are their state
+            after the next clock.
+        """
+        values = [0] * self.size
+        values[TRUE] = mask
+        values[2:2 + len(inputs)] = inputs
+        for (_, out), value in zip(self.dffs, state):
+            values[out] = value
+        word = lambda nets: sum(values[net] << bit
+                                for bit, net in enumerate(nets))
+        start = 0
+        for (_, pins, outputs, position), block in zip(self.blocks, blocks):
+            for a, b, out in self.nands[start:position]:
+                values[out] = mask ^ (values[a] & values[b])
+            start = position
+            value = block.read(word(pins.get("address", ())))
+            for bit, net in enumerate(outputs["out"]):
+                values[net] = (value >> bit) & 1
+        for a, b, out in self.nands[start:]:
+            values[out] = mask ^ (values[a] & values[b])
+        for (_, pins, _, _), block in zip(self.blocks, blocks):
+            if "load" in pins:
+                block.latch(word(pins["address"]), word(pins["in"]),
+                            values[pins["load"][0]])
+        return [values[net] for _, nets in self.outputs for net in nets], \
+            [values[net] for net, _ in self.dffs]
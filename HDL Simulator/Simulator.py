@@ -0,0 +1,95 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from ChipLibrary import ChipLibrary
+from Behavioral import BLOCKS
+
+
+class Simulator:
+    """Simulates a chip by its compiled evaluator. The values of pins are
+    unsigned integers, and the outputs always reflect the current inputs and
+    state:
+
+        simulator = Simulator("ALU")
+        simulator["x"], simulator["y"], simulator["f"] = 3, 4, 1
+        simulator.eval()
+        simulator["out"]    # 7
+
+    A clocked chip changes its state on tick(), to the state that its DFFs
+    and blocks were given by the last evaluation. The blocks (see
+    Behavioral) are in the order of the netlist's blocks, and are found by
+    the names of their chips with block().
+    """
+
+    def __init__(self, name: str,
+                 library: typing.Optional[ChipLibrary] = None) -> None:
+        """Creates a chip with false inputs and a false state.
+
+        Args:
+            name (str): the name of the chip.
+            library (typing.Optional[ChipLibrary]): the library of the chip,
+                by default the chips of the projects.
+        """
+        self.library = library or ChipLibrary()
+        self.netlist = self.library.netlist(name)
+        self.evaluate = self.library.evaluator(name)
+        self.inputs = {pin: 0 for pin, _ in self.netlist.inputs}
+        self.outputs = {}
+        self.state = [0] * len(self.netlist.dffs)
+        self.next_state = self.state
+        self.blocks = [BLOCKS[block[0]][0]() for block in self.netlist.blocks]
+        self.eval()
+
+    def __setitem__(self, pin: str, value: int) -> None:
+        if pin not in self.inputs:
+            raise KeyError(self.netlist.name + " has no input " + pin)
+        self.inputs[pin] = value
+
+    def __getitem__(self, pin: str) -> int:
+        if pin in self.outputs:
+            return self.outputs[pin]
+        return self.inputs[pin]
+
+    def eval(self) -> None:
+        """Evaluates the outputs and the next state of the chip."""
+        bits = []
+        for pin, nets in self.netlist.inputs:
+            value = self.inputs[pin]
+            bits.extend([(value >> bit) & 1 for bit in range(len(nets))])
+        results, self.next_state = self.evaluate(
+            bits, self.state, 1, self.blocks)
+        offset = 0
+        for pin, nets in self.netlist.outputs:
+            value = 0
+            for bit in range(len(nets)):
+                value |= results[offset + bit] << bit
+            self.outputs[pin] = value
+            offset += len(nets)
+
+    def tick(self) -> None:
+        """Clocks the chip, and evaluates it in its new state."""
+        self.state = self.next_state
+        for block in self.blocks:
+            block.tick()
+        self.eval()
+
+    def block(self, name: str, index: int = 0):
+        """
+        Args:
+            name (str): the name of a chip that is simulated by a block,
+                e.g. "RAM16K" or "ROM32K".
+            index (int): the index of the block among the blocks of the chip.
+
+        Returns:
+            the block.
+        """
+        blocks = [block for block, (chip, _, _, _) in zip(
+            self.blocks, self.netlist.blocks) if chip == name]
+        if index >= len(blocks):
+            raise KeyError(self.netlist.name + " has no block " + name)
+        return blocks[index]
@@ -0,0 +1,260 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import time
+import typing
+import numpy as np
+from ChipLibrary import ChipLibrary
+
+
+def _alu(x: np.ndarray, y: np.ndarray, zx: np.ndarray, nx: np.ndarray,
+         zy: np.ndarray, ny: np.ndarray, f: np.ndarray,
+         no: np.ndarray) -> np.ndarray:
+    """
+    Returns:
+        np.ndarray: the output of the ALU, as specified in ALU.hdl, on
+        arrays of inputs.
+    """
+    x = np.where(zx, 0, x)
+    x = np.where(nx, ~x & 0xFFFF, x)
+    y = np.where(zy, 0, y)
+    y = np.where(ny, ~y & 0xFFFF, y)
+    out = np.where(f, (x + y) & 0xFFFF, x & y)
+    return np.where(no, ~out & 0xFFFF, out)
+
+
+def _flags(out: np.ndarray) -> dict:
+    """
+    Args:
+        out (np.ndarray): outputs of an ALU.
+
+    Returns:
+        dict: the outputs with their zr and ng flags.
+    """
+    return {"out": out, "zr": out == 0, "ng": out >> 15}
+
+
+def _extend_alu(pins: dict) -> typing.Tuple[dict, np.ndarray]:
+    """The specification of ExtendAlu.hdl."""
+    x, y, instruction = pins["x"], pins["y"], pins["instruction"]
+    bit = lambda index: (instruction >> index) & 1
+    shifted = np.where(bit(4), x, y)
+    shift = np.where(bit(5), (shifted << 1) & 0xFFFF,
+                     (shifted >> 1) | (shifted & 0x8000))
+    out = np.where(bit(8), _alu(x, y, bit(5), bit(4), bit(3), bit(2),
+                                bit(1), bit(0)), shift)
+    return _flags(out), bit(7) == 1
+
+
+# The specifications of chips: functions from arrays of the values of the
+# input pins to arrays of the values of the output pins, and to whether the
+# outputs are defined for each vector (None if they always are).
+SPECS = {
+    "HalfAdder": lambda p: ({"sum": p["a"] ^ p["b"],
+                             "carry": p["a"] & p["b"]}, None),
+    "FullAdder": lambda p: ({"sum": p["a"] ^ p["b"] ^ p["c"],
+                             "carry": (p["a"] + p["b"] + p["c"]) >> 1}, None),
+    "Add16": lambda p: ({"out": (p["a"] + p["b"]) & 0xFFFF}, None),
+    "Inc16": lambda p: ({"out": (p["in"] + 1) & 0xFFFF}, None),
+    "ShiftLeft": lambda p: ({"out": (p["in"] << 1) & 0xFFFF}, None),
+    "ShiftRight": lambda p: ({"out": (p["in"] >> 1) | (p["in"] & 0x8000)},
+                             None),
+    "ALU": lambda p: (_flags(_alu(p["x"], p["y"], p["zx"], p["nx"], p["zy"],
+                                  p["ny"], p["f"], p["no"])), None),
+    "ExtendAlu": _extend_alu,
+}
+
+
+class Verifier:
+    """Verifies a combinational chip against its specification in SPECS,
+    many vectors at a time. The compiled evaluator of the chip is bit-sliced:
+    the value of every net holds one bit of every vector, either as a Python
+    int of any length ("int" mode) or as an array of 64-bit words ("numpy"
+    mode), so a single evaluation checks a whole batch of vectors.
+    """
+
+    def __init__(self, name: str, library: typing.Optional[ChipLibrary] = None,
+                 mode: str = "int") -> None:
+        """
+        Args:
+            name (str): the name of a chip in SPECS.
+            library (typing.Optional[ChipLibrary]): the library of the chip.
+            mode (str): "int" or "numpy".
+        """
+        library = library or ChipLibrary()
+        self.name = name
+        self.spec = SPECS[name]
+        self.netlist = library.netlist(name)
+        self.evaluate = library.evaluator(name)
+        self.mode = mode
+        if self.netlist.dffs or self.netlist.blocks:
+            raise ValueError(name + " is not combinational")
+
+    def pack(self, values: np.ndarray, width: int) -> list:
+        """
+        Args:
+            values (np.ndarray): the values of a pin in a batch of vectors,
+                whose length is a multiple of 64.
+            width (int): the width of the pin.
+
+        Returns:
+            list: the bit-sliced values of the bits of the pin.
+        """
+        bits = (values[np.newaxis, :].astype(np.int64) >>
+                np.arange(width)[:, np.newaxis]) & 1
+        packed = np.packbits(bits.astype(np.uint8), axis=1, bitorder="little")
+        if self.mode == "numpy":
+            return list(packed.view("<u8").astype(np.uint64, copy=False))
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    def mismatch(self, difference) -> int:
+        """
+        Args:
+            difference: a non-zero bit-sliced value.
+
+        Returns:
+            int: the index of the first vector whose bit is set.
+        """
+        if self.mode == "numpy":
+            word = int(np.flatnonzero(difference)[0])
+            value = int(difference[word])
+            return 64 * word + (value & -value).bit_length() - 1
+        return (difference & -difference).bit_length() - 1
+
+    def vectors(self, start: int, count: int,
+                rng: typing.Optional[np.random.Generator]) -> dict:
+        """
+        Args:
+            start (int): the index of the first vector, when the input space
+                is enumerated.
+            count (int): the number of vectors.
+            rng (typing.Optional[np.random.Generator]): the generator of
+                random vectors, or None to enumerate the input space, which
+                wraps around.
+
+        Returns:
+            dict: the values of the input pins in the vectors.
+        """
+        pins = {}
+        if rng is None:
+            bits = sum(len(nets) for _, nets in self.netlist.inputs)
+            index = (np.arange(start, start + count, dtype=np.int64) %
+                     (1 << bits))
+            for pin, nets in self.netlist.inputs:
+                pins[pin] = index & ((1 << len(nets)) - 1)
+                index = index >> len(nets)
+        else:
+            for pin, nets in self.netlist.inputs:
+                pins[pin] = rng.integers(0, 1 << len(nets), count,
+                                         dtype=np.int64)
+        return pins
+
+    def check(self, pins: dict) -> typing.Tuple[float, typing.Optional[int]]:
+        """Evaluates the chip on a batch of vectors, and compares its outputs
+        to the specification.
+
+        Args:
+            pins (dict): the values of the input pins in the vectors.
+
+        Returns:
+            typing.Tuple[float, typing.Optional[int]]: the time of the
+            evaluation in seconds, and the index of the first vector whose
+            outputs are wrong, or None.
+        """
+        count = len(next(iter(pins.values())))
+        inputs = [plane for pin, nets in self.netlist.inputs
+                  for plane in self.pack(pins[pin], len(nets))]
+        mask = np.full(count // 64, ~np.uint64(0)) \
+            if self.mode == "numpy" else (1 << count) - 1
+        start = time.perf_counter()
+        results, _ = self.evaluate(inputs, [], mask)
+        elapsed = time.perf_counter() - start
+        expected, defined = self.spec(pins)
+        defined = mask if defined is None else \
+            self.pack(np.asarray(defined, np.int64), 1)[0]
+        offset = 0
+        for pin, nets in self.netlist.outputs:
+            planes = self.pack(np.asarray(expected[pin], np.int64), len(nets))
+            for result, plane in zip(results[offset:], planes):
+                difference = (result ^ plane) & defined
+                if np.any(difference) if self.mode == "numpy" else difference:
+                    return elapsed, self.mismatch(difference)
+            offset += len(nets)
+        return elapsed, None
+
+    def verify(self, vectors: int, batch: int = 1 << 16,
+               seed: int = 0) -> typing.Tuple[int, bool, float,
+                                              typing.Optional[dict]]:
+        """Verifies the chip on all its input vectors, if there are at most
+        the given number of them, and on random vectors otherwise.
+
+        Args:
+            vectors (int): the maximal number of vectors to check.
+            batch (int): the number of vectors per evaluation, which is
+                rounded up to a multiple of 64.
+            seed (int): the seed of the random vectors.
+
+        Returns:
+            typing.Tuple[int, bool, float, typing.Optional[dict]]: the number
+            of checked vectors, whether they are all the input vectors, the
+            total time of the evaluations in seconds, and the input pins of a
+            vector whose outputs are wrong, or None.
+        """
+        space = 1 << sum(len(nets) for _, nets in self.netlist.inputs)
+        exhaustive = space <= vectors
+        rng = None if exhaustive else np.random.default_rng(seed)
+        total = space if exhaustive else vectors
+        batch = -(-min(batch, total) // 64) * 64
+        elapsed = 0.0
+        for start in range(0, total, batch):
+            pins = self.vectors(start, batch, rng)
+            seconds, wrong = self.check(pins)
+            elapsed += seconds
+            if wrong is not None:
+                return start + wrong + 1, exhaustive, elapsed, \
+                    {pin: int(values[wrong]) for pin, values in pins.items()}
+        return total, exhaustive, elapsed, None
+
+
+if "__main__" == __name__:
+    # Verifies chips against their specifications, and prints the number of
+    # vectors per second that their evaluators check.
+    arg_parser = argparse.ArgumentParser(
+        description="Verifies combinational chips against their "
+                    "specifications, many vectors per evaluation.")
+    arg_parser.add_argument(
+        "chips", nargs="*", default=["Add16", "ALU", "ExtendAlu"],
+        help="chips to verify, of: " + ", ".join(sorted(SPECS)))
+    arg_parser.add_argument(
+        "--vectors", type=int, default=1 << 24,
+        help="inputs spaces up to this size are verified exhaustively, and "
+             "larger ones on this number of random vectors")
+    arg_parser.add_argument(
+        "--batch", type=int, default=1 << 16,
+        help="the number of vectors per evaluation")
+    arg_parser.add_argument("--mode", choices=["int", "numpy"], default="int")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    library = ChipLibrary()
+    failed = False
+    for chip in args.chips:
+        verifier = Verifier(chip, library, args.mode)
+        start = time.perf_counter()
+        count, exhaustive, elapsed, wrong = verifier.verify(
+            args.vectors, args.batch, args.seed)
+        total = time.perf_counter() - start
+        print("{}: {} {} vectors, {:.2f}M vectors/sec evaluated, {:.2f}M "
+              "vectors/sec with the specification".format(
+                  chip, count, "exhaustive" if exhaustive else "random",
+                  count / elapsed / 1e6, count / total / 1e6))
+        if wrong is not None:
+            failed = True
+            print("  wrong outputs for " + ", ".join(
+                "{}={}".format(pin, value) for pin, value in wrong.items()))
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,28 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from array import array
+from FileCache import FileCache
+
+
+class AssemblyCache(FileCache):
+    """An on-disk cache of assembled programs, see FileCache. Every entry
+    holds the machine words of one program, and is keyed by its source.
+    """
+    NAME = "hack-assembler"
+    EXTENSION = ".words"
+
+    @staticmethod
+    def encode(words: typing.Sequence[int]) -> bytes:
+        return array('L', words).tobytes()
+
+    @staticmethod
+    def decode(data: bytes) -> array:
+        words = array('L')
+        words.frombytes(data)
+        return words
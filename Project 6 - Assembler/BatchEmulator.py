@@ -0,0 +1,143 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+import numpy as np
+from Emulator import Emulator
+
+
+class BatchEmulator:
+    """Runs the same program on many Hack computers at once, in lockstep.
+    The registers of all the computers are NumPy arrays, and their RAM is a
+    single (computers x 32K) matrix of 16-bit words, so every instruction is
+    executed by a few vectorized operations on all the computers whose PC
+    points at it. Computers whose PCs diverged are executed in groups, one
+    group per distinct PC, and halted computers are masked out.
+
+    Instructions are decoded exactly as in Emulator.
+    """
+
+    def __init__(self, rom: typing.Sequence[int], computers: int) -> None:
+        """Creates computers with zeroed registers and RAM.
+
+        Args:
+            rom (typing.Sequence[int]): the program to load.
+            computers (int): the number of computers.
+        """
+        self.decoded = Emulator(rom).decoded
+        self.computers = computers
+        self.ram = np.zeros((computers, 32768), dtype=np.uint16)
+        self.a = np.zeros(computers, dtype=np.int32)
+        self.d = np.zeros(computers, dtype=np.int32)
+        self.pc = np.zeros(computers, dtype=np.int32)
+        self.halted = np.zeros(computers, dtype=bool)
+        self.live = None    # indices of the running computers, or None
+
+    @staticmethod
+    def from_file(path: str, computers: int) -> "BatchEmulator":
+        """
+        Args:
+            path (str): an .asm program, or an assembled program in any of
+                the formats of Rom.
+            computers (int): the number of computers.
+
+        Returns:
+            BatchEmulator: computers with the program loaded.
+        """
+        return BatchEmulator(Emulator.read_rom(path), computers)
+
+    def signed_ram(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: the RAM of all the computers as signed integers, a
+            view that shares memory with the RAM.
+        """
+        return self.ram.view(np.int16)
+
+    def reset(self) -> None:
+        """Restarts the program on all the computers."""
+        self.pc[:] = 0
+        self.halted[:] = False
+        self.live = None
+
+    def __execute(self, pc: int, group: np.ndarray) -> None:
+        """Executes the instruction at the given address on a group of
+        computers.
+
+        Args:
+            pc (int): the address of the instruction.
+            group (np.ndarray): the indices of the computers.
+        """
+        if pc >= len(self.decoded):
+            self.halted[group] = True
+            self.live = None
+            return
+        instruction = self.decoded[pc]
+        computation = instruction[0]
+        if computation is None:
+            self.a[group] = instruction[1]
+            self.pc[group] = pc + 1
+            return
+        _, y_is_m, dest, jumps, halts = instruction
+        a = self.a[group]
+        if y_is_m:
+            y = self.ram[group, a & 0x7FFF].astype(np.int32)
+        else:
+            y = a
+        out = np.asarray(computation(self.d[group], y), dtype=np.int32) & 0xFFFF
+        out = np.broadcast_to(out, group.shape)
+        if dest & 1:
+            self.ram[group, a & 0x7FFF] = out
+        if dest & 2:
+            self.d[group] = out
+        if dest & 4:
+            self.a[group] = out
+        if jumps is None:
+            self.pc[group] = pc + 1
+            return
+        negative = (out & 0x8000) != 0
+        zero = out == 0
+        taken = np.zeros(group.shape, dtype=bool)
+        if jumps[0]:
+            taken |= ~negative & ~zero
+        if jumps[1]:
+            taken |= zero
+        if jumps[2]:
+            taken |= negative
+        self.pc[group] = np.where(taken, a, pc + 1)
+        if halts:
+            halting = group[taken & (a == pc - 1)]
+            if len(halting):
+                self.halted[halting] = True
+                self.pc[halting] = pc
+                self.live = None
+
+    def run(self, max_steps: int) -> int:
+        """Runs the program on all the computers until they all halt (see
+        Emulator.run), or until max_steps lockstep steps were executed.
+
+        Args:
+            max_steps (int): the maximal number of steps to execute.
+
+        Returns:
+            int: the number of executed steps.
+        """
+        for steps in range(max_steps):
+            if self.live is None:
+                self.live = np.flatnonzero(~self.halted)
+            live = self.live
+            if len(live) == 0:
+                return steps
+            pcs = self.pc[live]
+            first = int(pcs[0])
+            if (pcs == first).all():
+                self.__execute(first, live)
+                continue
+            addresses, groups = np.unique(pcs, return_inverse=True)
+            for index, pc in enumerate(addresses):
+                self.__execute(int(pc), live[groups == index])
+        return max_steps
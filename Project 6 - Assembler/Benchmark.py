@@ -0,0 +1,291 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from Main import assemble_file, assemble_file_single_pass
+from Emulator import Emulator, KBD
+
+
+def generate_block(i: int, labels: int) -> str:
+    """Generates a block of about 30 instructions that looks like the output
+    of the VM translator: a label, forward and backward jumps, variables and
+    stack manipulation.
+
+    Args:
+        i (int): the index of the block.
+        labels (int): the number of labelled blocks. Blocks from this index
+            on do not define a label, and only jump to the labelled blocks.
+
+    Returns:
+        str: the assembly code of the block.
+    """
+    res = ["// block " + str(i) + "\n"]
+    if i < labels:
+        res.append("(BLOCK." + str(i) + ")\n")
+    res.append("@" + str(i % 32768) + "\nD=A\n@SP\nA=M\nM=D\n@SP\nM=M+1\n")
+    res.append("@var." + str(i % 97) + "\nD=M\n@SP\nAM=M-1\nM=D+M\n")
+    res.append("@LCL\nD=M\n@frame\nM=D\n@5\nA=D-A\nD=M\n@retAddr\nM=D\n")
+    res.append("@BLOCK." + str(min(i + 1, labels) % (labels + 1)) + "\nD;JGT\n")
+    res.append("@BLOCK." + str(max(i - 1, 0) % labels) + "\n0;JMP\n")
+    res.append("@SP\nAM=M-1\nD=M\nA=A-1\nM=M-D\nD=!D\nD=D|M\nM=D>>\n")
+    return "".join(res)
+
+
+def generate_program(blocks: int) -> str:
+    """Generates a synthetic assembly program that looks like the output of
+    the VM translator.
+
+    Args:
+        blocks (int): the number of code blocks to generate, each block is
+            about 30 instructions long.
+
+    Returns:
+        str: the assembly program.
+    """
+    res = [generate_block(i, blocks) for i in range(blocks)]
+    res.append("(BLOCK." + str(blocks) + ")\n@BLOCK." + str(blocks) + "\n0;JMP\n")
+    return "".join(res)
+
+
+def generate_program_file(path: str, blocks: int, labels: int) -> None:
+    """Writes a synthetic assembly program of any size block by block. Only
+    the first blocks define labels, so all the addresses of the program fit
+    into 16 bits.
+
+    Args:
+        path (str): the path of the file to write.
+        blocks (int): the number of code blocks to generate.
+        labels (int): the number of labelled blocks.
+    """
+    with open(path, 'w') as output_file:
+        for i in range(blocks):
+            output_file.write(generate_block(i, labels))
+            if i == labels - 1:
+                output_file.write("(BLOCK." + str(labels) + ")\n")
+
+
+def time_assembler(
+        assemble: typing.Callable[[typing.TextIO, typing.TextIO], None],
+        source: str, repeat: int) -> typing.Tuple[float, str]:
+    """Times an assembler function on the given source.
+
+    Args:
+        assemble (typing.Callable): the assembler function to time.
+        source (str): the assembly program.
+        repeat (int): how many times to assemble the program.
+
+    Returns:
+        typing.Tuple[float, str]: the best wall time in seconds, and the
+        output of the assembler.
+    """
+    best = float("inf")
+    output = ""
+    for _ in range(repeat):
+        input_file, output_file = io.StringIO(source), io.StringIO()
+        start = time.perf_counter()
+        assemble(input_file, output_file)
+        best = min(best, time.perf_counter() - start)
+        output = output_file.getvalue()
+    return best, output
+
+
+def bench_single_pass(args: argparse.Namespace) -> None:
+    """Compares the two-pass assembler with the single-pass assembler."""
+    blocks, repeat = args.blocks, args.repeat
+    source = generate_program(blocks)
+    print("input: {} lines, {:.1f} MB".format(
+        source.count("\n"), len(source) / 2**20))
+    two_pass, expected = time_assembler(assemble_file, source, repeat)
+    single_pass, output = time_assembler(
+        assemble_file_single_pass, source, repeat)
+    assert output == expected, "single-pass output differs from two-pass"
+    print("two-pass:    {:.3f}s".format(two_pass))
+    print("single-pass: {:.3f}s ({:.2f}x)".format(
+        single_pass, two_pass / single_pass))
+
+
+# Assembles a file in a child process, and prints the wall time and the peak
+# memory usage (in KB) of the child.
+_MEASURE = """
+import resource, sys, time
+from Main import assemble_path
+start = time.perf_counter()
+assemble_path(sys.argv[1], stream=sys.argv[2] == "stream")
+print(time.perf_counter() - start,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def bench_stream(args: argparse.Namespace) -> None:
+    """Compares the memory usage of the streaming assembler with the
+    assemblers that load the whole program."""
+    blocks, repeat = args.blocks, args.repeat
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "Program.asm")
+        generate_program_file(input_path, blocks, min(blocks, 1000))
+        print("input: {:.1f} MB".format(os.path.getsize(input_path) / 2**20))
+        outputs = {}
+        for mode in ("stream", "two-pass"):
+            best_time, peak = float("inf"), 0
+            for _ in range(repeat):
+                result = subprocess.run(
+                    [sys.executable, "-c", _MEASURE, input_path, mode],
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    check=True, capture_output=True, text=True)
+                wall, rss = result.stdout.split()
+                best_time, peak = min(best_time, float(wall)), int(rss)
+            with open(os.path.join(directory, "Program.hack"), 'rb') as f:
+                outputs[mode] = hashlib.sha256(f.read()).digest()
+            print("{:10}{:.3f}s, peak memory {:.1f} MB".format(
+                mode + ":", best_time, peak / 2**10))
+        assert outputs["stream"] == outputs["two-pass"], \
+            "streaming output differs from two-pass"
+
+
+# The programs of project 4.
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                        "Project 4 - Machine Language")
+
+
+def time_emulator(emulator: Emulator, steps: int,
+                  repeat: int) -> typing.Tuple[float, int]:
+    """Times the emulator on its loaded program, restarting the program
+    whenever it halts.
+
+    Args:
+        emulator (Emulator): the emulator to time.
+        steps (int): the number of instructions to execute.
+        repeat (int): how many times to execute them.
+
+    Returns:
+        typing.Tuple[float, int]: the best wall time in seconds, and the
+        number of executed instructions.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        executed = 0
+        start = time.perf_counter()
+        while executed < steps:
+            executed += emulator.run(steps - executed)
+            if emulator.halted:
+                emulator.reset()
+        best = min(best, time.perf_counter() - start)
+    return best, steps
+
+
+def bench_emulator(args: argparse.Namespace) -> None:
+    """Runs Mult.asm and Fill.asm on the emulator."""
+    mult = Emulator.from_file(os.path.join(PROGRAMS, "Mult.asm"))
+    mult.ram[0], mult.ram[1] = 3, 10000
+    mult.run(args.steps)
+    assert mult.halted and mult.ram[2] == 30000, "Mult computed a wrong product"
+    mult.reset()
+    fill = Emulator.from_file(os.path.join(PROGRAMS, "Fill.asm"))
+    fill.ram[KBD] = 1
+    for name, emulator in (("Mult", mult), ("Fill", fill)):
+        wall, executed = time_emulator(emulator, args.steps, args.repeat)
+        print("{}: {} instructions in {:.3f}s, {:.2f}M instructions/sec"
+              .format(name, executed, wall, executed / wall / 1e6))
+
+
+def bench_batch(args: argparse.Namespace) -> None:
+    """Validates Mult.asm over all pairs of operands below --operands, with
+    the batch emulator and with the emulator."""
+    import numpy as np      # NumPy is only needed by this benchmark
+    from BatchEmulator import BatchEmulator
+    operands = args.operands
+    path = os.path.join(PROGRAMS, "Mult.asm")
+    batch = BatchEmulator.from_file(path, operands * operands)
+    batch.ram[:, 0], batch.ram[:, 1] = divmod(
+        np.arange(operands * operands), operands)
+    start = time.perf_counter()
+    steps = batch.run(args.steps)
+    batch_time = time.perf_counter() - start
+    assert batch.halted.all(), "Mult did not halt on all the computers"
+    assert (batch.ram[:, 2] == batch.ram[:, 0] * batch.ram[:, 1]).all(), \
+        "Mult computed a wrong product"
+
+    emulator = Emulator.from_file(path)
+    start = time.perf_counter()
+    for r0 in range(operands):
+        for r1 in range(operands):
+            emulator.reset()
+            emulator.ram[0], emulator.ram[1] = r0, r1
+            emulator.run(args.steps)
+            assert emulator.ram[2] == r0 * r1, "Mult computed a wrong product"
+    emulator_time = time.perf_counter() - start
+    print("{} input pairs, {} lockstep steps".format(operands**2, steps))
+    print("batch:    {:.3f}s".format(batch_time))
+    print("emulator: {:.3f}s ({:.2f}x)".format(
+        emulator_time, emulator_time / batch_time))
+
+
+def bench_blocks(args: argparse.Namespace) -> None:
+    """Compares the block emulator with the emulator on Mult.asm, Fill.asm
+    and the programs of --program, e.g. the output of the VM translator.
+    The first run includes the translation of the blocks, and the others
+    reuse them."""
+    from BlockEmulator import BlockEmulator
+    programs = [("Mult", os.path.join(PROGRAMS, "Mult.asm"), {0: 3, 1: 10000}),
+                ("Fill", os.path.join(PROGRAMS, "Fill.asm"), {KBD: 1})] + [
+        (os.path.basename(path), path, {}) for path in args.program]
+    for name, path, ram in programs:
+        rom = Emulator.read_rom(path)
+        states, times = [], []
+        for emulator in (Emulator(rom), BlockEmulator(rom)):
+            for address, value in ram.items():
+                emulator.ram[address] = value
+            start = time.perf_counter()
+            executed = emulator.run(args.steps)
+            first = time.perf_counter() - start
+            states.append((executed, emulator.halted, emulator.a, emulator.d,
+                           emulator.pc, list(emulator.ram)))
+            emulator.reset()
+            wall, steps = time_emulator(emulator, args.steps, args.repeat)
+            times.append((executed / first, steps / wall))
+        assert states[0] == states[1], \
+            name + ": the block emulator differs from the emulator"
+        print("{}: {} instructions, {} blocks".format(
+            name, states[0][0], len(emulator.blocks)))
+        print("  emulator: {:.2f}M instructions/sec".format(times[0][1] / 1e6))
+        print("  blocks:   {:.2f}M instructions/sec on the first run "
+              "(x{:.2f}), {:.2f}M translated (x{:.2f})".format(
+                  times[1][0] / 1e6, times[1][0] / times[0][0],
+                  times[1][1] / 1e6, times[1][1] / times[0][1]))
+
+
+BENCHMARKS = {
+    "single-pass": bench_single_pass,
+    "stream": bench_stream,
+    "emulator": bench_emulator,
+    "batch": bench_batch,
+    "blocks": bench_blocks,
+}
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmarks for the Hack assembler.")
+    arg_parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    arg_parser.add_argument("--blocks", type=int, default=20000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--steps", type=int, default=5000000)
+    arg_parser.add_argument("--operands", type=int, default=128)
+    arg_parser.add_argument(
+        "--program", action="append", default=[],
+        help="a program to run in the blocks benchmark as well, e.g. the "
+             "output of the VM translator")
+    args = arg_parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
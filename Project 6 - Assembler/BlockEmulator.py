@@ -0,0 +1,332 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from Emulator import Emulator
+
+# The computations of ALU_FUNCTIONS as Python expressions, on x = D and
+# y = A or M. Control bits that have no mnemonic call their computation.
+ALU_EXPRESSIONS = {
+    0b101010: "0",
+    0b111111: "1",
+    0b111010: "-1",
+    0b001100: "{x}",
+    0b110000: "{y}",
+    0b001101: "~{x}",
+    0b110001: "~{y}",
+    0b001111: "-{x}",
+    0b110011: "-{y}",
+    0b011111: "{x} + 1",
+    0b110111: "{y} + 1",
+    0b001110: "{x} - 1",
+    0b110010: "{y} - 1",
+    0b000010: "{x} + {y}",
+    0b010011: "{x} - {y}",
+    0b000111: "{y} - {x}",
+    0b000000: "{x} & {y}",
+    0b010101: "{x} | {y}",
+}
+
+# The computations of SHIFT_FUNCTIONS as Python expressions.
+SHIFT_EXPRESSIONS = {
+    0b00: "({y} >> 1) | ({y} & 0x8000)",
+    0b01: "({x} >> 1) | ({x} & 0x8000)",
+    0b10: "{y} << 1",
+    0b11: "{x} << 1",
+}
+
+# Whether a jump is taken, by the jump bits of a C-instruction, as a Python
+# condition on the 16-bit output o of the ALU.
+JUMP_CONDITIONS = {
+    1: "0 < o < 0x8000",
+    2: "o == 0",
+    3: "o < 0x8000",
+    4: "o >= 0x8000",
+    5: "o != 0",
+    6: "o == 0 or o >= 0x8000",
+    7: "True",
+}
+
+# The maximal number of instructions of a block, which bounds the size of
+# the translated functions.
+MAX_BLOCK = 256
+
+
+class BlockEmulator(Emulator):
+    """An emulator that translates the program to Python rather than
+    dispatching on every instruction. The ROM is split into basic blocks,
+    the instructions from an address up to and including the first jump,
+    and each block is translated into a Python function by compile() the
+    first time that it is executed. The functions keep A and D in locals,
+    and use the values of A that the block sets by A-instructions as
+    constants, so "@SP, AM=M-1" is a single "ram[0]" access.
+
+    A translated block is called as block(ram, a, d), and returns (next, a,
+    d, executed instructions), where next is the block to execute next, its
+    address if it was not linked yet, or None if the program halted. Targets
+    that are known when a block is translated (fall-throughs and jumps to
+    constant addresses) are linked: once the target is translated, the
+    block returns it directly, so a chain of blocks is never looked up again.
+
+    The cache of blocks is invalidated whenever the ROM changes, either
+    entirely by load() or by write_rom(), which invalidates only the blocks
+    that contain the written address, see invalidate(). The registers, the
+    RAM, the halting rules and the number of executed instructions are
+    exactly those of Emulator.
+    """
+
+    def __init__(self, rom: typing.Sequence[int] = ()) -> None:
+        """Creates a computer with zeroed registers and RAM.
+
+        Args:
+            rom (typing.Sequence[int]): the program to load.
+        """
+        self.rom = []
+        self.blocks = {}    # address -> the block that starts at it
+        self.links = {}     # address -> namespaces of blocks linked to it
+        super().__init__(rom)
+
+    @staticmethod
+    def from_file(path: str) -> "BlockEmulator":
+        """
+        Args:
+            path (str): a program, see Emulator.read_rom.
+
+        Returns:
+            BlockEmulator: an emulator with the program loaded.
+        """
+        return BlockEmulator(Emulator.read_rom(path))
+
+    def load(self, rom: typing.Sequence[int]) -> None:
+        """Loads a program into the ROM, and discards all translated blocks.
+
+        Args:
+            rom (typing.Sequence[int]): the program to load.
+        """
+        self.rom = list(rom)
+        self.blocks, self.links = {}, {}
+        super().load(self.rom)
+
+    def write_rom(self, address: int, word: int) -> None:
+        """Writes a word of the ROM, and invalidates the blocks that it
+        affects. The halts flag of the next instruction depends on the word
+        as well, see Emulator.
+
+        Args:
+            address (int): an address of the ROM.
+            word (int): the instruction to write.
+        """
+        self.rom[address] = word
+        for changed in (address, address + 1):
+            if changed >= len(self.rom):
+                continue
+            instruction = Emulator.decode(self.rom[changed])
+            if instruction[0] is not None:
+                instruction += (self.rom[changed] & 7 == 7 and changed > 0 and
+                                self.rom[changed - 1] == changed - 1,)
+            self.decoded[changed] = instruction
+        self.invalidate(address, address + 1)
+
+    def invalidate(self, first: int = 0,
+                   last: typing.Optional[int] = None) -> None:
+        """Discards the translated blocks that contain any address in a range
+        of the ROM, and unlinks the blocks that were linked to them, so they
+        are translated again when they are next executed.
+
+        Args:
+            first (int): the first address of the range.
+            last (typing.Optional[int]): the last address of the range, by
+                default the end of the ROM.
+        """
+        last = len(self.rom) if last is None else last
+        for start, block in list(self.blocks.items()):
+            if start <= last and first <= block.end:
+                del self.blocks[start]
+                for namespace in self.links.pop(start, ()):
+                    namespace["L" + str(start)] = start
+
+    def source(self, start: int) -> str:
+        """
+        Args:
+            start (int): the address of a block.
+
+        Returns:
+            str: the Python source of the block's function.
+        """
+        return self.__generate(start)[0]
+
+    def __generate(self, start: int) -> typing.Tuple[str, int, int, dict]:
+        """Translates the block that starts at an address of the ROM.
+
+        Args:
+            start (int): the address of the block.
+
+        Returns:
+            typing.Tuple[str, int, int, dict]: the Python source of the
+            block's function, the address of its last instruction, its
+            number of instructions, and the globals that it needs: the
+            computations without a mnemonic, and the links to the targets
+            that are known, which are initially their addresses.
+        """
+        decoded = self.decoded
+        namespace = {}
+        lines = ["def block(ram, a, d):"]
+        known = None    # the value of A, if set by an A-instruction
+        halts = False
+        pc = start
+        exits = None
+        while exits is None:
+            instruction = decoded[pc]
+            count = pc - start + 1
+            if instruction[0] is None:
+                known = instruction[1]
+                pc += 1
+                if pc == len(decoded) or count == MAX_BLOCK:
+                    exits = [(None, str(pc))]
+                continue
+            computation, y_is_m, dest, jumps, halts = instruction
+            word = self.rom[pc]
+            control = (word >> 6) & 0x3F
+            address = "a & 0x7FFF" if known is None else str(known & 0x7FFF)
+            a = "a" if known is None else str(known)
+            if word & 0x6000 == 0x6000:
+                expression = ALU_EXPRESSIONS.get(control)
+                if expression is None:
+                    namespace["c" + str(pc)] = computation
+                    expression = "c" + str(pc) + "({x}, {y})"
+            else:
+                expression = SHIFT_EXPRESSIONS[control >> 4]
+            out = None
+            if "{x}" not in expression and ("{y}" not in expression or
+                                             known is not None and not y_is_m):
+                out = str(computation(0, known or 0) & 0xFFFF)
+            if out is None:
+                expression = expression.format(
+                    x="d", y="ram[" + address + "]" if y_is_m else a)
+                out = "(" + expression + ") & 0xFFFF"
+                if bin(dest).count("1") + (jumps is not None) > 1:
+                    lines.append("    o = " + out)
+                    out = "o"
+            target = a
+            if jumps is not None and dest & 4 and known is None:
+                lines.append("    t = a")
+                target = "t"
+            if dest & 1:
+                lines.append("    ram[" + address + "] = " + out)
+            if dest & 2:
+                lines.append("    d = " + out)
+            if dest & 4:
+                lines.append("    a = " + out)
+                known = None
+            pc += 1
+            if jumps is None:
+                if pc == len(decoded) or count == MAX_BLOCK:
+                    exits = [(None, str(pc))]
+                continue
+            if out.isdigit():
+                value = int(out)
+                taken = jumps[2 if value & 0x8000 else (1 if not value else 0)]
+                condition = "True" if taken else None
+            else:
+                condition = JUMP_CONDITIONS[word & 7]
+                if out != "o":
+                    # the only use of the output is the jump
+                    lines.append("    o = " + out)
+            exits = []
+            if condition is not None:
+                exits.append((condition, target))
+            if condition != "True":
+                exits.append((None, str(pc)))
+        # the jump of the halting idiom is not executed, see Emulator.run
+        registers = ", {}, d, ".format("a" if known is None else known)
+        count = pc - start
+        halt = "return None" + registers + str(count - 1)
+        for condition, target in exits:
+            indent = "    "
+            if condition not in (None, "True"):
+                lines.append(indent + "if " + condition + ":")
+                indent += "    "
+            if not target.isdigit():
+                if halts:
+                    lines.append(indent + "if {} == {}:".format(
+                        target, pc - 2))
+                    lines.append(indent + "    " + halt)
+                lines.append(indent + "return " + target + registers +
+                             str(count))
+            elif halts and int(target) == pc - 2:
+                lines.append(indent + halt)
+            else:
+                namespace["L" + target] = int(target)
+                lines.append(indent + "return L" + target + registers +
+                             str(count))
+        return "\n".join(lines) + "\n", pc - 1, count, namespace
+
+    def __translate(self, start: int) -> typing.Callable:
+        """
+        Args:
+            start (int): the address of a block.
+
+        Returns:
+            typing.Callable: the function of the block, which is cached.
+        """
+        source, end, size, namespace = self.__generate(start)
+        exec(compile(source, "<block {}>".format(start), "exec"), namespace)
+        block = namespace["block"]
+        block.start, block.end, block.size = start, end, size
+        self.blocks[start] = block
+        return block
+
+    def run(self, max_steps: int) -> int:
+        """Runs the program until it halts or until max_steps instructions
+        were executed, as Emulator.run does. Whole blocks are executed while
+        they fit in max_steps, and the rest is interpreted.
+
+        Args:
+            max_steps (int): the maximal number of instructions to execute.
+
+        Returns:
+            int: the number of executed instructions.
+        """
+        blocks, links, ram = self.blocks, self.links, self.ram
+        size = len(self.decoded)
+        a, d, pc = self.a, self.d, self.pc
+        steps = 0
+        block = None
+        halted = False
+        while True:
+            if block is None:
+                if pc >= size:
+                    halted = steps < max_steps
+                    break
+                block = blocks.get(pc) or self.__translate(pc)
+            if steps + block.size > max_steps:
+                pc = block.start
+                break
+            target, a, d, executed = block(ram, a, d)
+            steps += executed
+            if target.__class__ is int:
+                pc = target
+                namespace = block.__globals__
+                block = blocks.get(pc)
+                if block is None and pc < size:
+                    block = self.__translate(pc)
+                link = "L" + str(pc)
+                if block is not None and namespace.get(link).__class__ is int:
+                    namespace[link] = block
+                    links.setdefault(pc, []).append(namespace)
+            elif target is None:
+                halted = True
+                pc = block.end
+                break
+            else:
+                block = target
+        self.a, self.d, self.pc = a, d, pc
+        if halted:
+            self.halted = True
+        elif steps < max_steps:
+            steps += super().run(max_steps - steps)
+        return steps
@@ -7,9 +7,121 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 
 
+# The binary codes of the comp part (including the three leading bits) of
+# every C-command, as 10-bit integers.
+COMP_CODES = {
+    # when a = 0
+    '0': 0b1110101010,
+    '1': 0b1110111111,
+    '-1': 0b1110111010,
+    'D': 0b1110001100,
+    'A': 0b1110110000,
+    '!D': 0b1110001101,
+    '!A': 0b1110110001,
+    '-D': 0b1110001111,
+    '-A': 0b1110110011,
+    'D+1': 0b1110011111,
+    'A+1': 0b1110110111,
+    'D-1': 0b1110001110,
+    'A-1': 0b1110110010,
+    'D+A': 0b1110000010,
+    'D-A': 0b1110010011,
+    'A-D': 0b1110000111,
+    'D&A': 0b1110000000,
+    'D|A': 0b1110010101,
+    # when a = 1
+    'M': 0b1111110000,
+    '!M': 0b1111110001,
+    '-M': 0b1111110011,
+    'M+1': 0b1111110111,
+    'M-1': 0b1111110010,
+    'D+M': 0b1111000010,
+    'D-M': 0b1111010011,
+    'M-D': 0b1111000111,
+    'D&M': 0b1111000000,
+    'D|M': 0b1111010101,
+    # the same computations, with commuted operands
+    'A+D': 0b1110000010,
+    'A&D': 0b1110000000,
+    'A|D': 0b1110010101,
+    'M+D': 0b1111000010,
+    'M&D': 0b1111000000,
+    'M|D': 0b1111010101,
+    # when bit 14 = 0
+    'A<<': 0b1010100000,
+    'D<<': 0b1010110000,
+    'M<<': 0b1011100000,
+    'A>>': 0b1010000000,
+    'D>>': 0b1010010000,
+    'M>>': 0b1011000000
+}
+
+# The binary codes of the jump part of every C-command, as 3-bit integers.
+JUMP_CODES = {
+    'NULL': 0b000,
+    'JGT': 0b001,
+    'JEQ': 0b010,
+    'JGE': 0b011,
+    'JLT': 0b100,
+    'JNE': 0b101,
+    'JLE': 0b110,
+    'JMP': 0b111
+}
+
+# Memoizes the full text of every C-command seen so far to its 16-bit word.
+_C_COMMAND_WORDS = {}
+
+
 class Code:
     """Translates Hack assembly language mnemonics into binary codes."""
-    
+
+    @staticmethod
+    def dest_code(mnemonic: str) -> int:
+        """
+        Args:
+            mnemonic (str): a dest mnemonic string.
+
+        Returns:
+            int: 3-bit long binary code of the given mnemonic.
+        """
+        return ((4 if 'A' in mnemonic else 0) | (2 if 'D' in mnemonic else 0)
+                | (1 if 'M' in mnemonic else 0))
+
+    @staticmethod
+    def encode(dest: str, comp: str, jump: str) -> int:
+        """
+        Args:
+            dest (str): a dest mnemonic string.
+            comp (str): a comp mnemonic string.
+            jump (str): a jump mnemonic string.
+
+        Returns:
+            int: the 16-bit word of the C-command made of the given mnemonics.
+        """
+        return (COMP_CODES[comp] << 6) | (Code.dest_code(dest) << 3) \
+            | JUMP_CODES[jump]
+
+    @staticmethod
+    def c_command(command: str) -> int:
+        """Encodes the full text of a C-command, without white space or
+        comments. Every distinct command is decoded only once.
+
+        Args:
+            command (str): a C-command, dest=comp;jump.
+
+        Returns:
+            int: the 16-bit word of the given command.
+        """
+        word = _C_COMMAND_WORDS.get(command)
+        if word is None:
+            dest, eq, rest = command.partition('=')
+            if not eq:
+                dest, rest = "NULL", dest
+            comp, semicolon, jump = rest.partition(';')
+            word = Code.encode(dest, comp, jump if semicolon else "NULL")
+            _C_COMMAND_WORDS[command] = word
+        return word
+
     @staticmethod
     def dest(mnemonic: str) -> str:
         """
@@ -19,20 +131,7 @@ class Code:
         Returns:
             str: 3-bit long binary code of the given mnemonic.
         """
-        dst = ""
-        if 'A' in mnemonic:
-            dst = dst + "1"
-        else:
-            dst = dst + "0"
-        if 'D' in mnemonic:
-            dst = dst + "1"
-        else:
-            dst = dst + "0"
-        if 'M' in mnemonic:
-            dst = dst + "1"
-        else:
-            dst = dst + "0"
-        return dst
+        return format(Code.dest_code(mnemonic), "03b")
 
     @staticmethod
     def comp(mnemonic: str) -> str:
@@ -43,46 +142,7 @@ class Code:
         Returns:
             str: the binary code of the given mnemonic.
         """
-        cmp = {
-            # when a = 0
-            '0': '1110101010',
-            '1': '1110111111',
-            '-1': '1110111010',
-            'D': '1110001100',
-            'A': '1110110000',
-            '!D': '1110001101',
-            '!A': '1110110001',
-            '-D': '1110001111',
-            '-A': '1110110011',
-            'D+1': '1110011111',
-            'A+1': '1110110111',
-            'D-1': '1110001110',
-            'A-1': '1110110010',
-            'D+A': '1110000010',
-            'D-A': '1110010011',
-            'A-D': '1110000111',
-            'D&A': '1110000000',
-            'D|A': '1110010101',
-            # when a = 1
-            'M': '1111110000',
-            '!M': '1111110001',
-            '-M': '1111110011',
-            'M+1': '1111110111',
-            'M-1': '1111110010',
-            'D+M': '1111000010',
-            'D-M': '1111010011',
-            'M-D': '1111000111',
-            'D&M': '1111000000',
-            'D|M': '1111010101',
-            # when bit 14 = 0
-            'A<<': '1010100000',
-            'D<<': '1010110000',
-            'M<<': '1011100000',
-            'A>>': '1010000000',
-            'D>>': '1010010000',
-            'M>>': '1011000000'
-        }
-        return cmp[mnemonic]
+        return format(COMP_CODES[mnemonic], "010b")
 
     @staticmethod
     def jump(mnemonic: str) -> str:
@@ -93,14 +153,4 @@ class Code:
         Returns:
             str: 3-bit long binary code of the given mnemonic.
         """
-        jmp = {
-            'NULL': '000',
-            'JGT': '001',
-            'JEQ': '010',
-            'JGE': '011',
-            'JLT': '100',
-            'JNE': '101',
-            'JLE': '110',
-            'JMP': '111'
-        }
-        return jmp[mnemonic]
+        return format(JUMP_CODES[mnemonic], "03b")
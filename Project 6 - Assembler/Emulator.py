@@ -0,0 +1,218 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import typing
+from Main import assemble_words
+from Rom import Rom
+
+# The computations of the ALU, by the c1..c6 bits of a C-instruction, on
+# x = D and y = A or M. The results are masked to 16 bits by the caller.
+ALU_FUNCTIONS = {
+    0b101010: lambda x, y: 0,
+    0b111111: lambda x, y: 1,
+    0b111010: lambda x, y: -1,
+    0b001100: lambda x, y: x,
+    0b110000: lambda x, y: y,
+    0b001101: lambda x, y: ~x,
+    0b110001: lambda x, y: ~y,
+    0b001111: lambda x, y: -x,
+    0b110011: lambda x, y: -y,
+    0b011111: lambda x, y: x + 1,
+    0b110111: lambda x, y: y + 1,
+    0b001110: lambda x, y: x - 1,
+    0b110010: lambda x, y: y - 1,
+    0b000010: lambda x, y: x + y,
+    0b010011: lambda x, y: x - y,
+    0b000111: lambda x, y: y - x,
+    0b000000: lambda x, y: x & y,
+    0b010101: lambda x, y: x | y,
+}
+
+# The computations of the shifter of the extended ALU (see CpuMul.hdl), by
+# the c1 (left or right) and c2 (x or y) bits of a shift instruction.
+SHIFT_FUNCTIONS = {
+    0b00: lambda x, y: (y >> 1) | (y & 0x8000),
+    0b01: lambda x, y: (x >> 1) | (x & 0x8000),
+    0b10: lambda x, y: y << 1,
+    0b11: lambda x, y: x << 1,
+}
+
+# Whether a jump is taken, by the jump bits of a C-instruction and by the
+# sign of the ALU's output: positive, zero or negative.
+JUMPS = tuple(
+    (bool(jump & 1), bool(jump & 2), bool(jump & 4)) for jump in range(8))
+
+# The address of the keyboard register.
+KBD = 24576
+
+
+def _generic_alu(control: int) -> typing.Callable[[int, int], int]:
+    """
+    Args:
+        control (int): the c1..c6 (zx, nx, zy, ny, f, no) bits.
+
+    Returns:
+        typing.Callable[[int, int], int]: the computation of the ALU, as
+        specified in ALU.hdl, for control bits that have no mnemonic.
+    """
+    zx, nx, zy, ny, f, no = ((control >> bit) & 1 for bit in range(5, -1, -1))
+
+    def alu(x: int, y: int) -> int:
+        x = 0 if zx else x
+        x = ~x if nx else x
+        y = 0 if zy else y
+        y = ~y if ny else y
+        out = x + y if f else x & y
+        return ~out if no else out
+    return alu
+
+
+class Emulator:
+    """An instruction-level emulator of the Hack computer, with the extended
+    CPU of CpuMul.hdl. Every distinct word of the ROM is decoded once into a
+    tuple, and the main loop only dispatches on the decoded tuples.
+
+    A decoded A-instruction is (None, value), and a decoded C-instruction is
+    (computation, y is M, dest bits, jump table, halts), where the jump table
+    is indexed by the sign of the ALU's output, and halts is True for the
+    "@X, (X): 0;JMP" idiom that programs use to stop.
+    """
+
+    def __init__(self, rom: typing.Sequence[int] = ()) -> None:
+        """Creates a computer with zeroed registers and RAM.
+
+        Args:
+            rom (typing.Sequence[int]): the program to load.
+        """
+        self.ram = [0] * 32768
+        self.a = self.d = self.pc = 0
+        self.halted = False
+        self.decoded = []
+        self.load(rom)
+
+    @staticmethod
+    def decode(word: int) -> tuple:
+        """
+        Args:
+            word (int): an instruction.
+
+        Returns:
+            tuple: the decoded instruction, without the halts flag.
+        """
+        if not word & 0x8000:
+            return None, word
+        control = (word >> 6) & 0x3F
+        if word & 0x6000 == 0x6000:
+            computation = ALU_FUNCTIONS.get(control) or _generic_alu(control)
+        else:
+            computation = SHIFT_FUNCTIONS[control >> 4]
+        return computation, bool(word & 0x1000), (word >> 3) & 7, \
+            JUMPS[word & 7] if word & 7 else None
+
+    def load(self, rom: typing.Sequence[int]) -> None:
+        """Loads a program into the ROM, decoding each distinct word once.
+
+        Args:
+            rom (typing.Sequence[int]): the program to load.
+        """
+        cache = {}
+        decoded = []
+        for address, word in enumerate(rom):
+            instruction = cache.get(word)
+            if instruction is None:
+                instruction = Emulator.decode(word)
+                if instruction[0] is not None:
+                    instruction += (False,)
+                cache[word] = instruction
+            if word & 0x8000 and word & 7 == 7 and address > 0 \
+                    and rom[address - 1] == address - 1:
+                instruction = instruction[:-1] + (True,)
+            decoded.append(instruction)
+        self.decoded = decoded
+        self.reset()
+
+    @staticmethod
+    def read_rom(path: str) -> typing.Sequence[int]:
+        """
+        Args:
+            path (str): an .asm program, or an assembled program in any of
+                the formats of Rom.
+
+        Returns:
+            typing.Sequence[int]: the machine words of the program.
+        """
+        if os.path.splitext(path)[1].lower() == ".asm":
+            with open(path, 'r') as input_file:
+                return assemble_words(input_file)
+        return Rom.load(path)
+
+    @staticmethod
+    def from_file(path: str) -> "Emulator":
+        """
+        Args:
+            path (str): a program, see read_rom.
+
+        Returns:
+            Emulator: an emulator with the program loaded.
+        """
+        return Emulator(Emulator.read_rom(path))
+
+    def reset(self) -> None:
+        """Restarts the program, as the reset bit of the CPU does."""
+        self.pc = 0
+        self.halted = False
+
+    def run(self, max_steps: int) -> int:
+        """Runs the program until it halts, either by jumping out of the ROM
+        or by an infinite loop on a single jump, or until max_steps
+        instructions were executed.
+
+        Args:
+            max_steps (int): the maximal number of instructions to execute.
+
+        Returns:
+            int: the number of executed instructions.
+        """
+        decoded, ram = self.decoded, self.ram
+        a, d, pc = self.a, self.d, self.pc
+        steps = 0
+        try:
+            for steps in range(max_steps):
+                instruction = decoded[pc]
+                computation = instruction[0]
+                if computation is None:
+                    a = instruction[1]
+                    pc += 1
+                    continue
+                _, y_is_m, dest, jumps, halts = instruction
+                out = computation(d, ram[a & 0x7FFF] if y_is_m else a) & 0xFFFF
+                if dest:
+                    if dest & 1:
+                        ram[a & 0x7FFF] = out
+                    if dest & 2:
+                        d = out
+                    if dest & 4:
+                        target, a = a, out
+                    else:
+                        target = a
+                else:
+                    target = a
+                if jumps is not None and \
+                        jumps[2 if out & 0x8000 else (1 if out == 0 else 0)]:
+                    if halts and target == pc - 1:
+                        self.halted = True
+                        break
+                    pc = target
+                else:
+                    pc += 1
+            else:
+                steps = max_steps
+        except IndexError:
+            self.halted = True
+        self.a, self.d, self.pc = a, d, pc
+        return steps
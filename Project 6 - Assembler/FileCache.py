@@ -0,0 +1,152 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import hashlib
+import os
+import tempfile
+import typing
+
+
+class FileCache:
+    """An on-disk cache, with one file per entry. Entries are keyed by a
+    hash of their sources and of the version of the tool that computed
+    them, so a changed source or tool never hits a stale entry, and are
+    evicted least-recently-used first once the cache grows beyond its size
+    limit.
+
+    Subclasses choose the name of the default directory, the extension of
+    the entries and how values are encoded; this class stores bytes.
+    """
+
+    # The name of the default directory, see default_directory.
+    NAME = "hack-cache"
+    # The extension of the files of the entries.
+    EXTENSION = ".bin"
+
+    def __init__(self, directory: str, version: str,
+                 max_bytes: int = 64 * 2**20) -> None:
+        """Opens (and creates, if needed) a cache directory.
+
+        Args:
+            directory (str): the directory of the cache.
+            version (str): the version of the tool.
+            max_bytes (int): the maximal total size of the entries.
+        """
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def default_directory(cls) -> str:
+        """
+        Returns:
+            str: the default cache directory of the current user.
+        """
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache")
+        return os.path.join(base, cls.NAME)
+
+    @staticmethod
+    def encode(value) -> bytes:
+        """
+        Args:
+            value: the value of an entry.
+
+        Returns:
+            bytes: the contents of the entry's file.
+        """
+        return value
+
+    @staticmethod
+    def decode(data: bytes):
+        """
+        Args:
+            data (bytes): the contents of an entry's file.
+
+        Returns:
+            the value of the entry.
+
+        Raises:
+            ValueError: if the contents are not a valid value.
+        """
+        return data
+
+    def key(self, *sources: bytes) -> str:
+        """
+        Args:
+            *sources (bytes): everything the value of an entry depends on,
+                besides the version.
+
+        Returns:
+            str: the key of the entry.
+        """
+        digest = hashlib.sha256(self.version.encode() + b"\0")
+        digest.update(b"\0".join(sources))
+        return digest.hexdigest()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.EXTENSION)
+
+    def get(self, key: str) -> typing.Optional[typing.Any]:
+        """Looks up an entry, and marks it as recently used.
+
+        Args:
+            key (str): the key of the entry.
+
+        Returns:
+            typing.Optional[typing.Any]: the value of the entry, or None if
+            there is no such entry.
+        """
+        path = self.__path(key)
+        try:
+            with open(path, 'rb') as cache_file:
+                value = self.decode(cache_file.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, key: str, value) -> None:
+        """Adds an entry. The entry is written to a temporary file first, so
+        concurrent readers never see a partial entry.
+
+        Args:
+            key (str): the key of the entry.
+            value: the value of the entry.
+        """
+        handle, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(handle, 'wb') as cache_file:
+            cache_file.write(self.encode(value))
+        os.replace(temp_path, self.__path(key))
+
+    def evict(self) -> int:
+        """Removes least-recently-used entries until the cache is not larger
+        than its size limit.
+
+        Returns:
+            int: the number of removed entries.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -5,12 +5,23 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import io
 import os
 import sys
+import time
 import typing
+from concurrent.futures import ProcessPoolExecutor
+from array import array
 from SymbolTable import SymbolTable
 from Parser import Parser
 from Code import Code
+from Rom import Rom
+from AssemblyCache import AssemblyCache
+
+# The version of the assembler, part of the key of every cache entry. Must be
+# changed whenever the assembler's output for some input changes.
+ASSEMBLER_VERSION = "1.0"
 
 
 def assemble_file(
@@ -21,42 +32,240 @@ def assemble_file(
         input_file (typing.TextIO): the file to assemble.
         output_file (typing.TextIO): writes all output to this file.
     """
+    Rom.write_hack(assemble_words(input_file), output_file)
+
+
+def assemble_file_single_pass(
+        input_file: typing.TextIO, output_file: typing.TextIO) -> None:
+    """Assembles a single file in one pass over its commands, see
+    assemble_words_single_pass.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble.
+        output_file (typing.TextIO): writes all output to this file.
+    """
+    Rom.write_hack(assemble_words_single_pass(input_file), output_file)
+
+
+def assemble_words(input_file: typing.TextIO) -> array:
+    """Assembles a single file into machine words.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble.
+
+    Returns:
+        array: the machine words of the program.
+    """
     parser = Parser(input_file)
     symbol_table = SymbolTable()
     rom_count = 0
 
     # first pass
-    while parser.has_more_commands():
-        parser.advance()
-        if parser.command_type() == "L_COMMAND":
-            symbol_table.add_entry(parser.symbol(), rom_count)
+    for instruction in parser:
+        if instruction.type == "L_COMMAND":
+            symbol_table.add_entry(instruction.symbol, rom_count)
         else:
             rom_count += 1
 
     # second pass
-    symbol_count = 16
-    parser.reset()
-    while parser.has_more_commands():
-        parser.advance()
-        bin_str = ""
-        if parser.command_type() == "A_COMMAND":
-            curr_symbol = parser.symbol()
-            address = -1
+    words = array('L')
+    for instruction in parser:
+        if instruction.type == "A_COMMAND":
+            curr_symbol = instruction.symbol
             if not curr_symbol.isdigit():
-                if not (symbol_table.contains(curr_symbol)):   # check if the symbol was seen already and add him if not
-                    symbol_table.add_entry(curr_symbol, symbol_count)
-                    symbol_count += 1
-                address = symbol_table.get_address(curr_symbol)     # get the address of the symbol
+                address = symbol_table.address_of(curr_symbol)    # get the address of the symbol, add him if not seen
             else:
                 address = int(curr_symbol)
-            bin_str = str(bin(address)[2:].zfill(16))   # set the address to binary code
-            output_file.write(bin_str + "\n")
-        elif parser.command_type() == "C_COMMAND":
-            dst = parser.dest()
-            cmp = parser.comp()
-            jmp = parser.jump()
-            bin_str += Code.comp(cmp) + Code.dest(dst) + Code.jump(jmp)     # set the binary code of the C command
-            output_file.write(bin_str + "\n")
+            words.append(address)
+        elif instruction.type == "C_COMMAND":
+            words.append(Code.c_command(instruction.command))    # set the binary code of the C command
+    return words
+
+
+def assemble_words_single_pass(input_file: typing.TextIO) -> array:
+    """Assembles a single file into machine words, in one pass over its
+    commands.
+    The commands are parsed lazily, and every instruction is encoded into a
+    word buffer as soon as it is read, so the commands are never held in a
+    list. A-commands that refer to a symbol which is not yet known are
+    recorded in a fixup table, and are patched once all labels are known.
+    Symbols that are never defined as labels are variables, and are
+    allocated in order of their first use, exactly as in assemble_words.
+    This is not faster than assemble_words: parsing the lines dominates
+    both, and a second pass over the parsed commands is cheap. It only
+    saves the list of commands.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble.
+
+    Returns:
+        array: the machine words of the program.
+    """
+    symbol_table = SymbolTable()
+    words = array('L')
+    fixups = {}     # symbol -> indices of the words that refer to it
+
+    for instruction in Parser.stream(input_file):
+        command = instruction.type
+        if command == "L_COMMAND":
+            symbol_table.add_entry(instruction.symbol, len(words))
+        elif command == "A_COMMAND":
+            curr_symbol = instruction.symbol
+            address = int(curr_symbol) if curr_symbol.isdigit() \
+                else symbol_table.get_address(curr_symbol)
+            if address is None:
+                fixups.setdefault(curr_symbol, []).append(len(words))
+                address = 0
+            words.append(address)
+        else:
+            words.append(Code.c_command(instruction.command))
+
+    # backpatching: labels are all known now, the rest are variables
+    for curr_symbol, indices in fixups.items():
+        address = symbol_table.address_of(curr_symbol)
+        for index in indices:
+            words[index] = address
+    return words
+
+
+def assemble_stream(input_file: typing.TextIO, output_file: typing.BinaryIO,
+                    fmt: str = "hack", byteorder: str = "little") -> int:
+    """Assembles a single file without loading it into memory. The input is
+    read, decoded, encoded and written by a pipeline of generators, in chunks
+    of instructions. Only the symbol table and the references to symbols
+    that were not known when they were written are kept in memory; those are
+    patched in the output file once the whole input was read, which is
+    why every word of the program must fit into 16 bits in this mode.
+
+    Args:
+        input_file (typing.TextIO): the file to assemble.
+        output_file (typing.BinaryIO): a seekable file, writes all output to
+            this file.
+        fmt (str): the output format, "hack", "bin" or "rom".
+        byteorder (str): byte order of the binary output formats.
+
+    Returns:
+        int: the number of instructions in the assembled program.
+    """
+    if fmt == "hack":
+        width, start = 17, 0
+
+        def write(chunk: typing.Sequence[int]) -> None:
+            output_file.write(("{:016b}\n" * len(chunk)).format(
+                *Rom.to_array(chunk)).encode())
+    elif fmt in ("bin", "rom"):
+        width, start = 2, Rom.HEADER.size if fmt == "rom" else 0
+        output_file.write(bytes(start))    # the header is written last
+
+        def write(chunk: typing.Sequence[int]) -> None:
+            Rom.write_bin(chunk, output_file, byteorder)
+    else:
+        raise ValueError("unknown output format: " + fmt)
+
+    symbol_table = SymbolTable()
+    fixups = {}     # symbol -> indices of the words that refer to it
+    rom_count = 0
+    chunk = array('L')
+    for instruction in Parser.stream(input_file):
+        command = instruction.type
+        if command == "L_COMMAND":
+            symbol_table.add_entry(instruction.symbol, rom_count)
+            continue
+        if command == "A_COMMAND":
+            curr_symbol = instruction.symbol
+            address = int(curr_symbol) if curr_symbol.isdigit() \
+                else symbol_table.get_address(curr_symbol)
+            if address is None:
+                indices = fixups.get(curr_symbol)
+                if indices is None:
+                    indices = fixups[curr_symbol] = array('L')
+                indices.append(rom_count)
+                address = 0
+            chunk.append(address)
+        else:
+            chunk.append(Code.c_command(instruction.command))
+        rom_count += 1
+        if len(chunk) == 4096:
+            write(chunk)
+            chunk = array('L')
+    write(chunk)
+
+    # backpatching: labels are all known now, the rest are variables
+    for curr_symbol, indices in fixups.items():
+        address = (symbol_table.address_of(curr_symbol),)
+        for index in indices:
+            output_file.seek(start + index * width)
+            write(address)
+    if fmt == "rom":
+        output_file.seek(0)
+        output_file.write(Rom.HEADER.pack(
+            Rom.MAGIC, Rom.VERSION, b"<" if byteorder == "little" else b">",
+            0, rom_count))
+    output_file.seek(0, os.SEEK_END)
+    return rom_count
+
+
+def assemble_path(input_path: str, single_pass: bool = False,
+                  formats: typing.Sequence[str] = ("hack",),
+                  byteorder: str = "little",
+                  cache: typing.Optional[AssemblyCache] = None,
+                  stream: bool = False) -> int:
+    """Assembles a single .asm file into output files next to it, one per
+    output format.
+
+    Args:
+        input_path (str): the path of the file to assemble.
+        single_pass (bool): use the single-pass assembler.
+        formats (typing.Sequence[str]): the output formats to write.
+        byteorder (str): byte order of the binary output formats.
+        cache (typing.Optional[AssemblyCache]): if given, files whose source
+            is in the cache are not assembled again.
+        stream (bool): assemble with assemble_stream, once per output format.
+            The cache is not used in this mode.
+
+    Returns:
+        int: the number of instructions in the assembled program.
+    """
+    filename, extension = os.path.splitext(input_path)
+    if stream:
+        count = 0
+        for fmt in formats:
+            with open(input_path, 'r') as input_file, \
+                    open(filename + Rom.EXTENSIONS[fmt], 'wb') as output_file:
+                count = assemble_stream(input_file, output_file, fmt, byteorder)
+        return count
+    assemble = assemble_words_single_pass if single_pass else assemble_words
+    if cache is None:
+        with open(input_path, 'r') as input_file:
+            words = assemble(input_file)
+    else:
+        with open(input_path, 'rb') as input_file:
+            source = input_file.read()
+        key = cache.key(source)
+        words = cache.get(key)
+        if words is None:
+            words = assemble(io.StringIO(source.decode()))
+            cache.put(key, words)
+    for fmt in formats:
+        Rom.write(words, filename + Rom.EXTENSIONS[fmt], fmt, byteorder)
+    return len(words)
+
+
+def _assemble_job(job: typing.Tuple) -> typing.Tuple[int, str]:
+    """Runs assemble_path in a worker process, and returns the error instead
+    of raising it, so a single bad file does not stop the others.
+
+    Args:
+        job (typing.Tuple): the arguments of assemble_path.
+
+    Returns:
+        typing.Tuple[int, str]: the number of instructions, and the error
+        message or an empty string if the file was assembled.
+    """
+    try:
+        return assemble_path(*job), ""
+    except Exception as error:
+        return 0, "{}: {}".format(type(error).__name__, error)
 
 
 if "__main__" == __name__:
@@ -65,20 +274,75 @@ if "__main__" == __name__:
     # Both are closed automatically when the code finishes running.
     # If the output file does not exist, it is created automatically in the
     # correct path, using the correct filename.
-    if not len(sys.argv) == 2:
-        sys.exit("Invalid usage, please use: Assembler <input path>")
-    argument_path = os.path.abspath(sys.argv[1])
+    arg_parser = argparse.ArgumentParser(
+        prog="Assembler", usage="Assembler <input path> [options]")
+    arg_parser.add_argument("input_path")
+    arg_parser.add_argument(
+        "--single-pass", action="store_true",
+        help="assemble each file in one pass, backpatching forward labels")
+    arg_parser.add_argument(
+        "--stream", action="store_true",
+        help="assemble each file without loading it into memory")
+    arg_parser.add_argument(
+        "--format", action="append", choices=sorted(Rom.EXTENSIONS),
+        help="output format, may be given several times (default: hack)")
+    arg_parser.add_argument(
+        "--byteorder", choices=["little", "big"], default="little",
+        help="byte order of the bin and rom formats (default: little)")
+    arg_parser.add_argument(
+        "--jobs", type=int, default=1, metavar="N",
+        help="assemble the files in N worker processes (default: 1)")
+    arg_parser.add_argument(
+        "--report", action="store_true",
+        help="print the throughput of the assembler when done")
+    arg_parser.add_argument(
+        "--no-cache", action="store_true",
+        help="assemble every file, even if it did not change")
+    arg_parser.add_argument(
+        "--cache-dir", default=AssemblyCache.default_directory(),
+        help="the directory of the assembly cache")
+    arg_parser.add_argument(
+        "--cache-size", type=int, default=64, metavar="MB",
+        help="the maximal size of the assembly cache (default: 64)")
+    args = arg_parser.parse_args()
+    formats = args.format or ["hack"]
+    cache = None
+    if not args.no_cache:
+        cache = AssemblyCache(args.cache_dir, ASSEMBLER_VERSION,
+                              args.cache_size * 2**20)
+    argument_path = os.path.abspath(args.input_path)
     if os.path.isdir(argument_path):
         files_to_assemble = [
             os.path.join(argument_path, filename)
-            for filename in os.listdir(argument_path)]
+            for filename in sorted(os.listdir(argument_path))]
     else:
         files_to_assemble = [argument_path]
-    for input_path in files_to_assemble:
-        filename, extension = os.path.splitext(input_path)
-        if extension.lower() != ".asm":
-            continue
-        output_path = filename + ".hack"
-        with open(input_path, 'r') as input_file, \
-                open(output_path, 'w') as output_file:
-            assemble_file(input_file, output_file)
+    jobs = [(input_path, args.single_pass, formats, args.byteorder, cache,
+             args.stream)
+            for input_path in files_to_assemble
+            if os.path.splitext(input_path)[1].lower() == ".asm"]
+    start = time.perf_counter()
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(
+                _assemble_job, jobs,
+                chunksize=max(1, len(jobs) // (4 * args.jobs))))
+    else:
+        results = [_assemble_job(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        cache.evict()
+    failed = 0
+    for job, (_, error) in zip(jobs, results):
+        if error:
+            failed += 1
+            print(job[0] + ": " + error, file=sys.stderr)
+    if args.report:
+        instructions = sum(count for count, _ in results)
+        elapsed = max(elapsed, 1e-9)
+        print("assembled {} files ({} failed), {} instructions in {:.3f}s: "
+              "{:.1f} files/sec, {:.0f} instructions/sec".format(
+                  len(jobs), failed, instructions, elapsed,
+                  len(jobs) / elapsed, instructions / elapsed))
+    if failed:
+        sys.exit(1)
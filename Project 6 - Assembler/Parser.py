@@ -8,6 +8,38 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 import typing
 
 
+class Instruction:
+    """A single decoded assembly command. Each line of the input is decoded
+    into an Instruction exactly once, so the fields can be read any number of
+    times without scanning the command's text again.
+    """
+    __slots__ = ("command", "type", "symbol", "dest", "comp", "jump")
+
+    def __init__(self, command: str) -> None:
+        """Decodes a single cleaned command (no white space or comments).
+
+        Args:
+            command (str): the command to decode.
+        """
+        self.command = command
+        self.symbol = self.dest = self.comp = self.jump = ""
+        if command[0] == '@':
+            self.type = "A_COMMAND"
+            self.symbol = command[1:]
+        elif command[0] == '(':
+            self.type = "L_COMMAND"
+            self.symbol = command[1:-1]
+        else:
+            self.type = "C_COMMAND"
+            dest, eq, rest = command.partition('=')
+            if not eq:
+                dest, rest = "NULL", dest
+            comp, semicolon, jump = rest.partition(';')
+            self.dest = dest
+            self.comp = comp
+            self.jump = jump if semicolon else "NULL"
+
+
 class Parser:
     """Encapsulates access to the input code. Reads an assembly program
     by reading each command line-by-line, parses the current command,
@@ -21,19 +53,37 @@ class Parser:
         Args:
             input_file (typing.TextIO): input file.
         """
-        file = input_file.read().splitlines()
-        temp = []
-        for line in file:
-            line = line.replace(" ", "")
+        self.instructions = list(Parser.stream(input_file))
+        self.curr_command = None
+        self.counter = 0
+
+    @staticmethod
+    def stream(input_file: typing.TextIO) -> typing.Iterator[Instruction]:
+        """Lazily reads the input file line-by-line, and decodes its commands.
+        Only the current line is kept in memory, so this can parse inputs of
+        any size.
+
+        Args:
+            input_file (typing.TextIO): input file.
+
+        Returns:
+            typing.Iterator[Instruction]: an iterator over the commands.
+        """
+        decoded = {}    # identical commands share a single Instruction
+        for line in input_file:
+            line = line.rstrip("\r\n").replace(" ", "")
             if (line == "") or (line[0] == '/'):
                 continue
             end_line = len(line)
             if '/' in line:
                 end_line = line.index('/')
-            temp.append(line[:end_line])
-        self.commands = temp
-        self.curr_command = ""
-        self.counter = 0
+            line = line[:end_line]
+            instruction = decoded.get(line)
+            if instruction is None:
+                if len(decoded) >= 4096:
+                    decoded.clear()
+                instruction = decoded[line] = Instruction(line)
+            yield instruction
 
     def has_more_commands(self) -> bool:
         """Are there more commands in the input?
@@ -41,13 +91,13 @@ class Parser:
         Returns:
             bool: True if there are more commands, False otherwise.
         """
-        return self.counter < len(self.commands)
+        return self.counter < len(self.instructions)
 
     def advance(self) -> None:
         """Reads the next command from the input and makes it the current command.
         Should be called only if has_more_commands() is true.
         """
-        self.curr_command = self.commands[self.counter]
+        self.curr_command = self.instructions[self.counter]
         self.counter += 1
 
     def command_type(self) -> str:
@@ -58,11 +108,7 @@ class Parser:
             "C_COMMAND" for dest=comp;jump
             "L_COMMAND" (actually, pseudo-command) for (Xxx) where Xxx is a symbol
         """
-        if self.curr_command[0] == '@':
-            return "A_COMMAND"
-        if self.curr_command[0] == '(':
-            return "L_COMMAND"
-        return "C_COMMAND"
+        return self.curr_command.type
 
     def symbol(self) -> str:
         """
@@ -71,9 +117,7 @@ class Parser:
             (Xxx). Should be called only when command_type() is "A_COMMAND" or 
             "L_COMMAND".
         """
-        if self.curr_command[0] == "@":
-            return self.curr_command[1:]
-        return self.curr_command[1:-1]
+        return self.curr_command.symbol
 
     def dest(self) -> str:
         """
@@ -81,10 +125,7 @@ class Parser:
             str: the dest mnemonic in the current C-command. Should be called 
             only when commandType() is "C_COMMAND".
         """
-        ind = self.curr_command.find('=')
-        if ind == -1:
-            return "NULL"
-        return self.curr_command[:ind]
+        return self.curr_command.dest
 
     def comp(self) -> str:
         """
@@ -92,10 +133,7 @@ class Parser:
             str: the comp mnemonic in the current C-command. Should be called 
             only when commandType() is "C_COMMAND".
         """
-        left = self.curr_command.find('=') + 1
-        if ';' in self.curr_command:
-            return self.curr_command[left:self.curr_command.index(';')]
-        return self.curr_command[left:]
+        return self.curr_command.comp
 
     def jump(self) -> str:
         """
@@ -103,10 +141,17 @@ class Parser:
             str: the jump mnemonic in the current C-command. Should be called 
             only when commandType() is "C_COMMAND".
         """
-        if ';' in self.curr_command:
-            return self.curr_command[self.curr_command.index(';')+1:]
-        return "NULL"
+        return self.curr_command.jump
 
     def reset(self) -> None:
         self.counter = 0
-        self.curr_command = ""
\ No newline at end of file
+        self.curr_command = None
+
+    def __iter__(self) -> typing.Iterator[Instruction]:
+        """Iterates over all the decoded commands of the input, regardless of
+        the current command.
+
+        Returns:
+            typing.Iterator[Instruction]: an iterator over the commands.
+        """
+        return iter(self.instructions)
@@ -0,0 +1,153 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import mmap
+import struct
+import sys
+import typing
+from array import array
+
+
+class Rom:
+    """Writes and loads assembled programs (ROM images) in several formats:
+    - "hack": the textual format of the course, one line of 16 binary digits
+      per instruction.
+    - "bin": a raw image of 16-bit words in a given byte order.
+    - "rom": a "bin" image preceded by a 16-byte header that records the byte
+      order and the number of words, so that loaders can validate the image
+      and map it into memory without copying it.
+    """
+
+    # Output formats and the extensions of their files.
+    EXTENSIONS = {"hack": ".hack", "bin": ".bin", "rom": ".rom"}
+
+    # The header of "rom" images: magic, version, byte order ('<' or '>'),
+    # two reserved bytes, number of words and padding to 16 bytes.
+    HEADER = struct.Struct("<4sBcHI4x")
+    MAGIC = b"HROM"
+    VERSION = 1
+
+    @staticmethod
+    def to_array(words: typing.Sequence[int]) -> array:
+        """
+        Args:
+            words (typing.Sequence[int]): machine words.
+
+        Returns:
+            array: the words as an array of unsigned 16-bit integers.
+        """
+        try:
+            return array('H', words)
+        except OverflowError:
+            raise ValueError("program does not fit into 16-bit words "
+                             "(is it larger than the Hack ROM?)") from None
+
+    @staticmethod
+    def write_hack(words: typing.Sequence[int],
+                   output_file: typing.TextIO) -> None:
+        """Writes machine words as lines of 16 binary digits, in a single
+        write.
+
+        Args:
+            words (typing.Sequence[int]): the machine words to write.
+            output_file (typing.TextIO): writes all output to this file.
+        """
+        output_file.write(("{:016b}\n" * len(words)).format(*words))
+
+    @staticmethod
+    def write_bin(words: typing.Sequence[int], output_file: typing.BinaryIO,
+                  byteorder: str = "little") -> None:
+        """Writes machine words as a raw image of 16-bit words, in a single
+        write.
+
+        Args:
+            words (typing.Sequence[int]): the machine words to write.
+            output_file (typing.BinaryIO): writes all output to this file.
+            byteorder (str): "little" or "big".
+        """
+        image = Rom.to_array(words)
+        if byteorder != sys.byteorder:
+            image.byteswap()
+        output_file.write(image.tobytes())
+
+    @staticmethod
+    def write_rom(words: typing.Sequence[int], output_file: typing.BinaryIO,
+                  byteorder: str = "little") -> None:
+        """Writes machine words as a raw image preceded by a header.
+
+        Args:
+            words (typing.Sequence[int]): the machine words to write.
+            output_file (typing.BinaryIO): writes all output to this file.
+            byteorder (str): "little" or "big".
+        """
+        order = b"<" if byteorder == "little" else b">"
+        output_file.write(Rom.HEADER.pack(
+            Rom.MAGIC, Rom.VERSION, order, 0, len(words)))
+        Rom.write_bin(words, output_file, byteorder)
+
+    @staticmethod
+    def write(words: typing.Sequence[int], output_path: str, fmt: str,
+              byteorder: str = "little") -> None:
+        """Writes machine words to a file in the given format.
+
+        Args:
+            words (typing.Sequence[int]): the machine words to write.
+            output_path (str): the path of the output file.
+            fmt (str): "hack", "bin" or "rom".
+            byteorder (str): "little" or "big", ignored for "hack".
+        """
+        if fmt == "hack":
+            with open(output_path, 'w') as output_file:
+                Rom.write_hack(words, output_file)
+        elif fmt == "bin":
+            with open(output_path, 'wb') as output_file:
+                Rom.write_bin(words, output_file, byteorder)
+        elif fmt == "rom":
+            with open(output_path, 'wb') as output_file:
+                Rom.write_rom(words, output_file, byteorder)
+        else:
+            raise ValueError("unknown output format: " + fmt)
+
+    @staticmethod
+    def load(path: str, byteorder: str = "little") -> typing.Sequence[int]:
+        """Loads a ROM image in any of the supported formats, according to
+        the extension of its file. "rom" images in the native byte order are
+        mapped into memory and returned without copying them.
+
+        Args:
+            path (str): the path of the image.
+            byteorder (str): the byte order of "bin" images, "little" or
+                "big". "rom" images record their own byte order.
+
+        Returns:
+            typing.Sequence[int]: the machine words of the image.
+        """
+        if path.endswith(Rom.EXTENSIONS["hack"]):
+            with open(path, 'r') as input_file:
+                return array('H', [int(line, 2) for line in
+                                   input_file.read().split()])
+        if path.endswith(Rom.EXTENSIONS["bin"]):
+            image = array('H')
+            with open(path, 'rb') as input_file:
+                image.frombytes(input_file.read())
+            if byteorder != sys.byteorder:
+                image.byteswap()
+            return image
+        with open(path, 'rb') as input_file:
+            header = input_file.read(Rom.HEADER.size)
+            magic, version, order, _, count = Rom.HEADER.unpack(header)
+            if magic != Rom.MAGIC or version != Rom.VERSION:
+                raise ValueError(path + " is not a Hack ROM image")
+            native = b"<" if sys.byteorder == "little" else b">"
+            if order != native or count == 0:
+                image = array('H')
+                image.frombytes(input_file.read(2 * count))
+                if order != native:
+                    image.byteswap()
+                return image
+            mapped = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped)[Rom.HEADER.size:][:2 * count].cast('H')
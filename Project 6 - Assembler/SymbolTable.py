@@ -5,6 +5,27 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import sys
+import typing
+
+
+def _predefined_symbols() -> typing.Dict[str, int]:
+    """
+    Returns:
+        typing.Dict[str, int]: all the predefined symbols and their
+        pre-allocated RAM addresses, according to section 6.2.3 of the book.
+    """
+    temp = {}
+    for i in range(16):
+        temp["R" + str(i)] = i
+    temp["SP"] = 0
+    temp["LCL"] = 1
+    temp["ARG"] = 2
+    temp["THIS"] = 3
+    temp["THAT"] = 4
+    temp["SCREEN"] = 16384
+    temp["KBD"] = 24576
+    return {sys.intern(symbol): address for symbol, address in temp.items()}
 
 
 class SymbolTable:
@@ -13,22 +34,20 @@ class SymbolTable:
     numeric addresses.
     """
 
+    # Built once per process, and shared by the tables of all files.
+    PREDEFINED = _predefined_symbols()
+
+    # The RAM address of the first variable.
+    VARIABLES_BASE = 16
+
     def __init__(self) -> None:
         """Creates a new symbol table initialized with all the predefined symbols
         and their pre-allocated RAM addresses, according to section 6.2.3 of the
         book.
         """
-        temp = {}
-        for i in range(16):
-            temp["R" + str(i)] = i
-        temp["SP"] = 0
-        temp["LCL"] = 1
-        temp["ARG"] = 2
-        temp["THIS"] = 3
-        temp["THAT"] = 4
-        temp["SCREEN"] = 16384
-        temp["KBD"] = 24576
-        self.symbol_table = temp
+        self.symbol_table = SymbolTable.PREDEFINED.copy()
+        self.next_variable = SymbolTable.VARIABLES_BASE
+        self.entries = 0
 
     def add_entry(self, symbol: str, address: int) -> None:
         """Adds the pair (symbol, address) to the table.
@@ -37,7 +56,8 @@ class SymbolTable:
             symbol (str): the symbol to add.
             address (int): the address corresponding to the symbol.
         """
-        self.symbol_table[symbol] = address
+        self.symbol_table[sys.intern(symbol)] = address
+        self.entries += 1
 
     def contains(self, symbol: str) -> bool:
         """Does the symbol table contain the given symbol?
@@ -57,6 +77,39 @@ class SymbolTable:
             symbol (str): a symbol.
 
         Returns:
-            int: the address associated with the symbol.
+            int: the address associated with the symbol, or None if the
+            symbol is not in the table.
         """
         return self.symbol_table.get(symbol)
+
+    def address_of(self, symbol: str) -> int:
+        """Returns the address associated with the symbol. If the symbol is
+        not in the table, it is a new variable: it is allocated the next free
+        RAM address and added to the table, in a single lookup.
+
+        Args:
+            symbol (str): a symbol.
+
+        Returns:
+            int: the address associated with the symbol.
+        """
+        address = self.symbol_table.get(symbol)
+        if address is None:
+            address = self.next_variable
+            self.symbol_table[sys.intern(symbol)] = address
+            self.next_variable += 1
+        return address
+
+    def stats(self) -> typing.Dict[str, int]:
+        """
+        Returns:
+            typing.Dict[str, int]: statistics of the table: the number of
+            predefined symbols, of entries added by add_entry (labels), of
+            allocated variables, and the total number of symbols.
+        """
+        return {
+            "predefined": len(SymbolTable.PREDEFINED),
+            "labels": self.entries,
+            "variables": self.next_variable - SymbolTable.VARIABLES_BASE,
+            "symbols": len(self.symbol_table),
+        }
@@ -0,0 +1,44 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import importlib.util
+import os
+import sys
+import types
+
+# The directory of the assembler of Project 6.
+ASSEMBLER_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir,
+    "Project 6 - Assembler")
+
+
+def assembler_module(name: str) -> types.ModuleType:
+    """Imports a module of the assembler of Project 6 by its path. The
+    assembler's directory is not added to sys.path, as its Parser and Main
+    modules have the same names as the translator's, so only modules that
+    import nothing else of the assembler may be imported this way. Every
+    module is imported once, as "assembler.<name>".
+
+    Args:
+        name (str): the name of the module, e.g. "Code".
+
+    Returns:
+        types.ModuleType: the module.
+    """
+    qualified = "assembler." + name
+    module = sys.modules.get(qualified)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            qualified, os.path.join(ASSEMBLER_DIRECTORY, name + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[qualified] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[qualified]
+            raise
+    return module
@@ -0,0 +1,526 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+from Main import translate_file, translate_paths, TRANSLATOR_VERSION
+from Parser import Parser
+from VMOptimizer import VMOptimizer
+from TranslationCache import TranslationCache
+from HackEncoder import HackEncoder
+
+
+def generate_function(name: str, index: int) -> str:
+    """Generates a VM function that looks like the output of the Jack
+    compiler: locals, arguments, fields, statics, branches, comparisons and
+    calls. The function is about 60 commands long.
+
+    Args:
+        name (str): the name of the file (class) of the function.
+        index (int): the index of the function in its file.
+
+    Returns:
+        str: the VM code of the function.
+    """
+    function = name + ".f" + str(index)
+    callee = name + ".f" + str(max(index - 1, 0))
+    return (
+        "function " + function + " 2\n"
+        "push argument 0\npop pointer 0\n"
+        "push constant " + str(index % 32768) + "\npop local 0\n"
+        "label LOOP\n"
+        "push local 0\npush constant 0\neq\nif-goto END\n"
+        "push this 0\npush that 1\nadd\npush static " + str(index % 16) + "\n"
+        "sub\nneg\npop this 0\n"
+        "push local 0\npush constant 1\nsub\npop local 0\n"
+        "push local 1\npush argument 1\ngt\nnot\npush local 1\npush temp 2\n"
+        "lt\nand\npop local 1\n"
+        "push local 0\npush constant 7\nor\nshiftleft\nshiftright\npop temp 3\n"
+        "push pointer 0\npush local 1\ncall " + callee + " 2\npop temp 0\n"
+        "goto LOOP\n"
+        "label END\n"
+        "push this 0\nreturn\n")
+
+
+def generate_program(functions: int, name: str = "Bench") -> str:
+    """Generates a synthetic VM file.
+
+    Args:
+        functions (int): the number of functions to generate.
+        name (str): the name of the file (class) of the functions.
+
+    Returns:
+        str: the VM program.
+    """
+    return "".join(generate_function(name, index)
+                   for index in range(functions))
+
+
+def generate_runnable(functions: int, iterations: int) -> str:
+    """Generates a synthetic program that halts: Sys.init calls every
+    function of Main in a loop, and each function compares and adds its two
+    arguments. The loop counter is decremented by a constant function, as
+    Jack programs do with class constants.
+
+    Args:
+        functions (int): the number of functions to generate.
+        iterations (int): the number of iterations of the loop.
+
+    Returns:
+        str: the VM program, a single file named Sys.vm.
+    """
+    return "".join(
+        "function Main.f" + str(index) + " 0\n"
+        "push argument 0\npush argument 1\ngt\nif-goto SKIP\n"
+        "push argument 0\npush argument 1\nlt\npop temp 1\n"
+        "label SKIP\n"
+        "push argument 0\npush argument 1\neq\nnot\n"
+        "push argument 1\nadd\nreturn\n"
+        for index in range(functions)) + (
+        "function Main.one 0\npush constant 1\nreturn\n"
+        "function Sys.init 1\n"
+        "push constant " + str(iterations) + "\npop local 0\n"
+        "label LOOP\n"
+        "push local 0\nif-goto BODY\n"
+        "label HALT\ngoto HALT\n"
+        "label BODY\n") + "".join(
+        "push local 0\npush constant " + str(index) + "\n"
+        "call Main.f" + str(index) + " 2\npop temp 0\n"
+        for index in range(functions)) + (
+        "push local 0\ncall Main.one 0\nsub\npop local 0\n"
+        "goto LOOP\n")
+
+
+def generate_random(seed: int, functions: int) -> str:
+    """Generates a random program that halts, to compare the translations
+    of its modes. Every function computes random expressions of its
+    arguments, locals, statics, temp, this and that into its locals and the
+    other segments, in straight code, in a bounded loop and behind forward
+    branches. A function calls only the functions before it, at most twice,
+    so there is no recursion.
+
+    Args:
+        seed (int): the seed of the program.
+        functions (int): the number of functions of Main.
+
+    Returns:
+        str: the VM program, a single file named Sys.vm.
+    """
+    rng = random.Random(seed)
+    labels = iter(range(10**9))
+    sources = ("constant", "argument", "local", "static", "temp", "this",
+               "that")
+    targets = ("local", "static", "temp", "this", "that")
+
+    def segment(name: str) -> str:
+        index = {"constant": rng.choice((0, 1, 2, 7, 255, 4096, 32767)),
+                 "argument": rng.randrange(2), "local": rng.randrange(2),
+                 "static": rng.randrange(8), "temp": rng.randrange(8)}
+        return name + " " + str(index.get(name, rng.randrange(8)))
+
+    def expression(depth: int, calls: typing.List[int]) -> str:
+        choice = rng.randrange(6) if depth else 0
+        if choice == 0:
+            return "push " + segment(rng.choice(sources)) + "\n"
+        if choice == 1:
+            return expression(depth - 1, calls) + rng.choice(
+                ("neg", "not", "shiftleft", "shiftright")) + "\n"
+        if choice == 2 and calls:
+            return expression(depth - 1, []) + \
+                expression(depth - 1, []) + \
+                "call Main.f" + str(calls.pop()) + " 2\n"
+        return expression(depth - 1, calls) + \
+            expression(depth - 1, calls) + rng.choice(
+                ("add", "sub", "and", "or", "eq", "gt", "lt")) + "\n"
+
+    def statements(count: int, calls: typing.List[int]) -> str:
+        code = []
+        for _ in range(count):
+            if rng.randrange(4) == 0:
+                label = "SKIP" + str(next(labels))
+                code.append(expression(2, calls) + "if-goto " + label + "\n" +
+                            statements(2, calls) + "label " + label + "\n")
+            else:
+                code.append(expression(3, calls) + "pop " +
+                            segment(rng.choice(targets)) + "\n")
+        return "".join(code)
+
+    program = []
+    for index in range(functions):
+        calls = [rng.randrange(index) for _ in range(min(index, 2))]
+        loop = str(next(labels))
+        program.append(
+            "function Main.f" + str(index) + " 3\n" +
+            statements(3, calls) +
+            "push constant " + str(rng.randrange(1, 4)) + "\npop local 2\n"
+            "label LOOP" + loop + "\n"
+            "push local 2\npush constant 0\neq\nif-goto END" + loop + "\n" +
+            statements(3, []) +
+            "push local 2\npush constant 1\nsub\npop local 2\n"
+            "goto LOOP" + loop + "\n"
+            "label END" + loop + "\n" +
+            statements(2, calls) +
+            expression(3, calls) + "return\n")
+    # Sys.init has no arguments: its argument segment is its return address
+    program.append(
+        "function Sys.init 0\n"
+        "push constant 2048\npop pointer 0\n"
+        "push constant 2056\npop pointer 1\n" + "".join(
+            "push constant {}\npush constant {}\ncall Main.f{} 2\n"
+            "pop static {}\n".format(rng.randrange(32768),
+                                     rng.randrange(32768), callee, index)
+            for index, callee in enumerate((functions - 1,
+                                            rng.randrange(functions)))) +
+        "label HALT\ngoto HALT\n")
+    return "".join(program)
+
+
+# Runs a program in the emulator of Project 6, and prints the size of its ROM
+# and the number of instructions it executed, or -1 if it does not fit in the
+# 32K of the ROM.
+_EMULATE = """
+import sys
+from Emulator import Emulator
+emulator = Emulator.from_file(sys.argv[1])
+steps = -1
+if len(emulator.decoded) <= 32768:
+    steps = emulator.run(10**9)
+    assert emulator.halted
+print(len(emulator.decoded), steps)
+"""
+
+
+# Runs programs in the emulator of Project 6, and prints the words of the RAM
+# that every correct translation of a program computes identically, one
+# program per line: the pointers, temp, the stack below SP except for the
+# return address of Sys.init, which depends on the layout of the ROM, this
+# and that, and the static variables by name. Other variables are allocated
+# before some statics in some modes, so statics are found by the symbol
+# table of the assembler. R13-R15 are scratch registers.
+_EMULATE_RAM = """
+import re
+import sys
+from Emulator import Emulator
+from Parser import Parser
+from SymbolTable import SymbolTable
+for path in sys.argv[1:]:
+    emulator = Emulator.from_file(path)
+    emulator.run(10**8)
+    assert emulator.halted, path + " did not halt"
+    with open(path, 'r') as input_file:
+        instructions = list(Parser.stream(input_file))
+    symbol_table = SymbolTable()
+    for instruction in instructions:
+        if instruction.type == "L_COMMAND":
+            symbol_table.add_entry(instruction.symbol, 0)
+    for instruction in instructions:
+        if instruction.type == "A_COMMAND" and \\
+                not instruction.symbol.isdigit():
+            symbol_table.address_of(instruction.symbol)
+    statics = sorted({instruction.symbol for instruction in instructions
+                      if re.fullmatch(r"Sys\\.\\d+", instruction.symbol)})
+    ram = emulator.ram
+    print(*(ram[:13] + ram[257:ram[0]] + ram[2048:2064]), "statics", *(
+        name + "=" + str(ram[symbol_table.address_of(name)])
+        for name in statics))
+"""
+
+
+# Assembles a program with the assembler of Project 6, and prints the time it
+# took.
+_ASSEMBLE = """
+import sys
+import time
+from Main import assemble_file
+start = time.perf_counter()
+with open(sys.argv[1], 'r') as input_file, open(sys.argv[2], 'w') as output_file:
+    assemble_file(input_file, output_file)
+print(time.perf_counter() - start)
+"""
+
+
+def emulate(source: str, **options) -> typing.Tuple[int, int]:
+    """Translates a program and runs it in the emulator of Project 6.
+
+    Args:
+        source (str): a VM program, see generate_runnable.
+        **options: options of translate_file.
+
+    Returns:
+        typing.Tuple[int, int]: the size of the ROM, and the number of
+        instructions executed or -1 if the ROM is too large.
+    """
+    assembler = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, "Project 6 - Assembler")
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "Sys.asm")
+        input_file = io.StringIO(source)
+        input_file.name = "Sys.vm"
+        with open(output_path, 'w') as output_file:
+            translate_file(input_file, output_file, True, **options)
+        output = subprocess.run(
+            [sys.executable, "-c", _EMULATE, output_path], cwd=assembler,
+            check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    rom, steps = map(int, output.stdout.split())
+    return rom, steps
+
+
+def compare_modes(args: argparse.Namespace,
+                  modes: typing.Dict[str, dict]) -> None:
+    """Prints the ROM size and the executed instructions of a synthetic
+    program in several modes of the translator, relative to the first mode.
+
+    Args:
+        args (argparse.Namespace): the sizes of the program.
+        modes (typing.Dict[str, dict]): the options of translate_file, by
+            the name of the mode.
+    """
+    source = generate_runnable(args.functions, args.iterations)
+    baseline = None
+    for name, options in modes.items():
+        rom, steps = emulate(source, **options)
+        line = "{:9}: {:6} words of ROM".format(name, rom)
+        if steps < 0:
+            line += ", too large for the ROM"
+        else:
+            line += ", {:9} instructions executed".format(steps)
+            if baseline is None:
+                baseline = rom, steps
+            else:
+                line += " (ROM x{:.2f}, instructions x{:.2f})".format(
+                    rom / baseline[0], steps / baseline[1])
+        print(line)
+
+
+def bench_shared(args: argparse.Namespace) -> None:
+    """Compares the inline and the shared modes of CodeWriter."""
+    compare_modes(args, {"inline": {}, "shared": {"shared": True}})
+
+
+def bench_peephole(args: argparse.Namespace) -> None:
+    """Compares the translation with and without the peephole optimizer."""
+    compare_modes(args, {
+        "inline": {},
+        "peephole": {"peephole": True},
+        "shared": {"shared": True},
+        "shared+pp": {"shared": True, "peephole": True},
+    })
+
+
+def bench_register(args: argparse.Namespace) -> None:
+    """Compares the translation with and without the top of the stack held
+    in D.
+    """
+    compare_modes(args, {
+        "inline": {},
+        "register": {"register": True},
+        "reg+pp": {"register": True, "peephole": True},
+    })
+
+
+def bench_optimize(args: argparse.Namespace) -> None:
+    """Compares the optimization levels of VMOptimizer."""
+    functions = VMOptimizer.leaf_functions(
+        list(Parser(io.StringIO(generate_runnable(
+            args.functions, args.iterations)))), "Sys")
+    compare_modes(args, {
+        "-O0": {},
+        "-O1": {"level": 1},
+        "-O2": {"level": 2, "functions": functions},
+        "-O2 all": {"level": 2, "functions": functions, "register": True,
+                    "peephole": True},
+    })
+
+
+def bench_verify(args: argparse.Namespace) -> None:
+    """Runs the translations of random programs in every mode of the
+    translator in the emulator of Project 6, and asserts that their RAM is
+    that of the default translation, see generate_random and _EMULATE_RAM.
+    """
+    assembler = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, "Project 6 - Assembler")
+    modes = {
+        "inline": {}, "shared": {"shared": True},
+        "peephole": {"peephole": True}, "register": {"register": True},
+        "reg+pp": {"register": True, "peephole": True},
+        "shared+pp": {"shared": True, "peephole": True},
+        "-O1": {"level": 1}, "-O2": {"level": 2},
+        "-O2 all": {"level": 2, "register": True, "peephole": True},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for seed in range(args.programs):
+            source = generate_random(seed, args.random_functions)
+            functions = VMOptimizer.leaf_functions(
+                list(Parser(io.StringIO(source))), "Sys")
+            for index, options in enumerate(modes.values()):
+                if options.get("level") == 2:
+                    options = dict(options, functions=functions)
+                input_file = io.StringIO(source)
+                input_file.name = "Sys.vm"
+                paths.append(os.path.join(
+                    directory, "{}-{}.asm".format(seed, index)))
+                with open(paths[-1], 'w') as output_file:
+                    translate_file(input_file, output_file, True, **options)
+        output = subprocess.run(
+            [sys.executable, "-c", _EMULATE_RAM] + paths, cwd=assembler,
+            check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    results = output.stdout.splitlines()
+    for seed in range(args.programs):
+        expected = results[seed * len(modes)]
+        for index, name in enumerate(modes):
+            assert results[seed * len(modes) + index] == expected, \
+                "program {}: the RAM of {} differs from inline".format(
+                    seed, name)
+    print("{} random programs, {} modes: identical RAM".format(
+        args.programs, len(modes)))
+
+
+def bench_fused(args: argparse.Namespace) -> None:
+    """Compares translating to an .asm file and assembling it with the
+    assembler of Project 6, to assembling the translation in-process with
+    HackEncoder.
+    """
+    assembler = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, "Project 6 - Assembler")
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "Bench.vm")
+        with open(input_path, 'w') as input_file:
+            input_file.write(generate_program(args.functions))
+        asm_path = os.path.join(directory, "Bench.asm")
+        start = time.perf_counter()
+        with open(asm_path, 'w') as output_file:
+            translate_paths([input_path], output_file)
+        translating = time.perf_counter() - start
+        output = subprocess.run(
+            [sys.executable, "-c", _ASSEMBLE, asm_path,
+             os.path.join(directory, "TwoStep.hack")], cwd=assembler,
+            check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        assembling = float(output.stdout)
+        start = time.perf_counter()
+        encoder = HackEncoder()
+        translate_paths([input_path], encoder)
+        HackEncoder.save(encoder.close(), os.path.join(directory, "Fused"),
+                         ["hack"])
+        fused = time.perf_counter() - start
+        with open(os.path.join(directory, "TwoStep.hack")) as two_step, \
+                open(os.path.join(directory, "Fused.hack")) as fused_file:
+            assert two_step.read() == fused_file.read()
+    print("two steps: {:.3f}s (translate {:.3f}s, assemble {:.3f}s)".format(
+        translating + assembling, translating, assembling))
+    print("fused    : {:.3f}s, x{:.2f}".format(
+        fused, (translating + assembling) / fused))
+
+
+def bench_translate(args: argparse.Namespace) -> None:
+    """Measures the throughput of translate_file in commands/sec."""
+    source = generate_program(args.functions)
+    commands = source.count("\n")
+    best = float("inf")
+    for _ in range(args.repeat):
+        input_file, output_file = io.StringIO(source), io.StringIO()
+        input_file.name = "Bench.vm"
+        start = time.perf_counter()
+        translate_file(input_file, output_file, False)
+        best = min(best, time.perf_counter() - start)
+    print("{} commands in {:.3f}s, {:.0f} commands/sec".format(
+        commands, best, commands / best))
+
+
+def write_files(directory: str, files: int, functions: int) -> typing.List[str]:
+    """Generates a directory of VM files.
+
+    Args:
+        directory (str): the directory.
+        files (int): the number of files.
+        functions (int): the total number of functions in the files.
+
+    Returns:
+        typing.List[str]: the paths of the files.
+    """
+    input_paths = []
+    for index in range(files):
+        name = "Bench" + str(index)
+        input_paths.append(os.path.join(directory, name + ".vm"))
+        with open(input_paths[-1], 'w') as input_file:
+            input_file.write(generate_program(max(1, functions // files), name))
+    return input_paths
+
+
+def bench_incremental(args: argparse.Namespace) -> None:
+    """Measures translate_paths with an empty, a full and an almost full
+    TranslationCache, where a single file changed.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        input_paths = write_files(directory, args.files, args.functions)
+        cache = TranslationCache(os.path.join(directory, "cache"),
+                                 TRANSLATOR_VERSION)
+        for name in ("cold", "warm", "one changed"):
+            if name == "one changed":
+                with open(input_paths[-1], 'a') as input_file:
+                    input_file.write("push constant 0\npop temp 0\n")
+            start = time.perf_counter()
+            translate_paths(input_paths, io.StringIO(), cache=cache)
+            print("{:11}: {:.3f}s".format(name, time.perf_counter() - start))
+
+
+def bench_jobs(args: argparse.Namespace) -> None:
+    """Measures the scaling of translate_paths over 1..--jobs worker
+    processes, on a directory of --files files.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        input_paths = write_files(directory, args.files, args.functions)
+        serial = None
+        for jobs in range(1, args.jobs + 1):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                translate_paths(input_paths, io.StringIO(), jobs)
+                best = min(best, time.perf_counter() - start)
+            serial = serial or best
+            print("{:2} jobs: {:.3f}s, x{:.2f}".format(
+                jobs, best, serial / best))
+
+
+BENCHMARKS = {
+    "translate": bench_translate,
+    "shared": bench_shared,
+    "peephole": bench_peephole,
+    "register": bench_register,
+    "optimize": bench_optimize,
+    "jobs": bench_jobs,
+    "incremental": bench_incremental,
+    "fused": bench_fused,
+    "verify": bench_verify,
+}
+
+
+if "__main__" == __name__:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmarks for the VM translator.")
+    arg_parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    arg_parser.add_argument("--functions", type=int, default=5000)
+    arg_parser.add_argument("--iterations", type=int, default=100,
+                            help="iterations of the shared benchmark")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--files", type=int, default=32,
+                            help="files of the jobs and incremental benchmarks")
+    arg_parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                            help="maximal workers of the jobs benchmark")
+    arg_parser.add_argument("--programs", type=int, default=100,
+                            help="random programs of the verify benchmark")
+    arg_parser.add_argument("--random-functions", type=int, default=6,
+                            help="functions of every random program")
+    args = arg_parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
@@ -7,30 +7,277 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
 
+# Pushes D onto the stack.
+_PUSH_D = "@SP\nA=M\nM=D\n@SP\nM=M+1\n"
+
+# The translations of the arithmetic commands that do not need labels.
+ARITHMETIC_TEMPLATES = {
+    "add": "// add\n@SP\nAM=M-1\nD=M\nA=A-1\nM=M+D\n",
+    "sub": "// sub\n@SP\nAM=M-1\nD=M\nA=A-1\nM=M-D\n",
+    "neg": "// neg\n@SP\nA=M-1\nM=-M\n",
+    "and": "// and\n@SP\nAM=M-1\nD=M\nA=A-1\nM=M&D\n",
+    "or": "// or\n@SP\nAM=M-1\nD=M\nA=A-1\nM=M|D\n",
+    "not": "// not\n@SP\nA=M-1\nM=!M\n",
+    "shiftleft": "// shiftleft\n@SP\nA=M-1\nM=M<<\n",
+    "shiftright": "// shiftright\n@SP\nA=M-1\nM=M>>\n",
+}
+
+# The translations of the comparison commands, parameterized by a label that
+# is unique to each comparison. The result replaces x on the stack, and is
+# followed by the label CONTINUE{0}.
+COMPARISON_TEMPLATES = {
+    "eq": (
+        "@SP\nAM=M-1\nD=M\nA=A-1\nD=M-D\nM=-1\n"
+        "@CONTINUE{0}\nD;JEQ\n"     # x == y
+        "@SP\nA=M-1\nM=0\n"         # x != y
+        "(CONTINUE{0})\n"),
+}
+# The signs are split by bit 15, so x - y is computed only when it cannot
+# overflow: x and y are both negative or both non-negative.
+for _command, _jump, _y_sign, _sign_jump in (
+        ("gt", "JGT", "YPOSITIVE", "JGE"), ("lt", "JLT", "YNEGATIVE", "JLT")):
+    _end = "END" + _command.upper()
+    COMPARISON_TEMPLATES[_command] = (
+        # RAM[R13] = x
+        "@SP\nA=M-1\nA=A-1\nD=M\n@R13\nM=D\n"
+        # RAM[R14] = y
+        "@SP\nAM=M-1\nD=M\n@R14\nM=D\n"
+        "@" + _y_sign + "{0}\nD;" + _sign_jump + "\n"
+        # y has the other sign: x and y have different signs if x has it too
+        "@R13\nD=M\n"
+        "@" + _end + "{0}\nD;" + _sign_jump + "\n"
+        # x and y have the same sign
+        "(SAMESIGN{0})\n"
+        "@R13\nD=M\n@R14\nD=D-M\n"
+        "@" + _end + "{0}\nD;" + _jump + "\n"
+        "@ENDNO" + _command.upper() + "{0}\n0;JMP\n"
+        "(" + _y_sign + "{0})\n"
+        "@R13\nD=M\n"
+        "@SAMESIGN{0}\nD;" + _sign_jump + "\n"
+        # return false (0)
+        "(ENDNO" + _command.upper() + "{0})\n"
+        "@SP\nA=M-1\nM=0\n"
+        "@CONTINUE{0}\n0;JMP\n"
+        # return true (-1)
+        "(" + _end + "{0})\n"
+        "@SP\nA=M-1\nM=-1\n"
+        "(CONTINUE{0})\n")
+
+# The translations of push and pop, by segment, parameterized by the index.
+PUSH_TEMPLATES = {"constant": "// push constant {0}\n@{0}\nD=A\n" + _PUSH_D}
+POP_TEMPLATES = {}
+for _segment, _base in (("local", "LCL"), ("argument", "ARG"),
+                        ("this", "THIS"), ("that", "THAT")):
+    PUSH_TEMPLATES[_segment] = (
+        "// push " + _segment + " {0}\n"
+        "@{0}\nD=A\n"                               # D = index
+        "@" + _base + "\nA=M+D\nD=M\n" + _PUSH_D)   # D = RAM[seg + index]
+    POP_TEMPLATES[_segment] = (
+        "// pop " + _segment + " {0}\n"
+        "@{0}\nD=A\n@" + _base + "\nD=M+D\n@R13\nM=D\n"     # R13 = seg + index
+        "@SP\nAM=M-1\nD=M\n"                                # SP--, D = RAM[SP]
+        "@R13\nA=M\nM=D\n")                                 # RAM[R13] = D
+for _segment in ("pointer", "temp", "static"):
+    # the index of these segments is the address itself
+    PUSH_TEMPLATES[_segment] = (
+        "// push " + _segment + " {0}\n@{0}\nD=M\n" + _PUSH_D)
+    POP_TEMPLATES[_segment] = (
+        "// pop " + _segment + " {0}\n@SP\nAM=M-1\nD=M\n@{0}\nM=D\n")
+
+# The base addresses of the segments that are mapped to fixed addresses.
+FIXED_SEGMENTS = {"pointer": 3, "temp": 5}
+
+LABEL_TEMPLATE = "// label\n({0})\n"
+GOTO_TEMPLATE = "// goto\n@{0}\n0;JMP\n"
+IF_TEMPLATE = "// if-goto command\n@SP\nAM=M-1\nD=M\n@{0}\nD;JNE\n"
+FUNCTION_TEMPLATE = "// function\n({0})\n"
+PUSH_ZERO = "@SP\nA=M\nM=0\n@SP\nM=M+1\n"
+
+# Pushes the return address in D and the caller's LCL, ARG, THIS and THAT.
+_PUSH_FRAME = _PUSH_D + "".join(
+    "@" + _pointer + "\nD=M\n" + _PUSH_D
+    for _pointer in ("LCL", "ARG", "THIS", "THAT"))
+
+# ARG = SP - 5 - n_args, where D = n_args, and LCL = SP.
+_SET_FRAME = "@5\nD=D+A\n@SP\nD=M-D\n@ARG\nM=D\n@SP\nD=M\n@LCL\nM=D\n"
+
+CALL_TEMPLATE = (
+    "// call {0}\n"
+    "@{1}\nD=A\n" + _PUSH_FRAME +
+    "@{2}\nD=A\n" + _SET_FRAME +
+    # goto function and put return address label
+    "@{0}\n0;JMP\n({1})\n")
+
+RETURN_CODE = (
+    # frame = LCL
+    "@LCL\nD=M\n@frame\nM=D\n"
+    # return address = *(frame - 5)
+    "@5\nA=D-A\nD=M\n@retAddr\nM=D\n"
+    # *ARG = pop
+    "@SP\nAM=M-1\nD=M\n@ARG\nA=M\nM=D\n"
+    # SP = ARG + 1
+    "D=A+1\n@SP\nM=D\n" +
+    # THAT = *(frame-1), THIS = *(frame-2), ARG = *(frame-3), LCL = *(frame-4)
+    "".join("@frame\nAM=M-1\nD=M\n@" + _pointer + "\nM=D\n"
+            for _pointer in ("THAT", "THIS", "ARG", "LCL")) +
+    # goto return address
+    "@retAddr\nA=M\n0;JMP\n")
+
+RETURN_TEMPLATE = "// return\n" + RETURN_CODE
+
+# In the shared mode, every call, return and comparison jumps to a single
+# routine instead of inlining its translation. The routines are written once
+# per program, and the labels of the routines start with "$", which VM
+# function names never do.
+SHARED_CALL_TEMPLATE = (
+    "// call {0}\n"
+    "@{2}\nD=A\n@R13\nM=D\n"         # R13 = n_args
+    "@{0}\nD=A\n@R14\nM=D\n"         # R14 = function
+    "@{1}\nD=A\n@$CALL\n0;JMP\n"     # D = return address
+    "({1})\n")
+SHARED_RETURN_TEMPLATE = "// return\n@$RETURN\n0;JMP\n"
+SHARED_COMPARISON_TEMPLATE = "// {0}_{1}\n@CONTINUE{1}\nD=A\n@${0}\n0;JMP\n" \
+    "(CONTINUE{1})\n"
+SHARED_ROUTINES = (
+    "// shared routines\n@$END\n0;JMP\n"
+    "($CALL)\n" + _PUSH_FRAME + "@R13\nD=M\n" + _SET_FRAME +
+    "@R14\nA=M\n0;JMP\n"
+    "($RETURN)\n" + RETURN_CODE + "".join(
+        # the return address is kept in R15, as R13 and R14 are clobbered
+        "($" + _command + ")\n@R15\nM=D\n" +
+        COMPARISON_TEMPLATES[_command].format("$" + _command) +
+        "@R15\nA=M\n0;JMP\n"
+        for _command in ("eq", "gt", "lt")) +
+    "($END)\n")
+
+# In the register mode, the top of the stack may be held in D instead of in
+# RAM[SP - 1]. These translations start with the top of the stack in D, and
+# leave the result in D.
+_POP_D = "@SP\nAM=M-1\nD=M\n"
+REGISTER_ARITHMETIC_TEMPLATES = {
+    "add": "// add\n@SP\nAM=M-1\nD=D+M\n",
+    "sub": "// sub\n@SP\nAM=M-1\nD=M-D\n",
+    "and": "// and\n@SP\nAM=M-1\nD=D&M\n",
+    "or": "// or\n@SP\nAM=M-1\nD=D|M\n",
+    "neg": "// neg\nD=-D\n",
+    "not": "// not\nD=!D\n",
+    "shiftleft": "// shiftleft\nD=D<<\n",
+    "shiftright": "// shiftright\nD=D>>\n",
+}
+REGISTER_EQ_TEMPLATE = (
+    "// eq_{0}\n@SP\nAM=M-1\nD=M-D\n@TRUE{0}\nD;JEQ\n"
+    "D=0\n@CONTINUE{0}\n0;JMP\n(TRUE{0})\nD=-1\n(CONTINUE{0})\n")
+REGISTER_IF_TEMPLATE = "// if-goto command\n@{0}\nD;JNE\n"
+
+# Pushes load the value to D, and pops store D.
+REGISTER_PUSH_TEMPLATES = {"constant": "// push constant {0}\n@{0}\nD=A\n"}
+REGISTER_POP_TEMPLATES = {}
+REGISTER_NEAR_POP_TEMPLATES = {}
+for _segment, _base in (("local", "LCL"), ("argument", "ARG"),
+                        ("this", "THIS"), ("that", "THAT")):
+    REGISTER_PUSH_TEMPLATES[_segment] = (
+        "// push " + _segment + " {0}\n"
+        "@{0}\nD=A\n@" + _base + "\nA=M+D\nD=M\n")
+    # D is kept in R13 while the address is computed
+    REGISTER_POP_TEMPLATES[_segment] = (
+        "// pop " + _segment + " {0}\n"
+        "@R13\nM=D\n@{0}\nD=A\n@" + _base + "\nD=M+D\n@R14\nM=D\n"
+        "@R13\nD=M\n@R14\nA=M\nM=D\n")
+    # the address is reached by incrementing A, for indices below
+    # REGISTER_NEAR_INDEX
+    REGISTER_NEAR_POP_TEMPLATES[_segment] = (
+        "// pop " + _segment + " {0}\n@" + _base + "\nA=M\n{1}M=D\n")
+for _segment in ("pointer", "temp", "static"):
+    REGISTER_PUSH_TEMPLATES[_segment] = (
+        "// push " + _segment + " {0}\n@{0}\nD=M\n")
+    REGISTER_POP_TEMPLATES[_segment] = (
+        "// pop " + _segment + " {0}\n@{0}\nM=D\n")
+
+# Pops to indices below this are addressed by incrementing A.
+REGISTER_NEAR_INDEX = 8
+
 
 class CodeWriter:
-    """Translates VM commands into Hack assembly code."""
+    """Translates VM commands into Hack assembly code. The translation of
+    every command is a precompiled template, and the translated fragments
+    are buffered and written to the output stream in large chunks.
+
+    In the shared mode, calls, returns and comparisons jump to routines that
+    are written once with the bootstrap code, which shrinks the ROM at the
+    cost of a few more executed instructions per command.
+
+    In the register mode, the top of the stack is held in D between commands
+    of a basic block whenever possible, and is spilled to the stack (pushed)
+    before labels, jumps, calls, returns, the gt and lt comparisons, and at
+    the end of the file. Every label is reached with the whole stack in RAM.
+    """
 
-    def __init__(self, output_stream: typing.TextIO) -> None:
+    # Buffered output is written once it reaches this number of characters.
+    FLUSH_SIZE = 1 << 16
+
+    def __init__(self, output_stream: typing.TextIO,
+                 shared: bool = False, register: bool = False) -> None:
         """Initializes the CodeWriter.
 
         Args:
             output_stream (typing.TextIO): output stream.
+            shared (bool): whether to use the shared routines.
+            register (bool): whether to hold the top of the stack in D.
         """
         self.output_file = output_stream
+        self.shared = shared
+        self.register = register
+        self.top_in_d = False
+        self.buffer = []
+        self.buffered = 0
         self.call_counter = 0
         self.label_counter = 0
         self.file_name = ""
         self.curr_func = ""
 
+    def emit(self, code: str) -> None:
+        """Buffers translated code, and writes the buffer to the output
+        stream once it is large enough.
+
+        Args:
+            code (str): assembly code.
+        """
+        self.buffer.append(code)
+        self.buffered += len(code)
+        if self.buffered >= CodeWriter.FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes all the buffered code to the output stream."""
+        if self.buffer:
+            self.output_file.write("".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+    def close(self) -> None:
+        """Spills the top of the stack and writes all the buffered code to
+        the output stream. Must be called when the translation is done.
+        """
+        self.spill()
+        self.flush()
+
+    def spill(self) -> None:
+        """Pushes the top of the stack from D, if it is held there."""
+        if self.top_in_d:
+            self.emit("// spill\n" + _PUSH_D)
+            self.top_in_d = False
+
+    def fill(self) -> None:
+        """Pops the top of the stack to D, if it is not held there."""
+        if not self.top_in_d:
+            self.emit(_POP_D)
+            self.top_in_d = True
+
     def bootstrap(self) -> None:
-        res = "// Bootstrap\n"
-        res += "@256\n"
-        res += "D=A\n"
-        res += "@SP\n"
-        res += "M=D\n"
-        self.output_file.write(res)
+        self.emit("// Bootstrap\n@256\nD=A\n@SP\nM=D\n")
         self.write_call("Sys.init", 0)
+        if self.shared:
+            self.emit(SHARED_ROUTINES)
 
     def set_file_name(self, filename: str) -> None:
         """Informs the code writer that the translation of a new VM file is
@@ -50,28 +297,30 @@ class CodeWriter:
         Args:
             command (str): an arithmetic command.
         """
-        if command == "add":
-            self.output_file.write(self.__add())
-        elif command == "sub":
-            self.output_file.write(self.__sub())
-        elif command == "neg":
-            self.output_file.write(self.__neg())
-        elif command == "and":
-            self.output_file.write(self.__and())
-        elif command == "or":
-            self.output_file.write(self.__or())
-        elif command == "not":
-            self.output_file.write(self.__not())
-        elif command == "shiftleft":
-            self.output_file.write(self.__shiftleft())
-        elif command == "shiftright":
-            self.output_file.write(self.__shiftright())
-        elif command == "eq":
-            self.output_file.write(self.__eq())
-        elif command == "gt":
-            self.output_file.write(self.__gt())
-        elif command == "lt":
-            self.output_file.write(self.__lt())
+        if self.register:
+            if command in REGISTER_ARITHMETIC_TEMPLATES:
+                self.fill()
+                self.emit(REGISTER_ARITHMETIC_TEMPLATES[command])
+                return
+            if command == "eq" and not self.shared:
+                self.fill()
+                self.label_counter += 1
+                self.emit(REGISTER_EQ_TEMPLATE.format(
+                    "_" + self.file_name + "." + self.curr_func
+                    + str(self.label_counter)))
+                return
+            self.spill()
+        code = ARITHMETIC_TEMPLATES.get(command)
+        if code is None:
+            self.label_counter += 1
+            label = "_" + self.file_name + "." + self.curr_func \
+                + str(self.label_counter)
+            if self.shared:
+                code = SHARED_COMPARISON_TEMPLATE.format(command, label)
+            else:
+                code = "// " + command + "_" + label + "\n" + \
+                    COMPARISON_TEMPLATES[command].format(label)
+        self.emit(code)
 
     def write_push_pop(self, command: str, segment: str, index: int) -> None:
         """Writes assembly code that is the translation of the given
@@ -82,12 +331,29 @@ class CodeWriter:
             segment (str): the memory segment to operate on.
             index (int): the index in the memory segment.
         """
-        if (segment == "pointer") or (segment == "temp") or (segment == "static"):
-            self.__pushPopPointerTempStatic(command, segment, index)
-        elif command == "C_PUSH":
-            self.__pushSegment(segment, index)
+        if segment == "static":
+            ind = self.file_name + "." + str(index)
+        else:
+            ind = index + FIXED_SEGMENTS.get(segment, 0)
+        if self.register:
+            if command == "C_PUSH":
+                self.spill()
+                self.emit(REGISTER_PUSH_TEMPLATES[segment].format(ind))
+                self.top_in_d = True
+                return
+            self.fill()
+            if segment in REGISTER_NEAR_POP_TEMPLATES and \
+                    index < REGISTER_NEAR_INDEX:
+                self.emit(REGISTER_NEAR_POP_TEMPLATES[segment].format(
+                    ind, "A=A+1\n" * index))
+            else:
+                self.emit(REGISTER_POP_TEMPLATES[segment].format(ind))
+            self.top_in_d = False
+            return
+        if command == "C_PUSH":
+            self.emit(PUSH_TEMPLATES[segment].format(ind))
         else:
-            self.__popSegment(segment, index)
+            self.emit(POP_TEMPLATES[segment].format(ind))
 
     def write_label(self, label: str) -> None:
         """Writes assembly code that affects the label command.
@@ -100,10 +366,9 @@ class CodeWriter:
         Args:
             label (str): the label to write.
         """
-        label = self.file_name + "." + self.curr_func + "$" + label
-        res = "// label\n"
-        res += "(" + label + ")\n"
-        self.output_file.write(res)
+        self.spill()
+        self.emit(LABEL_TEMPLATE.format(
+            self.file_name + "." + self.curr_func + "$" + label))
 
     def write_goto(self, label: str) -> None:
         """Writes assembly code that affects the goto command.
@@ -111,11 +376,9 @@ class CodeWriter:
         Args:
             label (str): the label to go to.
         """
-        label = self.file_name + "." + self.curr_func + "$" + label
-        res = "// goto\n"
-        res += "@" + label + "\n"
-        res += "0;JMP\n"
-        self.output_file.write(res)
+        self.spill()
+        self.emit(GOTO_TEMPLATE.format(
+            self.file_name + "." + self.curr_func + "$" + label))
 
     def write_if(self, label: str) -> None:
         """Writes assembly code that affects the if-goto command.
@@ -124,13 +387,11 @@ class CodeWriter:
             label (str): the label to go to.
         """
         label = self.file_name + "." + self.curr_func + "$" + label
-        res = "// if-goto command\n"
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "@" + label + "\n"
-        res += "D;JNE\n"
-        self.output_file.write(res)
+        if self.top_in_d:
+            self.emit(REGISTER_IF_TEMPLATE.format(label))
+            self.top_in_d = False
+        else:
+            self.emit(IF_TEMPLATE.format(label))
 
     def write_function(self, function_name: str, n_vars: int) -> None:
         """Writes assembly code that affects the function command.
@@ -144,17 +405,10 @@ class CodeWriter:
             function_name (str): the name of the function.
             n_vars (int): the number of local variables of the function.
         """
+        self.spill()
         self.curr_func = function_name
-        res = "// function\n"
-        res += "(" + function_name + ")\n"
         # push n_vars 0 values (initializes the callee's local variables)
-        for i in range(n_vars):
-            res += "@SP\n"
-            res += "A=M\n"
-            res += "M=0\n"
-            res += "@SP\n"
-            res += "M=M+1\n"
-        self.output_file.write(res)
+        self.emit(FUNCTION_TEMPLATE.format(function_name) + PUSH_ZERO * n_vars)
 
     def write_call(self, function_name: str, n_args: int) -> None:
         """Writes assembly code that affects the call command.
@@ -172,346 +426,13 @@ class CodeWriter:
             function_name (str): the name of the function to call.
             n_args (int): the number of arguments of the function.
         """
+        self.spill()
         self.call_counter += 1
         retAddr = self.file_name + "." + self.curr_func + "$ret." + str(self.call_counter)
-        res = "// call " + function_name + "\n"
-        # push return address, LCL, ARG, THIS, THAT
-        for addr in [retAddr, "LCL", "ARG", "THIS", "THAT"]:
-            res += "@" + addr + "\n"
-            if addr == retAddr:
-                res += "D=A\n"
-            else:
-                res += "D=M\n"
-            res += "@SP\n"
-            res += "A=M\n"
-            res += "M=D\n"
-            res += "@SP\n"
-            res += "M=M+1\n"
-        # ARG = SP - 5 - n_args
-        res += "@" + str(n_args) + "\n"
-        res += "D=A\n"
-        res += "@5\n"
-        res += "D=D+A\n"
-        res += "@SP\n"
-        res += "D=M-D\n"
-        res += "@ARG\n"
-        res += "M=D\n"
-        # LCL = SP
-        res += "@SP\n"
-        res += "D=M\n"
-        res += "@LCL\n"
-        res += "M=D\n"
-        # goto function and put return address label
-        res += "@" + function_name + "\n"
-        res += "0;JMP\n"
-        res += "(" + retAddr + ")\n"
-        self.output_file.write(res)
+        template = SHARED_CALL_TEMPLATE if self.shared else CALL_TEMPLATE
+        self.emit(template.format(function_name, retAddr, n_args))
 
     def write_return(self) -> None:
         """Writes assembly code that affects the return command."""
-        res = "// return\n"
-        # frame = LCL
-        res += "@LCL\n"
-        res += "D=M\n"
-        res += "@frame\n"
-        res += "M=D\n"
-        # return address = *(frame - 5)
-        res += "@5\n"
-        res += "A=D-A\n"
-        res += "D=M\n"
-        res += "@retAddr\n"
-        res += "M=D\n"
-        # *ARG = pop
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "@ARG\n"
-        res += "A=M\n"
-        res += "M=D\n"
-        # SP = ARG + 1
-        res += "D=A+1\n"
-        res += "@SP\n"
-        res += "M=D\n"
-        # THAT = *(frame-1), THIS = *(frame-2), ARG = *(frame-3), LCL = *(frame-4)
-        for addr in ["THAT", "THIS", "ARG", "LCL"]:
-            res += "@frame\n"
-            res += "AM=M-1\n"
-            res += "D=M\n"
-            res += "@" + addr + "\n"
-            res += "M=D\n"
-        # goto return address
-        res += "@retAddr\n"
-        res += "A=M\n"
-        res += "0;JMP\n"
-        self.output_file.write(res)
-
-    ###########################################    Memory access commands    ###########################################
-    def __pushSegment(self, segment: str, index: int) -> None:
-        ind = str(index)
-        seg_names = {"constant": "constant", "local": "LCL", "argument": "ARG", "this": "THIS", "that": "THAT"}
-        res = "// push " + segment + " " + ind + "\n"
-        seg = seg_names[segment]
-        # D = index
-        res += "@" + ind + "\n"
-        res += "D=A\n"
-        if segment != "constant":
-            # D = RAM[seg + index]
-            res += "@" + seg + "\n"
-            res += "A=M+D\n"
-            res += "D=M\n"
-        # RAM[SP] = D
-        res += "@SP\n"
-        res += "A=M\n"
-        res += "M=D\n"
-        # SP++
-        res += "@SP\n"
-        res += "M=M+1\n"
-        self.output_file.write(res)
-
-    def __popSegment(self, segment: str, index: int) -> None:
-        seg_names = {"local": "LCL", "argument": "ARG", "this": "THIS", "that": "THAT"}
-        ind = str(index)
-        res = "// pop " + segment + " " + ind + "\n"
-        seg = seg_names[segment]
-        #   RAM[R13] = segment + index
-        res += "@" + ind + "\n"
-        res += "D=A\n"
-        res += "@" + seg + "\n"
-        res += "D=M+D\n"
-        res += "@R13\n"
-        res += "M=D\n"
-        #   SP--, D = RAM[SP]
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        #   RAM[LCL + index] = D
-        res += "@R13\n"
-        res += "A=M\n"
-        res += "M=D\n"
-        self.output_file.write(res)
-
-    def __pushPopPointerTempStatic(self, command: str, segment, index: int) -> None:
-        if segment == "pointer":
-            index += 3
-        if segment == "temp":
-            index += 5
-        if segment != "static":
-             ind = str(index)
-        else:
-            ind = self.file_name + "." + str(index)
-        res = ""
-        if command == "C_PUSH":
-            res += "// push " + segment + " " + ind + "\n"
-            #   D = pointer/temp + index/ static i
-            res += "@" + ind + "\n"
-            res += "D=M\n"
-            #   RAM[SP] = D
-            res += "@SP\n"
-            res += "A=M\n"
-            res += "M=D\n"
-            #   SP++
-            res += "@SP\n"
-            res += "M=M+1\n"
-        else:   # command = "C_POP"
-            res += "// pop " + segment + " " + ind + "\n"
-            #   SP--, D = RAM[SP]
-            res += "@SP\n"
-            res += "AM=M-1\n"
-            res += "D=M\n"
-            #   pointer/temp + index/ static i = D
-            res += "@" + ind + "\n"
-            res += "M=D\n"
-        self.output_file.write(res)
-
-    ##########################################   Stack arithmetic commands   ###########################################
-    def __add(self) -> str:
-        res = "// add\n"
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "A=A-1\n"
-        res += "M=M+D\n"
-        return res
-
-    def __sub(self) -> str:
-        res = "// sub\n"
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "A=A-1\n"
-        res += "M=M-D\n"
-        return res
-
-    def __neg(self) -> str:
-        res = "// neg\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=-M\n"
-        return res
-
-    def __and(self) -> str:
-        res = "// and\n"
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "A=A-1\n"
-        res += "M=M&D\n"
-        return res
-
-    def __or(self) -> str:
-        res = "// or\n"
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "A=A-1\n"
-        res += "M=M|D\n"
-        return res
-
-    def __not(self) -> str:
-        res = "// not\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=!M\n"
-        return res
-
-    def __shiftleft(self) -> str:
-        res = "// shiftleft\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=M<<\n"
-        return res
-
-    def __shiftright(self) -> str:
-        res = "// shiftright\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=M>>\n"
-        return res
-
-    def __eq(self) -> str:
-        self.label_counter += 1
-        label = "_" + self.file_name + "." + self.curr_func + str(self.label_counter)
-        res = "// eq_" + label + "\n"
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "A=A-1\n"
-        res += "D=M-D\n"
-        res += "M=-1\n"
-        res += "@CONTINUE" + label + "\n"  # x == y
-        res += "D;JEQ\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=0\n"  # x != y
-        res += "(CONTINUE" + label + ")\n"
-        return res
-
-    def __gt(self) -> str:
-        self.label_counter += 1
-        label = "_" + self.file_name + "." + self.curr_func + str(self.label_counter)
-        res = "// gt_" + label + "\n"
-        #   RAM[R13] = x
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "A=A-1\n"
-        res += "D=M\n"
-        res += "@R13\n"
-        res += "M=D\n"
-        #   RAM[R14] = y
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "@R14\n"
-        res += "M=D\n"
-        res += "@YPOSITIVE" + label + "\n"
-        res += "D;JGT\n"
-        #   y < 0
-        res += "@R13\n"
-        res += "D=M\n"
-        res += "@ENDGT" + label + "\n"    # y < 0 and x > 0   ==>   x > y  (true)
-        res += "D;JGT\n"
-        #   x and y have the same sign
-        res += "(SAMESIGN" + label + ")\n"
-        res += "@R13\n"
-        res += "D=M\n"
-        res += "@R14\n"
-        res += "D=D-M\n"
-        res += "@ENDGT" + label + "\n"
-        res += "D;JGT\n"
-        res += "@ENDNOGT" + label + "\n"
-        res += "0;JMP\n"
-        #   y > 0
-        res += "(YPOSITIVE" + label + ")\n"
-        res += "@R13\n"
-        res += "D=M\n"
-        res += "@SAMESIGN" + label + "\n"
-        res += "D;JGT\n"
-        #   return false (0)
-        res += "(ENDNOGT" + label + ")\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=0\n"
-        res += "@CONTINUE" + label + "\n"
-        res += "0;JMP\n"
-        #   return true (-1)
-        res += "(ENDGT" + label + ")\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=-1\n"
-        res += "(CONTINUE" + label + ")\n"
-        return res
-
-    def __lt(self) -> str:
-        self.label_counter += 1
-        label = "_" + self.file_name + "." + self.curr_func + str(self.label_counter)
-        res = "// lt_" + label + "\n"
-        #   RAM[R13] = x
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "A=A-1\n"
-        res += "D=M\n"
-        res += "@R13\n"
-        res += "M=D\n"
-        #   RAM[R14] = y
-        res += "@SP\n"
-        res += "AM=M-1\n"
-        res += "D=M\n"
-        res += "@R14\n"
-        res += "M=D\n"
-        res += "@YNEGATIVE" + label + "\n"
-        res += "D;JLT\n"
-        #   y > 0
-        res += "@R13\n"
-        res += "D=M\n"
-        res += "@ENDLT" + label + "\n"    # y > 0 and x < 0   ==>    x < y (true)
-        res += "D;JLT\n"
-        #   x and y have the same sign
-        res += "(SAMESIGN" + label + ")\n"
-        res += "@R13\n"
-        res += "D=M\n"
-        res += "@R14\n"
-        res += "D=D-M\n"
-        res += "@ENDLT" + label + "\n"
-        res += "D;JLT\n"
-        res += "@ENDNOLT" + label + "\n"
-        res += "0;JMP\n"
-        #   y < 0
-        res += "(YNEGATIVE" + label + ")\n"
-        res += "@R13\n"
-        res += "D=M\n"
-        res += "@SAMESIGN" + label + "\n"
-        res += "D;JLT\n"
-        #   return false (0)
-        res += "(ENDNOLT" + label + ")\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=0\n"
-        res += "@CONTINUE" + label + "\n"
-        res += "0;JMP\n"
-        #   return true (-1)
-        res += "(ENDLT" + label + ")\n"
-        res += "@SP\n"
-        res += "A=M-1\n"
-        res += "M=-1\n"
-        res += "(CONTINUE" + label + ")\n"
-        return res
+        self.spill()
+        self.emit(SHARED_RETURN_TEMPLATE if self.shared else RETURN_TEMPLATE)
@@ -0,0 +1,113 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from array import array
+from AssemblerModules import assembler_module
+
+# The encoder of the assembler is reused.
+Code = assembler_module("Code").Code
+Rom = assembler_module("Rom").Rom
+SymbolTable = assembler_module("SymbolTable").SymbolTable
+
+
+class HackEncoder:
+    """A text stream that assembles the Hack assembly code written to it, so
+    CodeWriter's output is encoded into machine words as it is written,
+    without writing it to an .asm file and parsing the file again.
+
+    Code is assembled in a single pass, as by the assembler's
+    assemble_words_single_pass: A-commands that refer to a symbol that is not
+    yet known are patched when the stream is closed, and symbols that are
+    never defined as labels are variables, allocated in order of first use.
+    """
+
+    # The output formats, see Rom.
+    FORMATS = tuple(Rom.EXTENSIONS)
+
+    def __init__(self, debug_file: typing.Optional[typing.TextIO] = None) -> None:
+        """
+        Args:
+            debug_file (typing.Optional[typing.TextIO]): if given, the code
+                is also written to this file.
+        """
+        self.debug_file = debug_file
+        self.symbol_table = SymbolTable()
+        self.words = array('L')
+        self.fixups = {}    # symbol -> indices of the words that refer to it
+        self.partial = ""   # the start of a line that was not written yet
+        # the words of the lines that always encode to the same word: C- and
+        # A-commands of numbers and of symbols that are already known
+        self.known = {}
+
+    def write(self, code: str) -> int:
+        """Assembles the complete lines of the given code.
+
+        Args:
+            code (str): Hack assembly code, as written by CodeWriter.
+
+        Returns:
+            int: the number of characters written.
+        """
+        if self.debug_file is not None:
+            self.debug_file.write(code)
+        self.__assemble(code)
+        return len(code)
+
+    def __assemble(self, code: str) -> None:
+        lines = (self.partial + code).split("\n")
+        self.partial = lines.pop()
+        symbol_table, words, known = self.symbol_table, self.words, self.known
+        for line in lines:
+            word = known.get(line)
+            if word is not None:
+                words.append(word)
+            elif not line or line[0] == "/":
+                continue
+            elif line[0] == "@":
+                symbol = line[1:]
+                address = int(symbol) if symbol.isdigit() \
+                    else symbol_table.get_address(symbol)
+                if address is None:
+                    self.fixups.setdefault(symbol, []).append(len(words))
+                    address = 0
+                else:
+                    known[line] = address
+                words.append(address)
+            elif line[0] == "(":
+                symbol_table.add_entry(line[1:-1], len(words))
+            else:
+                known[line] = Code.c_command(line)
+                words.append(known[line])
+
+    def close(self) -> array:
+        """Patches the A-commands that refer to labels or variables.
+
+        Returns:
+            array: the machine words of the program.
+        """
+        self.__assemble("\n")
+        for symbol, indices in self.fixups.items():
+            address = self.symbol_table.address_of(symbol)
+            for index in indices:
+                self.words[index] = address
+        self.fixups = {}
+        return self.words
+
+    @staticmethod
+    def save(words: typing.Sequence[int], output_path: str,
+             formats: typing.Sequence[str]) -> None:
+        """Writes the machine words of a program in several formats.
+
+        Args:
+            words (typing.Sequence[int]): the machine words.
+            output_path (str): the path of the output files, without their
+                extensions.
+            formats (typing.Sequence[str]): formats from FORMATS.
+        """
+        for fmt in formats:
+            Rom.write(words, output_path + Rom.EXTENSIONS[fmt], fmt)
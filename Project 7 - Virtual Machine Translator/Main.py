@@ -5,16 +5,46 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import io
+import itertools
 import os
 import sys
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from Parser import Parser
 from CodeWriter import CodeWriter
+from Peephole import Peephole
+from VMOptimizer import VMOptimizer
+from TranslationCache import TranslationCache
+
+# Changes whenever the translation of a file changes, which invalidates the
+# translation cache.
+TRANSLATOR_VERSION = "1.1"
+
+# Translates a single command with a code writer, by the command's type.
+DISPATCH = {
+    "C_ARITHMETIC": lambda writer, command: writer.write_arithmetic(command.arg1),
+    "C_PUSH": lambda writer, command: writer.write_push_pop(
+        "C_PUSH", command.arg1, command.arg2),
+    "C_POP": lambda writer, command: writer.write_push_pop(
+        "C_POP", command.arg1, command.arg2),
+    "C_LABEL": lambda writer, command: writer.write_label(command.arg1),
+    "C_IF": lambda writer, command: writer.write_if(command.arg1),
+    "C_GOTO": lambda writer, command: writer.write_goto(command.arg1),
+    "C_FUNCTION": lambda writer, command: writer.write_function(
+        command.arg1, command.arg2),
+    "C_RETURN": lambda writer, command: writer.write_return(),
+    "C_CALL": lambda writer, command: writer.write_call(
+        command.arg1, command.arg2),
+}
 
 
 def translate_file(
         input_file: typing.TextIO, output_file: typing.TextIO,
-        bootstrap: bool) -> None:
+        bootstrap: bool, shared: bool = False,
+        peephole: bool = False, register: bool = False, level: int = 0,
+        functions: typing.Optional[dict] = None) -> None:
     """Translates a single file.
 
     Args:
@@ -22,32 +52,125 @@ def translate_file(
         output_file (typing.TextIO): writes all output to this file.
         bootstrap (bool): if this is True, the current file is the
             first file we are translating.
+        shared (bool): whether calls, returns and comparisons jump to shared
+            routines, see CodeWriter.
+        peephole (bool): whether to optimize the translation with Peephole.
+        register (bool): whether to hold the top of the stack in the D
+            register, see CodeWriter.
+        level (int): the optimization level of VMOptimizer.
+        functions (typing.Optional[dict]): the functions of all the files
+            that may be inlined, see VMOptimizer.leaf_functions.
     """
-    parser = Parser(input_file)
-    codeWriter = CodeWriter(output_file)
-    codeWriter.set_file_name(os.path.splitext(os.path.basename(input_file.name))[0])
+    file_name = os.path.splitext(os.path.basename(input_file.name))[0]
+    commands = Parser.stream(input_file)
+    if level:
+        commands = VMOptimizer(level, functions).optimize(
+            list(commands), file_name)
+    if peephole:
+        translation, output_file = output_file, io.StringIO()
+    codeWriter = CodeWriter(output_file, shared, register)
+    codeWriter.set_file_name(file_name)
     if bootstrap:
         codeWriter.bootstrap()
-    while parser.has_more_commands():
-        parser.advance()
-        command = parser.command_type()
-        if command == "C_ARITHMETIC":
-            codeWriter.write_arithmetic(parser.arg1())
-        elif command == "C_LABEL":
-            codeWriter.write_label(parser.arg1())
-        elif command == "C_IF":
-            codeWriter.write_if(parser.arg1())
-        elif command == "C_GOTO":
-            codeWriter.write_goto(parser.arg1())
-        elif command == "C_FUNCTION":
-            codeWriter.write_function(parser.arg1(), parser.arg2())
-        elif command == "C_RETURN":
-            codeWriter.write_return()
-        elif command == "C_CALL":
-            codeWriter.write_call(parser.arg1(), parser.arg2())
-        else:
-            # command == C_PUSH or C_POP
-            codeWriter.write_push_pop(command, parser.arg1(), parser.arg2())
+    for command in commands:
+        try:
+            DISPATCH[command.type](codeWriter, command)
+        except KeyError as error:
+            # the only arguments that index the templates are segments
+            raise ValueError("{}:{}: invalid segment {} for {}".format(
+                input_file.name, command.line, error,
+                command.type[2:].lower())) from None
+    codeWriter.close()
+    if peephole:
+        translation.write(Peephole.optimize(output_file.getvalue()))
+
+
+def _context(file_name: str, bootstrap: bool, options: dict) -> str:
+    """
+    Args:
+        file_name (str): the name of a file, without its extension.
+        bootstrap (bool): whether the file is translated with the bootstrap
+            code.
+        options (dict): the options of translate_file.
+
+    Returns:
+        str: everything but the source that the translation of the file
+        depends on, for TranslationCache.key.
+    """
+    context = dict(options)
+    context["functions"] = sorted(
+        (name, source_file, [(command.type, command.arg1, command.arg2)
+                             for command in body])
+        for name, (source_file, body) in (options.get("functions") or {}).items())
+    return repr((file_name, bootstrap, sorted(context.items())))
+
+
+def translate_path(input_path: str, bootstrap: bool, options: dict,
+                   cache: typing.Optional[TranslationCache] = None) -> str:
+    """Translates a single file into a fragment of assembly code.
+
+    Args:
+        input_path (str): the path of the file to translate.
+        bootstrap (bool): whether the fragment starts with the bootstrap
+            code.
+        options (dict): the options of translate_file.
+        cache (typing.Optional[TranslationCache]): if given, files that
+            were translated in the same context are not translated again.
+
+    Returns:
+        str: the fragment.
+    """
+    if cache is None:
+        output_file = io.StringIO()
+        with open(input_path, 'r') as input_file:
+            translate_file(input_file, output_file, bootstrap, **options)
+        return output_file.getvalue()
+    with open(input_path, 'rb') as input_file:
+        source = input_file.read()
+    key = cache.key(_context(
+        os.path.splitext(os.path.basename(input_path))[0], bootstrap,
+        options).encode(), source)
+    fragment = cache.get(key)
+    if fragment is None:
+        input_file = io.StringIO(source.decode())
+        input_file.name = input_path
+        output_file = io.StringIO()
+        translate_file(input_file, output_file, bootstrap, **options)
+        fragment = output_file.getvalue()
+        cache.put(key, fragment)
+    return fragment
+
+
+def translate_paths(input_paths: typing.List[str],
+                    output_file: typing.TextIO, jobs: int = 1,
+                    cache: typing.Optional[TranslationCache] = None,
+                    **options) -> None:
+    """Translates files into a single output, the first of them with the
+    bootstrap code. The labels of every file are namespaced by its name, so
+    the files are translated independently, by a pool of worker processes,
+    and the fragments are written in the order of the files.
+
+    Args:
+        input_paths (typing.List[str]): the paths of the files to translate.
+        output_file (typing.TextIO): writes all output to this file.
+        jobs (int): the number of worker processes.
+        cache (typing.Optional[TranslationCache]): the cache of the
+            fragments, see translate_path.
+        **options: the options of translate_file.
+    """
+    bootstraps = [index == 0 for index in range(len(input_paths))]
+    if jobs > 1 and len(input_paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            fragments = executor.map(
+                translate_path, input_paths, bootstraps,
+                itertools.repeat(options), itertools.repeat(cache),
+                chunksize=max(1, len(input_paths) // (4 * jobs)))
+            for fragment in fragments:
+                output_file.write(fragment)
+    else:
+        for input_path, bootstrap in zip(input_paths, bootstraps):
+            output_file.write(
+                translate_path(input_path, bootstrap, options, cache))
 
 
 if "__main__" == __name__:
@@ -56,25 +179,92 @@ if "__main__" == __name__:
     # Both are closed automatically when the code finishes running.
     # If the output file does not exist, it is created automatically in the
     # correct path, using the correct filename.
-    if not len(sys.argv) == 2:
-        sys.exit("Invalid usage, please use: VMtranslator <input path>")
-    argument_path = os.path.abspath(sys.argv[1])
+    arg_parser = argparse.ArgumentParser(
+        description="Translates VM files into a single Hack assembly file.")
+    arg_parser.add_argument("input_path", help="a .vm file or a directory")
+    arg_parser.add_argument(
+        "--shared", action="store_true",
+        help="jump to shared call, return and comparison routines instead "
+             "of inlining them, for a smaller ROM")
+    arg_parser.add_argument(
+        "--peephole", action="store_true",
+        help="optimize the translation with a peephole pass")
+    arg_parser.add_argument(
+        "--register", action="store_true",
+        help="hold the top of the stack in the D register within basic "
+             "blocks")
+    arg_parser.add_argument(
+        "-O", dest="level", type=int, choices=(0, 1, 2), default=0,
+        help="the optimization level of the VM commands: 1 folds constants "
+             "and removes unreachable code, 2 also inlines small functions")
+    arg_parser.add_argument(
+        "--jobs", type=int, default=1, metavar="N",
+        help="translate the files of a directory in N worker processes")
+    arg_parser.add_argument(
+        "--no-cache", action="store_true",
+        help="translate every file, even if it did not change")
+    arg_parser.add_argument(
+        "--cache-dir", default=TranslationCache.default_directory(),
+        help="the directory of the translation cache")
+    arg_parser.add_argument(
+        "--cache-size", type=int, default=64, metavar="MB",
+        help="the maximal size of the translation cache (default: 64)")
+    arg_parser.add_argument(
+        "--format", action="append", choices=["asm", "hack", "bin", "rom"],
+        help="output format, may be given several times (default: asm). "
+             "The machine code formats are assembled in-process, and the "
+             "asm file is written only if it is requested too")
+    args = arg_parser.parse_args()
+    cache = None
+    if not args.no_cache:
+        cache = TranslationCache(args.cache_dir, TRANSLATOR_VERSION,
+                                 args.cache_size * 2**20)
+    argument_path = os.path.abspath(args.input_path)
     if os.path.isdir(argument_path):
         files_to_translate = [
             os.path.join(argument_path, filename)
-            for filename in os.listdir(argument_path)]
+            for filename in sorted(os.listdir(argument_path))]
         output_path = os.path.join(argument_path, os.path.basename(
             argument_path))
     else:
         files_to_translate = [argument_path]
         output_path, extension = os.path.splitext(argument_path)
-    output_path += ".asm"
-    bootstrap = True
-    with open(output_path, 'w') as output_file:
-        for input_path in files_to_translate:
-            filename, extension = os.path.splitext(input_path)
-            if extension.lower() != ".vm":
-                continue
-            with open(input_path, 'r') as input_file:
-                translate_file(input_file, output_file, bootstrap)
-            bootstrap = False
+    files_to_translate = [
+        input_path for input_path in files_to_translate
+        if os.path.splitext(input_path)[1].lower() == ".vm"]
+    try:
+        functions = {}
+        if args.level >= 2:
+            for input_path in files_to_translate:
+                with open(input_path, 'r') as input_file:
+                    functions.update(VMOptimizer.leaf_functions(
+                        list(Parser.stream(input_file)), os.path.splitext(
+                            os.path.basename(input_path))[0]))
+        options = dict(shared=args.shared, peephole=args.peephole,
+                       register=args.register, level=args.level,
+                       functions=functions)
+        formats = args.format or ["asm"]
+        binary_formats = [fmt for fmt in formats if fmt != "asm"]
+        if not binary_formats:
+            with open(output_path + ".asm", 'w') as output_file:
+                translate_paths(files_to_translate, output_file, args.jobs,
+                                cache, **options)
+        else:
+            from HackEncoder import HackEncoder
+            debug_file = None
+            if "asm" in formats:
+                debug_file = open(output_path + ".asm", 'w')
+            try:
+                encoder = HackEncoder(debug_file)
+                translate_paths(files_to_translate, encoder, args.jobs, cache,
+                                **options)
+                HackEncoder.save(encoder.close(), output_path, binary_formats)
+            finally:
+                if debug_file is not None:
+                    debug_file.close()
+    except (ValueError, KeyError) as error:
+        # parse and translation errors start with file:line
+        print(error.args[0] if error.args else error, file=sys.stderr)
+        sys.exit(1)
+    if cache is not None:
+        cache.evict()
@@ -8,6 +8,68 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 import typing
 
 
+# The command type of every VM command keyword.
+COMMAND_TYPES = {
+    "add": "C_ARITHMETIC", "sub": "C_ARITHMETIC", "neg": "C_ARITHMETIC",
+    "and": "C_ARITHMETIC", "or": "C_ARITHMETIC", "not": "C_ARITHMETIC",
+    "shiftleft": "C_ARITHMETIC", "shiftright": "C_ARITHMETIC",
+    "eq": "C_ARITHMETIC", "gt": "C_ARITHMETIC", "lt": "C_ARITHMETIC",
+    "push": "C_PUSH",
+    "pop": "C_POP",
+    "label": "C_LABEL",
+    "if-goto": "C_IF",
+    "goto": "C_GOTO",
+    "function": "C_FUNCTION",
+    "return": "C_RETURN",
+    "call": "C_CALL",
+}
+
+# The number of arguments of every command type. The second argument of a
+# command is always an integer.
+ARGUMENT_COUNTS = {
+    "C_ARITHMETIC": 0, "C_PUSH": 2, "C_POP": 2, "C_LABEL": 1, "C_IF": 1,
+    "C_GOTO": 1, "C_FUNCTION": 2, "C_RETURN": 0, "C_CALL": 2,
+}
+
+
+class Command:
+    """A single classified VM command. Each line of the input is classified
+    and split into its arguments exactly once.
+    """
+    __slots__ = ("type", "arg1", "arg2", "line")
+
+    def __init__(self, command: str, line: int = 0) -> None:
+        """Classifies a single cleaned command (no comments).
+
+        Args:
+            command (str): the command to classify.
+            line (int): the number of the source line of the command,
+                starting at 1, or 0 if it has no source line.
+
+        Raises:
+            ValueError: if the command is unknown, has the wrong number of
+            arguments, or its second argument is not an integer.
+        """
+        self.line = line
+        parts = command.split()
+        self.type = COMMAND_TYPES.get(parts[0])
+        if self.type is None:
+            raise ValueError("unknown VM command: " + command)
+        count = ARGUMENT_COUNTS[self.type]
+        if len(parts) != count + 1:
+            raise ValueError("{} expects {} argument{}: {}".format(
+                parts[0], count, "" if count == 1 else "s", command))
+        if self.type == "C_ARITHMETIC":
+            self.arg1 = parts[0]
+        else:
+            self.arg1 = parts[1] if count > 0 else ""
+        self.arg2 = 0
+        if count == 2:
+            if not parts[2].isdigit():
+                raise ValueError("not a non-negative integer: " + parts[2])
+            self.arg2 = int(parts[2])
+
+
 class Parser:
     """
     # Parser
@@ -52,9 +114,28 @@ class Parser:
         Args:
             input_file (typing.TextIO): input file.
         """
-        input_lines = input_file.read().splitlines()
-        self.commands = []
-        for line in input_lines:
+        self.commands = list(Parser.stream(input_file))
+        self.curr_command = None
+        self.counter = 0
+
+    @staticmethod
+    def stream(input_file: typing.TextIO) -> typing.Iterator[Command]:
+        """Lazily reads the input file line-by-line, and classifies its
+        commands. Only the current line is kept in memory, so this can parse
+        inputs of any size.
+
+        Args:
+            input_file (typing.TextIO): input file.
+
+        Returns:
+            typing.Iterator[Command]: an iterator over the commands, with the
+            numbers of their source lines.
+
+        Raises:
+            ValueError: if a command is malformed. The message starts with
+            the name of the input file and the number of the line.
+        """
+        for number, line in enumerate(input_file, 1):
             line = line.lstrip()
             if (line == "") or (line[0:2] == '//'):
                 continue
@@ -62,9 +143,15 @@ class Parser:
             if '/' in line:
                 end_line = line.index('/')
             line = line[:end_line].rstrip()
-            self.commands.append(line)
-        self.curr_command = ""
-        self.counter = 0
+            if line == "":
+                continue
+            try:
+                command = Command(line, number)
+            except (ValueError, IndexError) as error:
+                raise ValueError("{}:{}: {}".format(
+                    getattr(input_file, "name", "<input>"), number,
+                    error)) from None
+            yield command
 
     def has_more_commands(self) -> bool:
         """Are there more commands in the input?
@@ -91,31 +178,7 @@ class Parser:
             "C_PUSH", "C_POP", "C_LABEL", "C_GOTO", "C_IF", "C_FUNCTION",
             "C_RETURN", "C_CALL".
         """
-        command = self.curr_command
-        ind = command.find(' ')
-        if ind != -1:
-            command = command[:ind]
-        if ("add" == command) or ("sub" == command) or ("neg" == command) \
-                or ("and" == command) or ("or" == command) or ("not" == command) \
-                or ("shiftleft" == command) or ("shiftright" == command) \
-                or ("eq" == command) or ("gt" == command) or ("lt" == command):
-            return "C_ARITHMETIC"
-        if "push" == command:
-            return "C_PUSH"
-        if "pop" == command:
-            return "C_POP"
-        if "label" == command:
-            return "C_LABEL"
-        if "if-goto" == command:
-            return "C_IF"
-        if "goto" == command:
-            return "C_GOTO"
-        if "function" == command:
-            return "C_FUNCTION"
-        if "return" == command:
-            return "C_RETURN"
-        if "call" == command:
-            return "C_CALL"
+        return self.curr_command.type
 
     def arg1(self) -> str:
         """
@@ -124,14 +187,7 @@ class Parser:
             "C_ARITHMETIC", the command itself (add, sub, etc.) is returned.
             Should not be called if the current command is "C_RETURN".
         """
-        command = self.curr_command
-        if self.command_type() == "C_ARITHMETIC":
-            return command
-        ind1 = command.find(' ') + 1
-        ind2 = command[ind1:].find(' ') + ind1
-        if ind2 - ind1 == -1:
-            return command[ind1:]
-        return command[ind1: ind2]
+        return self.curr_command.arg1
 
     def arg2(self) -> int:
         """
@@ -140,7 +196,13 @@ class Parser:
             called only if the current command is "C_PUSH", "C_POP",
             "C_FUNCTION" or "C_CALL".
         """
-        command = self.curr_command
-        ind1 = command.find(' ') + 1
-        ind2 = command[ind1:].find(' ') + ind1
-        return int(command[ind2 + 1:])
+        return self.curr_command.arg2
+
+    def __iter__(self) -> typing.Iterator[Command]:
+        """Iterates over all the classified commands of the input, regardless
+        of the current command.
+
+        Returns:
+            typing.Iterator[Command]: an iterator over the commands.
+        """
+        return iter(self.commands)
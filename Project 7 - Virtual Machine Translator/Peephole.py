@@ -0,0 +1,178 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+# Conditions on the instructions that follow a window, by the index of the
+# first of them.
+_DEAD_A = lambda code, end: Peephole.dead(code, end, "A")
+_DEAD_D = lambda code, end: Peephole.dead(code, end, "D")
+_DEAD_AD = lambda code, end: Peephole.dead(code, end, "AD")
+# A is loaded with anything but SP, so the stack pointer is not incremented.
+_LOADS_NOT_SP = lambda code, end: end < len(code) and \
+    code[end][0] == "@" and code[end] != "@SP"
+
+# Rewrite rules over windows of instructions: (pattern, replacement, the
+# condition on the following instructions or None). The words above the
+# stack pointer are free, so stores to them that are never read are dropped.
+RULES = (
+    # a push followed by a pop: SP++, SP-- and A = SP
+    (("@SP", "M=M+1", "@SP", "AM=M-1"), ("@SP", "A=M"), None),
+    # reads back a value that was just stored
+    (("M=D", "D=M"), ("M=D",), None),
+    # A still holds the top of the stack
+    (("@SP", "A=M", "M=D", "@SP", "A=M"), ("@SP", "A=M", "M=D"), None),
+    # a free word is stored and is never read
+    (("@SP", "A=M", "M=D", "A=A-1"), ("@SP", "A=M-1"), None),
+    (("@SP", "A=M", "M=D"), (), _LOADS_NOT_SP),
+    (("A=M", "A=A-1"), ("A=M-1",), None),
+    # constants that the ALU computes without loading them to A
+    (("@0", "D=A"), ("D=0",), _DEAD_A),
+    (("@1", "D=A"), ("D=1",), _DEAD_A),
+    # arithmetic with a constant operand on the top of the stack
+    (("D=0", "@SP", "A=M-1", "M=M+D"), (), _DEAD_AD),
+    (("D=0", "@SP", "A=M-1", "M=M-D"), (), _DEAD_AD),
+    (("D=0", "@SP", "A=M-1", "M=M|D"), (), _DEAD_AD),
+    (("D=0", "@SP", "A=M-1", "M=M&D"), ("@SP", "A=M-1", "M=0"), _DEAD_D),
+    (("D=1", "@SP", "A=M-1", "M=M+D"), ("@SP", "A=M-1", "M=M+1"), _DEAD_D),
+    (("D=1", "@SP", "A=M-1", "M=M-D"), ("@SP", "A=M-1", "M=M-1"), _DEAD_D),
+)
+
+# The registers that instructions read and write, see Peephole.registers.
+_REGISTERS = {}
+
+# The rules by the first instruction of their pattern.
+RULES_BY_FIRST = {}
+for _rule in RULES:
+    RULES_BY_FIRST.setdefault(_rule[0][0], []).append(_rule)
+
+
+class Peephole:
+    """A peephole optimizer of Hack assembly code, as written by CodeWriter.
+    The code is rewritten by RULES until no rule applies, and loads of a
+    constant that A already holds are removed. Labels end every window, as
+    any state may reach them, and so does the end of the code. Comments are
+    removed.
+    """
+
+    @staticmethod
+    def registers(instruction: str) -> typing.Tuple[frozenset, frozenset]:
+        """
+        Args:
+            instruction (str): an instruction or a label.
+
+        Returns:
+            typing.Tuple[frozenset, frozenset]: the registers ("A" and "D")
+            that the instruction reads and writes. Labels and jumps read both
+            registers, as their successors are unknown.
+        """
+        registers = _REGISTERS.get(instruction)
+        if registers is not None:
+            return registers
+        if instruction[0] == "@":
+            reads, writes = "", "A"
+        elif instruction[0] == "(" or ";" in instruction:
+            reads, writes = "AD", ""
+        else:
+            dest, comp = instruction.split("=")
+            # M is addressed by A, whether it is read or written
+            reads = ("A" if "A" in comp or "M" in instruction else "") + \
+                ("D" if "D" in comp else "")
+            writes = ("A" if "A" in dest else "") + ("D" if "D" in dest else "")
+        registers = frozenset(reads), frozenset(writes)
+        _REGISTERS[instruction] = registers
+        return registers
+
+    @staticmethod
+    def dead(code: typing.List[str], start: int, registers: str) -> bool:
+        """
+        Args:
+            code (typing.List[str]): the instructions.
+            start (int): an index in code.
+            registers (str): registers, as "A", "D" or "AD".
+
+        Returns:
+            bool: whether the values of the registers before code[start] are
+            never read.
+        """
+        live = frozenset(registers)
+        for index in range(start, len(code)):
+            reads, writes = Peephole.registers(code[index])
+            if live & reads:
+                return False
+            live -= writes
+            if not live:
+                return True
+        return False
+
+    @staticmethod
+    def rewrite(code: typing.List[str]) -> typing.List[str]:
+        """Applies the rules once, from the start of the code to its end.
+
+        Args:
+            code (typing.List[str]): the instructions.
+
+        Returns:
+            typing.List[str]: the rewritten instructions.
+        """
+        result = []
+        index = 0
+        while index < len(code):
+            instruction = code[index]
+            for pattern, replacement, condition in RULES_BY_FIRST.get(
+                    instruction, ()):
+                end = index + len(pattern)
+                if tuple(code[index:end]) == pattern and \
+                        (condition is None or condition(code, end)):
+                    result.extend(replacement)
+                    index = end
+                    break
+            else:
+                result.append(instruction)
+                index += 1
+        return result
+
+    @staticmethod
+    def remove_reloads(code: typing.List[str]) -> typing.List[str]:
+        """Removes loads of a constant that A already holds.
+
+        Args:
+            code (typing.List[str]): the instructions.
+
+        Returns:
+            typing.List[str]: the instructions without the redundant loads.
+        """
+        result = []
+        loaded = None
+        for instruction in code:
+            if instruction == loaded:
+                continue
+            result.append(instruction)
+            if instruction[0] == "@":
+                loaded = instruction
+            elif "A" in Peephole.registers(instruction)[1] or \
+                    instruction[0] == "(":
+                loaded = None
+        return result
+
+    @staticmethod
+    def optimize(code: str) -> str:
+        """
+        Args:
+            code (str): Hack assembly code, one instruction per line.
+
+        Returns:
+            str: the optimized code.
+        """
+        instructions = [line for line in code.splitlines()
+                        if line and not line.startswith("//")]
+        while True:
+            optimized = Peephole.remove_reloads(
+                Peephole.rewrite(instructions))
+            if optimized == instructions:
+                return "".join(line + "\n" for line in optimized)
+            instructions = optimized
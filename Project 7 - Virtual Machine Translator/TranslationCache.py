@@ -0,0 +1,31 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+from AssemblerModules import assembler_module
+
+# The cache is shared with the assembler.
+FileCache = assembler_module("FileCache").FileCache
+
+
+class TranslationCache(FileCache):
+    """An on-disk cache of translated VM files, see FileCache. Every entry
+    holds the assembly fragment of one file, and is keyed by the file's
+    source and by the context it was translated in (its name, which
+    namespaces its labels, and the translator's options), so a fragment is
+    only reused where it links the same way. The key of a file is
+    key(context, source).
+    """
+    NAME = "vm-translator"
+    EXTENSION = ".asm"
+
+    @staticmethod
+    def encode(fragment: str) -> bytes:
+        return fragment.encode()
+
+    @staticmethod
+    def decode(data: bytes) -> str:
+        return data.decode()
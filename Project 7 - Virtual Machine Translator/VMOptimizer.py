@@ -0,0 +1,263 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from Parser import Command
+
+
+def _signed(value: int) -> int:
+    """
+    Args:
+        value (int): a 16-bit word.
+
+    Returns:
+        int: the word as a two's complement integer.
+    """
+    value &= 0xFFFF
+    return value - 0x10000 if value & 0x8000 else value
+
+
+# The computations of the arithmetic commands on constant 16-bit words, by
+# the number of their operands. Results are masked to 16 bits by the caller.
+UNARY_FUNCTIONS = {
+    "neg": lambda y: -y,
+    "not": lambda y: ~y,
+    "shiftleft": lambda y: y << 1,
+    "shiftright": lambda y: _signed(y) >> 1,
+}
+BINARY_FUNCTIONS = {
+    "add": lambda x, y: x + y,
+    "sub": lambda x, y: x - y,
+    "and": lambda x, y: x & y,
+    "or": lambda x, y: x | y,
+    "eq": lambda x, y: -(x == y),
+    "gt": lambda x, y: -(_signed(x) > _signed(y)),
+    "lt": lambda x, y: -(_signed(x) < _signed(y)),
+}
+
+# The segments that an inlined function may push from. The callee of a call
+# sees the same pointer, this, that and temp segments as its caller, and
+# static is allowed only within the same file.
+INLINE_SEGMENTS = ("constant", "temp", "pointer", "this", "that", "static")
+
+# The maximal number of commands in the body of an inlined function.
+INLINE_LIMIT = 8
+
+
+class VMOptimizer:
+    """Optimizes the commands of a VM file before they are translated. The
+    commands of every function are split into basic blocks, which form its
+    control flow graph. By the optimization level:
+
+    - 0: nothing is optimized.
+    - 1: constant expressions, and branches on constants, are folded within
+      basic blocks, and blocks that are unreachable from the function's
+      entry are removed.
+    - 2: in addition, calls of small leaf functions are inlined, see
+      leaf_functions.
+    """
+
+    def __init__(self, level: int,
+                 functions: typing.Optional[dict] = None) -> None:
+        """
+        Args:
+            level (int): the optimization level.
+            functions (typing.Optional[dict]): the functions that may be
+                inlined, see leaf_functions.
+        """
+        self.level = level
+        self.functions = functions or {}
+
+    @staticmethod
+    def leaf_functions(commands: typing.List[Command],
+                       file_name: str) -> dict:
+        """Finds the functions of a file that may be inlined: functions
+        without arguments or local variables, whose bodies are at most
+        INLINE_LIMIT commands that push from INLINE_SEGMENTS or compute,
+        and end with a return of the single value they pushed.
+
+        Args:
+            commands (typing.List[Command]): the commands of the file.
+            file_name (str): the name of the file, without its extension.
+
+        Returns:
+            dict: (file name, body without the return) by function name.
+        """
+        functions = {}
+        for start, function in enumerate(commands):
+            if function.type != "C_FUNCTION" or function.arg2:
+                continue
+            body = []
+            depth = 0
+            for command in commands[start + 1:start + INLINE_LIMIT + 2]:
+                if command.type == "C_RETURN":
+                    if depth == 1:
+                        functions[function.arg1] = file_name, body
+                    break
+                if command.type == "C_PUSH" and \
+                        command.arg1 in INLINE_SEGMENTS:
+                    depth += 1
+                elif command.type == "C_ARITHMETIC" and depth >= 1 + (
+                        command.arg1 in BINARY_FUNCTIONS):
+                    depth -= command.arg1 in BINARY_FUNCTIONS
+                else:
+                    break
+                body.append(command)
+        return functions
+
+    @staticmethod
+    def blocks(commands: typing.List[Command]) -> typing.List[list]:
+        """Splits commands into basic blocks. A block starts at a function,
+        at a label, or after a branch or a return.
+
+        Args:
+            commands (typing.List[Command]): the commands.
+
+        Returns:
+            typing.List[list]: the blocks, in order.
+        """
+        blocks = [[]]
+        for command in commands:
+            if command.type in ("C_FUNCTION", "C_LABEL") and blocks[-1]:
+                blocks.append([])
+            blocks[-1].append(command)
+            if command.type in ("C_GOTO", "C_IF", "C_RETURN"):
+                blocks.append([])
+        return [block for block in blocks if block]
+
+    @staticmethod
+    def reachable(blocks: typing.List[list]) -> typing.List[bool]:
+        """
+        Args:
+            blocks (typing.List[list]): the basic blocks of a file.
+
+        Returns:
+            typing.List[bool]: whether each block is reachable from the
+            entry of its function, or from the start of the file if it
+            precedes every function.
+        """
+        # labels are local to their functions
+        functions = []
+        labels = {}
+        pending = [0]
+        function = ""
+        for index, block in enumerate(blocks):
+            if block[0].type == "C_FUNCTION":
+                function = block[0].arg1
+                pending.append(index)
+            elif block[0].type == "C_LABEL":
+                labels[function, block[0].arg1] = index
+            functions.append(function)
+        reached = [False] * len(blocks)
+        while pending:
+            index = pending.pop()
+            if reached[index]:
+                continue
+            reached[index] = True
+            last = blocks[index][-1]
+            if last.type in ("C_GOTO", "C_IF"):
+                target = labels.get((functions[index], last.arg1))
+                if target is not None:
+                    pending.append(target)
+            if last.type not in ("C_GOTO", "C_RETURN") and \
+                    index + 1 < len(blocks) and \
+                    blocks[index + 1][0].type != "C_FUNCTION":
+                pending.append(index + 1)
+        return reached
+
+    @staticmethod
+    def fold(block: typing.List[Command]) -> typing.List[Command]:
+        """Folds the constant expressions of a basic block, and its branch
+        if it is taken on a constant. A constant is written as a single push
+        if it is in 0..32767, and as a push and a not otherwise.
+
+        Args:
+            block (typing.List[Command]): a basic block.
+
+        Returns:
+            typing.List[Command]: the folded block.
+        """
+        result = []
+        constants = []  # (value, commands) of the constants on top of result
+        for command in block:
+            operands = 0
+            if command.type == "C_ARITHMETIC":
+                operands = 2 if command.arg1 in BINARY_FUNCTIONS else 1
+            elif command.type == "C_IF":
+                operands = 1
+            if command.type == "C_PUSH" and command.arg1 == "constant":
+                result.append(command)
+                constants.append((command.arg2, 1))
+                continue
+            if not operands or len(constants) < operands:
+                result.append(command)
+                constants = []
+                continue
+            values = []
+            for value, length in constants[-operands:]:
+                values.append(value)
+                del result[-length:]
+            del constants[-operands:]
+            if command.type == "C_IF":
+                if values[0]:
+                    result.append(Command("goto " + command.arg1))
+                continue
+            if operands == 2:
+                value = BINARY_FUNCTIONS[command.arg1](*values) & 0xFFFF
+            else:
+                value = UNARY_FUNCTIONS[command.arg1](*values) & 0xFFFF
+            if value < 0x8000:
+                folded = [Command("push constant " + str(value))]
+            else:
+                folded = [Command("push constant " + str(~value & 0xFFFF)),
+                          Command("not")]
+            result.extend(folded)
+            constants.append((value, len(folded)))
+        return result
+
+    def inline(self, commands: typing.List[Command],
+               file_name: str) -> typing.List[Command]:
+        """Replaces calls of the inlinable functions with their bodies.
+
+        Args:
+            commands (typing.List[Command]): the commands of a file.
+            file_name (str): the name of the file, without its extension.
+
+        Returns:
+            typing.List[Command]: the commands with the calls inlined.
+        """
+        result = []
+        for command in commands:
+            function = self.functions.get(command.arg1) \
+                if command.type == "C_CALL" and command.arg2 == 0 else None
+            if function is None or (function[0] != file_name and any(
+                    body.arg1 == "static" for body in function[1])):
+                result.append(command)
+            else:
+                result.extend(function[1])
+        return result
+
+    def optimize(self, commands: typing.List[Command],
+                 file_name: str) -> typing.List[Command]:
+        """
+        Args:
+            commands (typing.List[Command]): the commands of a file.
+            file_name (str): the name of the file, without its extension.
+
+        Returns:
+            typing.List[Command]: the optimized commands.
+        """
+        if self.level < 1:
+            return commands
+        if self.level >= 2:
+            commands = self.inline(commands, file_name)
+        blocks = [VMOptimizer.fold(block)
+                  for block in VMOptimizer.blocks(commands)]
+        blocks = [block for block in blocks if block]
+        return [command for block, reached in zip(
+                    blocks, VMOptimizer.reachable(blocks))
+                if reached for command in block]